@@ -0,0 +1,394 @@
+"""
+Candidate analysis of interview transcripts with GPT
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import ANALYSIS_CONFIG, OPENAI_CONFIG
+from json_stream import JSONObjectStream
+from metrics import GPT_FIRST_FIELD_SECONDS, GPT_REQUEST_SECONDS, GPT_TOKENS
+from scheduler import PRIORITY_BACKGROUND, PRIORITY_FINAL, estimate_tokens
+
+SYSTEM_PROMPT = "You are an expert HR analyst. Extract candidate details from interview transcripts in a structured format."
+
+CANDIDATE_FIELDS = """        - name: Candidate's name (if mentioned)
+        - experience: Years of experience and relevant background
+        - skills: Technical and soft skills mentioned
+        - education: Educational background
+        - current_role: Current or most recent position
+        - key_achievements: Notable accomplishments mentioned
+        - interview_notes: General observations and notes
+        - strengths: Key strengths demonstrated
+        - areas_of_concern: Any concerns or areas for improvement
+        - overall_assessment: Brief overall assessment"""
+
+
+def _complete(client, prompt, scheduler=None, priority=PRIORITY_BACKGROUND, on_field=None):
+    """Run a chat completion and return its text.
+
+    With `on_field`, the completion is streamed and `on_field(key, value)` is
+    called for each top-level member of the JSON answer as soon as it is complete.
+    """
+    model = OPENAI_CONFIG['gpt_model']
+    stream = on_field is not None
+    timing = {}
+
+    def request():
+        timing['sent'] = time.perf_counter()
+        options = {'stream': True, 'stream_options': {'include_usage': True}} if stream else {}
+        return client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=OPENAI_CONFIG['max_tokens'],
+            temperature=OPENAI_CONFIG['temperature'],
+            **options
+        )
+
+    if scheduler is None:
+        response = request()
+    else:
+        tokens = estimate_tokens(SYSTEM_PROMPT + prompt, OPENAI_CONFIG['max_tokens'])
+        response = scheduler.call(model, request, priority, tokens)
+
+    if stream:
+        parser = JSONObjectStream()
+        parts = []
+        usage = None
+        first_field = True
+        for chunk in response:
+            usage = getattr(chunk, 'usage', None) or usage
+            content = chunk.choices[0].delta.content if chunk.choices else None
+            if not content:
+                continue
+            parts.append(content)
+            for key, value in parser.feed(content):
+                if first_field:
+                    GPT_FIRST_FIELD_SECONDS.labels(model).observe(time.perf_counter() - timing['sent'])
+                    first_field = False
+                on_field(key, value)
+        content = ''.join(parts)
+    else:
+        usage = getattr(response, 'usage', None)
+        content = response.choices[0].message.content
+    GPT_REQUEST_SECONDS.labels(model).observe(time.perf_counter() - timing['sent'])
+
+    if usage is not None:
+        GPT_TOKENS.labels(model, 'prompt').inc(usage.prompt_tokens or 0)
+        GPT_TOKENS.labels(model, 'completion').inc(usage.completion_tokens or 0)
+    return content
+
+
+def _complete_json(client, prompt, cache=None, scheduler=None, priority=PRIORITY_BACKGROUND, on_field=None):
+    """Run a completion and parse it as JSON; parsed results are cached by prompt and model settings"""
+    key = None
+    if cache is not None:
+        key = cache.make_key('chat', prompt, {
+            'model': OPENAI_CONFIG['gpt_model'],
+            'max_tokens': OPENAI_CONFIG['max_tokens'],
+            'temperature': OPENAI_CONFIG['temperature']
+        })
+        cached = cache.get(key)
+        if cached is not None:
+            if on_field is not None and isinstance(cached, dict):
+                for field, value in cached.items():
+                    on_field(field, value)
+            return cached
+
+    # Raises json.JSONDecodeError (holding the raw content in .doc) for non-JSON answers
+    result = json.loads(_complete(client, prompt, scheduler, priority, on_field))
+    if key is not None:
+        cache.put(key, result)
+    return result
+
+
+def split_transcript(transcript, max_tokens):
+    """Split a transcript into consecutive pieces of at most about `max_tokens` tokens.
+
+    Pieces break between lines, or between words for lines that are too long
+    (and for transcripts without line breaks). They are packed greedily from
+    the start, so a transcript that has only grown at the end splits into the
+    same leading pieces as before.
+    """
+    separator = '\n' if '\n' in transcript.strip() else ' '
+    units = []
+    for line in transcript.splitlines() if separator == '\n' else [transcript]:
+        if estimate_tokens(line) > max_tokens or separator == ' ':
+            units.extend(line.split())
+        elif line.strip():
+            units.append(line)
+
+    pieces = []
+    current = []
+    size = 0
+    for unit in units:
+        cost = estimate_tokens(unit) + 1
+        if current and size + cost > max_tokens:
+            pieces.append(separator.join(current))
+            current = []
+            size = 0
+        current.append(unit)
+        size += cost
+    if current:
+        pieces.append(separator.join(current))
+    return pieces
+
+
+def _extract_partial(client, piece, cache, scheduler, priority):
+    """Candidate details mentioned in one piece of a long transcript"""
+    # The prompt holds only the piece, so an unchanged piece is answered from the cache
+    prompt = f"""
+        The following is one consecutive part of a longer interview transcript. Extract
+        the candidate's details that this part mentions; leave a field empty when the
+        part says nothing about it.
+
+        Transcript part:
+        {piece}
+
+        Respond with only a JSON object with these fields:
+{CANDIDATE_FIELDS}
+        """
+    return _complete_json(client, prompt, cache, scheduler, priority)
+
+
+def _merge_partials(client, partials, cache, scheduler, priority, on_field=None):
+    """Merge partial extractions, in interview order, into one profile"""
+    prompt = f"""
+        You are combining notes taken on consecutive parts of one interview into a
+        single candidate profile.
+
+        Partial extractions, in interview order (JSON):
+        {json.dumps(partials, indent=2)}
+
+        Merge them: combine lists without duplicates, keep the most specific facts, and
+        where parts disagree prefer the later one. Respond with only the merged profile
+        as a JSON object with these fields:
+{CANDIDATE_FIELDS}
+        """
+    return _complete_json(client, prompt, cache, scheduler, priority, on_field)
+
+
+def _group_partials(partials, max_tokens):
+    """Consecutive groups of partial extractions that fit one merge prompt, at least two per group"""
+    groups = []
+    current = []
+    size = 0
+    for partial in partials:
+        cost = estimate_tokens(json.dumps(partial, indent=2))
+        if len(current) >= 2 and size + cost > max_tokens:
+            groups.append(current)
+            current = []
+            size = 0
+        current.append(partial)
+        size += cost
+    groups.append(current)
+    return groups
+
+
+def _map_reduce_candidate_details(client, pieces, cache, scheduler, priority, on_field):
+    """Extract details from each piece concurrently, then merge them, in rounds if they don't fit one prompt"""
+    max_tokens = ANALYSIS_CONFIG['max_chunk_tokens']
+    with ThreadPoolExecutor(max_workers=ANALYSIS_CONFIG['map_workers']) as executor:
+        futures = [executor.submit(_extract_partial, client, piece, cache, scheduler, priority) for piece in pieces]
+        partials = []
+        for index, future in enumerate(futures):
+            try:
+                partial = future.result()
+            except Exception as e:
+                print(f"Error extracting candidate details from transcript part {index + 1}/{len(pieces)}: {e}")
+                continue
+            if isinstance(partial, dict):
+                partials.append(partial)
+        if not partials:
+            raise ValueError("No part of the transcript could be analysed")
+
+        # Merge groups that fit one prompt until a single merge covers everything
+        while len(partials) > 1 and estimate_tokens(json.dumps(partials, indent=2)) > max_tokens:
+            partials = list(executor.map(
+                lambda group: group[0] if len(group) == 1 else _merge_partials(client, group, cache, scheduler, priority),
+                _group_partials(partials, max_tokens)
+            ))
+
+    if len(partials) == 1:
+        if on_field is not None:
+            for field, value in partials[0].items():
+                on_field(field, value)
+        return partials[0]
+    return _merge_partials(client, partials, cache, scheduler, priority, on_field)
+
+
+def extract_candidate_details(client, transcript, cache=None, scheduler=None, priority=PRIORITY_FINAL, on_field=None):
+    """Extract candidate details from a whole transcript using GPT-4; `on_field` streams each detail as it is generated.
+
+    Transcripts longer than ANALYSIS_CONFIG['max_chunk_tokens'] are split into
+    pieces analysed concurrently, and the partial results are merged.
+    """
+    try:
+        pieces = split_transcript(transcript, ANALYSIS_CONFIG['max_chunk_tokens'])
+        prompt = f"""
+        Based on the following interview transcript, extract and organize the candidate's details in a structured format:
+
+        Transcript:
+        {transcript}
+
+        Please provide the following information in JSON format:
+{CANDIDATE_FIELDS}
+        """
+
+        # Try to parse JSON response
+        try:
+            if len(pieces) > 1:
+                return _map_reduce_candidate_details(client, pieces, cache, scheduler, priority, on_field)
+            return _complete_json(client, prompt, cache, scheduler, priority, on_field)
+        except json.JSONDecodeError as e:
+            # If JSON parsing fails, return the raw response
+            return {
+                "raw_response": e.doc,
+                "transcript": transcript
+            }
+
+    except Exception as e:
+        print(f"Error extracting candidate details: {e}")
+        return {
+            "error": str(e),
+            "transcript": transcript
+        }
+
+
+def update_candidate_profile(client, profile, new_transcript, cache=None, scheduler=None, priority=PRIORITY_BACKGROUND,
+                             on_field=None):
+    """Fold new transcript lines into an existing candidate profile.
+
+    Returns the updated profile, or raises if the model's answer is not a JSON
+    object. The prompt holds only the current profile and the new lines, so
+    its size does not grow with the length of the interview. `on_field` streams
+    each field of the updated profile as it is generated.
+    """
+    prompt = f"""
+        You are keeping notes on a candidate while an interview is in progress.
+
+        Current candidate profile (JSON, may be empty):
+        {json.dumps(profile, indent=2)}
+
+        New interview transcript lines since the profile was last updated:
+        {new_transcript}
+
+        Update the profile with anything the new lines add or change, keeping earlier
+        information that is still valid. Respond with only the complete updated profile
+        as a JSON object with these fields:
+{CANDIDATE_FIELDS}
+        """
+
+    updated = _complete_json(client, prompt, cache, scheduler, priority, on_field)
+    if not isinstance(updated, dict):
+        raise ValueError("Profile update is not a JSON object")
+    return updated
+
+
+class RollingCandidateAnalyzer:
+    """Updates a structured candidate profile in the background during an interview.
+
+    Transcript items are queued with `add`; a background thread folds them into
+    the profile in batches of at least `min_batch_items` items, at most once per
+    `interval` seconds. `finalize` stops the thread and folds in whatever is
+    left, so the work remaining at stop is one small update regardless of
+    interview length. Failed background updates keep their batch queued for
+    the next pass; a failed final pass is raised from `finalize`.
+    `update(profile, new_transcript, final)` is told whether it is that last pass.
+    """
+
+    def __init__(self, update, on_update=None, min_batch_items=None, interval=None):
+        self._update = update
+        self._on_update = on_update
+        self.min_batch_items = min_batch_items or ANALYSIS_CONFIG['min_batch_items']
+        self.interval = interval or ANALYSIS_CONFIG['interval']
+
+        self.profile = {}
+        self.version = 0
+        self.analysed_items = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            self.profile = {}
+            self.version = 0
+            self.analysed_items = 0
+            self._pending = []
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def add(self, items):
+        with self._lock:
+            self._pending.extend(items)
+
+    def stop(self):
+        """Stop background updates without a final pass"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def finalize(self, timeout=None):
+        """Stop background updates, fold in the remaining items and return the profile.
+
+        Waiting for an update already in flight counts against `timeout`;
+        raises TimeoutError when it runs out, or the final update's error if
+        it fails. Either way the profile is missing the items still queued.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        remaining = -1 if deadline is None else max(0.0, deadline - time.monotonic())
+        if not self._update_lock.acquire(timeout=remaining):
+            raise TimeoutError(f"Candidate profile update still running after {timeout}s")
+        try:
+            self._fold_pending(min_items=1, final=True)
+        finally:
+            self._update_lock.release()
+        return self.profile
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._update_lock:
+                try:
+                    self._fold_pending(min_items=self.min_batch_items)
+                except Exception as e:
+                    print(f"Error updating candidate profile: {e}")
+
+    def _fold_pending(self, min_items, final=False):
+        """Fold queued items into the profile; on failure they are queued again and the error raised"""
+        with self._lock:
+            if len(self._pending) < min_items:
+                return
+            batch = self._pending
+            self._pending = []
+            profile = self.profile
+
+        new_transcript = "\n".join(f"{item['speaker']}: {item['text']}" for item in batch)
+        try:
+            updated = self._update(profile, new_transcript, final)
+        except Exception:
+            with self._lock:
+                self._pending = batch + self._pending
+            raise
+
+        with self._lock:
+            self.profile = updated
+            self.version += 1
+            self.analysed_items += len(batch)
+            version = self.version
+        if self._on_update:
+            self._on_update(updated, version)
@@ -1,183 +1,412 @@
 import os
-import json
-import tempfile
 import threading
 import time
 import queue
 import base64
-from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, render_template, request, jsonify, send_file
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from socketio import packet as socketio_packet
 from openai import OpenAI
 from dotenv import load_dotenv
 import pyaudio
-import numpy as np
-import soundfile as sf
 from pydub import AudioSegment
 import librosa
 import io
-from config import AUDIO_CONFIG, TRANSCRIPTION_CONFIG, OPENAI_CONFIG, FLASK_CONFIG, SPEAKER_CONFIG, REALTIME_CONFIG
+from config import AUDIO_CONFIG, TRANSCRIPTION_CONFIG, FLASK_CONFIG, SPEAKER_CONFIG, REALTIME_CONFIG, VISUALIZATION_CONFIG, PROCESSING_CONFIG, SESSION_CONFIG, SOCKETIO_CONFIG, INGEST_CONFIG, ANALYSIS_CONFIG, CACHE_CONFIG, JOBS_CONFIG, TRANSCRIPT_CONFIG, SCHEDULER_CONFIG, RECORDING_CONFIG
+from transcription import TranscriptionPool, CachedTranscriptionBackend, create_transcription_backend
+from visualization import VisualizationStream
+from audio_store import AudioStore
+from audio_codec import encode_audio
+from preprocessing import build_preprocessor
+from vad import VoiceActivityChunker
+from timeline import TranscriptStitcher
+from sessions import SessionManager, SessionLimitError
+from ingest import AudioIngest
+from emitter import EmitDispatcher
+from capture import MicrophoneCapture
+from analysis import RollingCandidateAnalyzer, extract_candidate_details, update_candidate_profile
+from cache import ResultCache
+from diarization import OnlineSpeakerDiarizer
+from jobs import JobManager
+from transcript_store import TranscriptDatabase, TranscriptStore
+from recording import RecordingWriter, list_recordings, prune_recordings, recording_path, recover_recordings
+from speaker_stats import SpeakerStatistics
+from chunk_control import ChunkIntervalController
+from scheduler import OpenAIScheduler, PRIORITY_BACKGROUND, PRIORITY_FINAL, PRIORITY_LIVE
+from metrics import (REGISTRY, Gauge, TRANSCRIPTION_ENCODE_SECONDS, TRANSCRIPTION_UPLOAD_BYTES,
+                     TRANSCRIPTION_REQUEST_SECONDS, TRANSCRIPTION_ERRORS, TRANSCRIPTION_CHUNKS_DROPPED,
+                     SOCKETIO_EMITS, SOCKETIO_EMIT_BYTES)
 
 # Load environment variables
 load_dotenv()
 
+class _MeteredPacket(socketio_packet.Packet):
+    """Counts the bytes of each event as Socket.IO encodes it, so payloads are never serialized twice"""
+
+    def encode(self):
+        encoded = super().encode()
+        if self.packet_type in (socketio_packet.EVENT, socketio_packet.BINARY_EVENT) and self.data:
+            parts = encoded if isinstance(encoded, list) else [encoded]
+            SOCKETIO_EMIT_BYTES.labels(self.data[0]).inc(sum(len(part) for part in parts))
+        return encoded
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = FLASK_CONFIG['secret_key']
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", serializer=_MeteredPacket)
+
+def _send_event(event, data, to, skip_sid=None):
+    """Emit a server-initiated Socket.IO event and count it for /metrics"""
+    SOCKETIO_EMITS.labels(event).inc()
+    socketio.emit(event, data, to=to, skip_sid=skip_sid)
+
+def _room_participants(room):
+    return [sid for sid, _ in socketio.server.manager.get_participants('/', room)]
+
+def _client_backlog(sid):
+    """Packets queued for a client but not yet written to its connection"""
+    eio_socket = socketio.server.eio.sockets.get(socketio.server.manager.eio_sid_from_sid(sid, '/'))
+    return eio_socket.queue.qsize() if eio_socket is not None else 0
+
+# Server-initiated events go through one dispatcher, so producer threads never wait on clients
+dispatcher = EmitDispatcher(
+    _send_event,
+    _room_participants,
+    _client_backlog,
+    coalesce=SOCKETIO_CONFIG['coalesce_events'],
+    per_client=SOCKETIO_CONFIG['frame_events'],
+    max_client_backlog=SOCKETIO_CONFIG['max_client_backlog']
+)
+dispatcher.start()
+
+def _socket_emit(event, data, to):
+    """Queue a server-initiated Socket.IO event for the clients in room `to`"""
+    dispatcher.submit(event, data, to)
+
+# Configure OpenAI client; with the scheduler enabled, retries are left to it
+client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0 if SCHEDULER_CONFIG['enabled'] else 2)
 
-# Configure OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# Rate limits, retries and priorities for OpenAI requests, shared by all sessions
+scheduler = None
+if SCHEDULER_CONFIG['enabled']:
+    scheduler = OpenAIScheduler(
+        SCHEDULER_CONFIG['limits'],
+        max_attempts=SCHEDULER_CONFIG['max_attempts'],
+        base_backoff=SCHEDULER_CONFIG['base_backoff'],
+        max_backoff=SCHEDULER_CONFIG['max_backoff'],
+        failure_threshold=SCHEDULER_CONFIG['failure_threshold'],
+        reset_timeout=SCHEDULER_CONFIG['reset_timeout'],
+        max_wait=SCHEDULER_CONFIG['max_wait']
+    )
+
+# Transcription and analysis results keyed by content, shared by all sessions
+result_cache = None
+if CACHE_CONFIG['enabled']:
+    result_cache = ResultCache(
+        CACHE_CONFIG['directory'],
+        memory_bytes=CACHE_CONFIG['memory_bytes'],
+        disk_bytes=CACHE_CONFIG['disk_bytes']
+    )
+
+# Transcripts of every session, kept across restarts
+transcript_db = None
+if TRANSCRIPT_CONFIG['persist']:
+    transcript_db = TranscriptDatabase(TRANSCRIPT_CONFIG['database'])
+
+# Recordings cut short by a crash keep all but their last few seconds; make their headers say so
+if RECORDING_CONFIG['enabled']:
+    for path in recover_recordings(RECORDING_CONFIG['directory']):
+        print(f"Recovered recording {path}")
 
 class RealTimeAudioProcessor:
-    def __init__(self):
-        self.audio = pyaudio.PyAudio()
-        self.stream = None
+    def __init__(self, session_id=SESSION_CONFIG['default_session_id']):
+        # Events for this interview go only to clients in its Socket.IO room
+        self.session_id = session_id
+        self.room = f"session_{session_id}"
+        
+        # PyAudio is opened on first microphone recording
+        self.audio = None
+        self.capture = None
+        self.recording = None
+        self.ingest = None
         self.is_recording = False
-        self.audio_chunks = []
         self.sample_rate = AUDIO_CONFIG['sample_rate']
         self.chunk_size = AUDIO_CONFIG['chunk_size']
         self.channels = AUDIO_CONFIG['channels']
         
+        # Captured audio, held once as int16
+        self.audio_store = AudioStore(
+            self.sample_rate,
+            channels=self.channels,
+            initial_seconds=AUDIO_CONFIG['store_initial_seconds'],
+            growth_seconds=AUDIO_CONFIG['store_growth_seconds']
+        )
+        
         # Real-time transcription settings
         self.transcription_interval = TRANSCRIPTION_CONFIG['interval']
-        self.audio_buffer = []
-        self.last_transcription_time = 0
+        self.transcription_codec = TRANSCRIPTION_CONFIG['codec']
+        # Chunks are cleaned up for Whisper on the transcription workers, within a CPU budget
+        self.preprocessor = build_preprocessor(PROCESSING_CONFIG, budget=PROCESSING_CONFIG['cpu_budget'])
+        self.chunker = VoiceActivityChunker(
+            self.sample_rate,
+            min_length=TRANSCRIPTION_CONFIG['min_audio_length'],
+            target_length=self.transcription_interval,
+            max_length=TRANSCRIPTION_CONFIG['max_audio_length'],
+            overlap=TRANSCRIPTION_CONFIG['overlap'],
+            silence_threshold=PROCESSING_CONFIG['silence_threshold'],
+            min_pause=TRANSCRIPTION_CONFIG['min_pause']
+        )
+        # Lengthens chunks when transcription falls behind and shortens them when it keeps up
+        self.chunk_controller = None
+        if TRANSCRIPTION_CONFIG['adaptive_interval']:
+            self.chunk_controller = ChunkIntervalController(
+                self.transcription_interval,
+                min_length=TRANSCRIPTION_CONFIG['min_interval'],
+                max_length=TRANSCRIPTION_CONFIG['max_interval'],
+                workers=TRANSCRIPTION_CONFIG['workers']
+            )
         self.transcription_queue = queue.Queue()
         self.transcription_thread = None
+        self.transcription_dropped = 0
+        self._cancel_transcription = threading.Event()
+        self.transcription_backend = create_transcription_backend(TRANSCRIPTION_CONFIG['backend'], client, scheduler)
+        if result_cache is not None:
+            self.transcription_backend = CachedTranscriptionBackend(self.transcription_backend, result_cache)
+        self.transcription_pool = None
+        
+        # Live transcript with speaker information; appended by the result callback, read without locking
+        self.transcripts = TranscriptStore(session_id, transcript_db)
+        self.speaker_stats = SpeakerStatistics(SPEAKER_CONFIG['interruption_overlap'])
+        self.stitcher = TranscriptStitcher(self.sample_rate)
+        
+        # Binary envelope frames for the audio visualizer, emitted off the capture thread
+        self.visualization = VisualizationStream(
+            lambda payload, room: _socket_emit('audio_envelope', payload, room),
+            frame_rate=VISUALIZATION_CONFIG['frame_rate'],
+            default_bins=VISUALIZATION_CONFIG['default_bins'],
+            min_bins=VISUALIZATION_CONFIG['min_bins'],
+            max_bins=VISUALIZATION_CONFIG['max_bins'],
+            room_prefix=f"{self.room}_"
+        )
         
-        # Store live transcripts with speaker information
-        self.live_transcripts = []
-        self.transcript_lock = threading.Lock()
+        # Candidate profile kept up to date while the interview runs; only the pass at stop
+        # is urgent, and its fields are streamed to the page as they are generated
+        self.analyzer = RollingCandidateAnalyzer(
+            lambda profile, new_transcript, final: update_candidate_profile(
+                client, profile, new_transcript, result_cache, scheduler,
+                PRIORITY_FINAL if final else PRIORITY_BACKGROUND,
+                on_field=self._emit_candidate_field if final else None
+            ),
+            on_update=lambda profile, version: self._emit('candidate_profile', {'profile': profile, 'version': version})
+        )
         
         # Speaker diarization settings
         self.speaker_count = SPEAKER_CONFIG['speaker_count']
         self.speaker_labels = SPEAKER_CONFIG['speaker_labels']
         self.diarization_method = SPEAKER_CONFIG['diarization_method']
         self.confidence_threshold = SPEAKER_CONFIG['confidence_threshold']
+        self.diarizer = None
+        if SPEAKER_CONFIG['enabled'] and self.diarization_method == 'advanced':
+            self.diarizer = OnlineSpeakerDiarizer(
+                self.sample_rate,
+                self.speaker_labels,
+                max_speakers=self.speaker_count,
+                threshold=SPEAKER_CONFIG['similarity_threshold'],
+                min_duration=SPEAKER_CONFIG['segment_min_duration'],
+                max_analysis_seconds=SPEAKER_CONFIG['max_analysis_seconds'],
+                latency_budget=SPEAKER_CONFIG['latency_budget']
+            )
         
-    def start_recording(self):
+    def _emit(self, event, data):
+        """Emit an event to the clients watching this interview"""
+        _socket_emit(event, data, self.room)
+    
+    def _emit_candidate_field(self, field, value):
+        """Send one field of the final candidate analysis as soon as GPT has generated it"""
+        self._emit('candidate_field', {'field': field, 'value': value})
+    
+    def start_recording(self, source='microphone'):
+        """Start a recording from the server microphone, the browser ('browser'),
+        or any other source that calls feed_audio ('external')"""
         if self.is_recording:
             return
             
         self.is_recording = True
-        self.audio_chunks = []
-        self.audio_buffer = []
-        self.last_transcription_time = time.time()
+        self.capture = None
+        self.recording = None
+        self.audio_store.clear()
+        self.chunker.reset()
+        if self.chunk_controller:
+            self.chunk_controller.reset()
+            self.chunker.set_target_length(self.chunk_controller.target)
         
-        # Clear previous transcripts
-        with self.transcript_lock:
-            self.live_transcripts = []
+        # Start a new transcript; earlier ones stay in the database
+        self.transcripts.reset()
+        if RECORDING_CONFIG['enabled']:
+            # Stream the audio to disk as it arrives, named after the transcript it belongs to
+            self.recording = RecordingWriter(
+                self.audio_store,
+                recording_path(RECORDING_CONFIG['directory'], self.session_id, self.transcripts.recording_id),
+                flush_interval=RECORDING_CONFIG['flush_interval'],
+                fsync=RECORDING_CONFIG['fsync']
+            )
+            self.recording.start()
+        self.speaker_stats.reset()
+        self.stitcher.reset()
+        if self.diarizer:
+            # Speakers are learned afresh for each interview; warm librosa up off the request thread
+            self.diarizer.reset()
+            warmup_thread = threading.Thread(target=self.diarizer.warmup)
+            warmup_thread.daemon = True
+            warmup_thread.start()
+        if ANALYSIS_CONFIG['rolling']:
+            self.analyzer.start()
         
-        self.stream = self.audio.open(
-            format=getattr(pyaudio, AUDIO_CONFIG['format']),
-            channels=self.channels,
-            rate=self.sample_rate,
-            input=True,
-            frames_per_buffer=self.chunk_size
+        # Start transcription worker pool and the thread that feeds it
+        self.transcription_queue = queue.Queue()
+        self.transcription_dropped = 0
+        self._cancel_transcription.clear()
+        self.transcription_pool = TranscriptionPool(
+            self._transcribe_with_speakers,
+            self._handle_transcription_result,
+            workers=TRANSCRIPTION_CONFIG['workers'],
+            max_pending=TRANSCRIPTION_CONFIG['max_pending']
         )
-        
-        # Start transcription thread
         self.transcription_thread = threading.Thread(target=self._transcription_worker)
         self.transcription_thread.daemon = True
         self.transcription_thread.start()
         
-        def record_audio():
-            while self.is_recording:
-                try:
-                    data = self.stream.read(self.chunk_size, exception_on_overflow=False)
-                    audio_data = np.frombuffer(data, dtype=np.float32)
-                    self.audio_chunks.append(audio_data)
-                    self.audio_buffer.append(audio_data)
-                    
-                    # Send audio data to client for visualization
-                    socketio.emit('audio_data', {
-                        'data': audio_data.tolist(),
-                        'timestamp': time.time()
-                    })
-                    
-                    # Check if it's time for transcription
-                    current_time = time.time()
-                    if current_time - self.last_transcription_time >= self.transcription_interval:
-                        self._schedule_transcription()
-                        self.last_transcription_time = current_time
-                    
-                except Exception as e:
-                    print(f"Error recording audio: {e}")
-                    break
-                    
-        self.record_thread = threading.Thread(target=record_audio)
-        self.record_thread.start()
+        self.visualization.start()
         
-    def _schedule_transcription(self):
-        """Schedule audio buffer for transcription with speaker diarization"""
-        if len(self.audio_buffer) > 0:
-            # Convert buffer to audio data
-            audio_data = np.concatenate(self.audio_buffer)
-            
-            # Convert to 16-bit PCM for Whisper
-            audio_data_16bit = (audio_data * 32767).astype(np.int16)
-            
-            # Create temporary audio file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                sf.write(temp_file.name, audio_data_16bit, self.sample_rate)
-                self.transcription_queue.put(temp_file.name)
-            
-            # Clear buffer for next chunk
-            self.audio_buffer = []
+        if source == 'browser':
+            self.ingest = AudioIngest(
+                self.feed_audio,
+                self.transcription_backlog,
+                self._send_ingest_ack,
+                max_buffered_frames=INGEST_CONFIG['max_buffered_frames'],
+                max_backlog=INGEST_CONFIG['max_transcription_backlog'],
+                ack_interval=INGEST_CONFIG['ack_interval'],
+                reorder_window=INGEST_CONFIG['reorder_window']
+            )
+        if source != 'microphone':
+            return
+        
+        if self.audio is None:
+            self.audio = pyaudio.PyAudio()
+        self.capture = MicrophoneCapture(
+            self.audio,
+            self.feed_audio,
+            self.sample_rate,
+            channels=self.channels,
+            frames_per_buffer=self.chunk_size,
+            sample_format=AUDIO_CONFIG['format'],
+            max_buffers=AUDIO_CONFIG['capture_queue_buffers']
+        )
+        self.capture.start()
+    
+    def transcription_backlog(self):
+        """Chunks waiting for or undergoing transcription"""
+        pending = self.transcription_pool.pending() if self.transcription_pool else 0
+        return self.transcription_queue.qsize() + pending
+    
+    def _send_ingest_ack(self, ack):
+        if self.ingest and self.ingest.client_id:
+            _socket_emit('audio_ack', ack, self.ingest.client_id)
+    
+    def feed_audio(self, audio_data):
+        """Add captured samples (float32 or int16) to the recording pipeline"""
+        self.audio_store.append(audio_data)
+        
+        # Hand audio to the visualization stream; it emits on its own thread
+        self.visualization.push(audio_data)
+        
+        # Queue any chunks the voice activity detector has closed
+        self._schedule_transcription()
+        
+    def _schedule_transcription(self, final=False):
+        """Schedule speech chunks cut by the voice activity detector for transcription"""
+        if self.chunk_controller and not final:
+            self.chunker.set_target_length(self.chunk_controller.update(self.transcription_backlog()))
+        for start, end in self.chunker.process(self.audio_store, final=final):
+            # Queue a zero-copy int16 view of the chunk; it is encoded in
+            # memory by the transcription pool, off the capture thread
+            self.transcription_queue.put({
+                'audio': self.audio_store.view(start, end),
+                'start_sample': start,
+                'end_sample': end
+            })
     
     def _transcription_worker(self):
-        """Background worker for transcription with speaker diarization"""
-        while self.is_recording:
+        """Background worker that hands queued chunks to the transcription pool.
+        Runs until stop_recording queues the end-of-recording marker (None), so
+        chunks queued before the stop are never dropped unless finalization gives up."""
+        while True:
+            chunk = self.transcription_queue.get()
+            if chunk is None:
+                break
             try:
-                # Get audio file from queue
-                audio_file = self.transcription_queue.get(timeout=1)
-                if audio_file:
-                    # Transcribe the audio chunk with speaker diarization
-                    transcript_data = self._transcribe_with_speakers(audio_file)
-                    
-                    if transcript_data and hasattr(transcript_data, 'segments') and transcript_data.segments:
-                        # Store transcript with speaker information
-                        with self.transcript_lock:
-                            for i, segment in enumerate(transcript_data.segments):
-                                # Create a copy of segment data that we can modify
-                                segment_data = {
-                                    'text': segment.text.strip(),
-                                    'start': getattr(segment, 'start', 0),
-                                    'end': getattr(segment, 'end', 0),
-                                    'speaker': self._assign_speaker(i)
-                                }
-                                
-                                transcript_item = {
-                                    'text': segment_data['text'],
-                                    'speaker': segment_data['speaker'],
-                                    'start_time': segment_data['start'],
-                                    'end_time': segment_data['end'],
-                                    'timestamp': time.time(),
-                                    'time': time.strftime('%H:%M:%S')
-                                }
-                                self.live_transcripts.append(transcript_item)
-                                
-                                # Send real-time transcript update to client
-                                socketio.emit('live_transcript', {
-                                    'text': transcript_item['text'],
-                                    'speaker': transcript_item['speaker'],
-                                    'timestamp': transcript_item['timestamp'],
-                                    'time': transcript_item['time']
-                                })
-                                
-                                print(f"Live transcript sent: {transcript_item['speaker']}: {transcript_item['text']}")
-                    
-                    # Clean up temporary file
-                    try:
-                        os.unlink(audio_file)
-                    except:
-                        pass
+                # Waits while the pool already has max_pending chunks in flight
+                while not self._cancel_transcription.is_set():
+                    if self.transcription_pool.submit(chunk, timeout=0.5) is not None:
+                        break
+                else:
+                    self.transcription_dropped += 1
+                    TRANSCRIPTION_CHUNKS_DROPPED.inc()
                         
-            except queue.Empty:
-                continue
             except Exception as e:
                 print(f"Error in transcription worker: {e}")
                 continue
     
+    def _handle_transcription_result(self, chunk, segments):
+        """Store and emit a transcribed chunk; called by the pool in chunk order"""
+        # Rebase segment times onto the session clock and drop overlap duplicates
+        segments = self.stitcher.stitch(chunk['start_sample'], chunk['end_sample'], segments or [])
+        if segments:
+            speakers = self._assign_speakers(segments)
+            new_items = []
+            # Store transcript with speaker information
+            for segment, (speaker, confidence) in zip(segments, speakers):
+                transcript_item = {
+                    'text': segment['text'],
+                    'speaker': speaker,
+                    'speaker_confidence': confidence,
+                    'start_time': segment['start'],
+                    'end_time': segment['end'],
+                    'timestamp': time.time(),
+                    'time': time.strftime('%H:%M:%S')
+                }
+                position = self.transcripts.append(transcript_item)
+                self.speaker_stats.add(transcript_item)
+                new_items.append(transcript_item)
+                
+                # Send real-time transcript update to client
+                self._emit('live_transcript', {
+                    'position': position,
+                    'text': transcript_item['text'],
+                    'speaker': transcript_item['speaker'],
+                    'speaker_confidence': transcript_item['speaker_confidence'],
+                    'start_time': transcript_item['start_time'],
+                    'end_time': transcript_item['end_time'],
+                    'timestamp': transcript_item['timestamp'],
+                    'time': transcript_item['time']
+                })
+                
+                print(f"Live transcript sent: {transcript_item['speaker']}: {transcript_item['text']}")
+            
+            # One statistics update per chunk keeps the stream cheap however long the interview
+            self._emit('speaker_stats', {'stats': self.speaker_stats.snapshot(), 'version': self.speaker_stats.version})
+            
+            # Queue the new segments for the rolling candidate analysis
+            self.analyzer.add(new_items)
+    
+    def _assign_speakers(self, segments):
+        """Return (speaker_label, confidence) for each stitched segment"""
+        if self.diarizer:
+            try:
+                return self.diarizer.assign(self.audio_store, segments)
+            except Exception as e:
+                print(f"Error diarizing segments: {e}")
+        return [(self._assign_speaker(i), None) for i in range(len(segments))]
+    
     def _assign_speaker(self, segment_index):
         """Assign speaker label based on segment index"""
         if segment_index % 2 == 0:
@@ -185,217 +414,404 @@ class RealTimeAudioProcessor:
         else:
             return self.speaker_labels[1]  # Candidate
     
-    def _transcribe_with_speakers(self, audio_file_path):
-        """Transcribe audio with speaker diarization using OpenAI Whisper"""
+    def _transcribe_with_speakers(self, chunk):
+        """Preprocess and encode a chunk in memory, then transcribe it with the configured backend"""
         try:
-            # First, transcribe with timestamps using new OpenAI API
-            with open(audio_file_path, 'rb') as audio_file:
-                response = client.audio.transcriptions.create(
-                    model=OPENAI_CONFIG['whisper_model'],
-                    file=audio_file,
-                    response_format="verbose_json",
-                    timestamp_granularities=["segment"]
-                )
+            audio, sample_rate = chunk['audio'], self.sample_rate
+            if self.preprocessor:
+                audio, sample_rate = self.preprocessor.process(audio, sample_rate)
+            with TRANSCRIPTION_ENCODE_SECONDS.labels(self.transcription_codec).time():
+                encoded_audio = encode_audio(audio, sample_rate, self.transcription_codec)
+            TRANSCRIPTION_UPLOAD_BYTES.labels(self.transcription_codec).observe(len(encoded_audio.data))
+            
+            # Once recording has stopped the finalizing job is waiting on every chunk
+            priority = PRIORITY_LIVE if self.is_recording else PRIORITY_FINAL
+            started = time.perf_counter()
+            segments = self.transcription_backend.transcribe(encoded_audio, priority)
+            round_trip = time.perf_counter() - started
+            TRANSCRIPTION_REQUEST_SECONDS.labels(self.transcription_backend.name).observe(round_trip)
+            if self.chunk_controller:
+                self.chunk_controller.observe(round_trip, len(chunk['audio']) / self.sample_rate)
             
-            print(f"Transcription response received with {len(response.segments) if hasattr(response, 'segments') else 0} segments")
-            return response
+            print(f"Transcription response received with {len(segments)} segments")
+            return segments
             
         except Exception as e:
+            TRANSCRIPTION_ERRORS.inc()
             print(f"Error transcribing audio with speakers: {e}")
             return None
         
     def stop_recording(self):
         self.is_recording = False
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-        if self.record_thread:
-            self.record_thread.join()
+        if self.capture:
+            # Feed buffers still queued by the capture callback before flushing the last chunk
+            self.capture.stop()
+            print(f"Microphone capture summary: {self.capture.stats()}")
+        if self.ingest:
+            # Feed frames the browser already sent before flushing the last chunk
+            self.ingest.close()
+            print(f"Browser ingest summary: {self.ingest.stats()}")
+            self.ingest = None
+        self.visualization.stop()
+        if self.recording:
+            # Only the audio captured since the last flush is left to write
+            print(f"Recording saved: {self.recording.close()}")
+            prune_recordings(RECORDING_CONFIG['directory'], self.session_id, RECORDING_CONFIG['keep_per_session'])
         
-        # Process final audio buffer
-        if len(self.audio_buffer) > 0:
-            self._schedule_transcription()
+        # Flush the final chunk, trimmed of trailing silence, then mark the end of the recording
+        self._schedule_transcription(final=True)
+        self.transcription_queue.put(None)
+        print(f"Chunking summary: {self.chunker.stats()}")
+    
+    def finish_transcription(self, timeout, on_progress=None):
+        """Wait up to `timeout` seconds for the chunks queued before the stop to be transcribed.
+        
+        Chunks not yet submitted at the deadline are dropped. `on_progress(backlog)`
+        is called about twice a second while waiting.
+        """
+        deadline = time.monotonic() + timeout
+        
+        def remaining():
+            return max(0.0, deadline - time.monotonic())
         
-        # Wait for transcription queue to empty
         if self.transcription_thread:
-            self.transcription_thread.join(timeout=5)
+            while self.transcription_thread.is_alive() and remaining() > 0:
+                self.transcription_thread.join(timeout=min(0.5, remaining()))
+                if on_progress:
+                    on_progress(self.transcription_backlog())
+            if self.transcription_thread.is_alive():
+                # Out of time: drop whatever has not been submitted yet
+                self._cancel_transcription.set()
+                self.transcription_thread.join()
+            self.transcription_thread = None
+        
+        completed = True
+        if self.transcription_pool:
+            completed = False
+            while not completed and remaining() > 0:
+                completed = self.transcription_pool.wait(timeout=min(0.5, remaining()))
+                if on_progress:
+                    on_progress(self.transcription_backlog())
+            # Results still to come belong to this recording; never let them reach the next one
+            self.transcription_pool.shutdown(wait=False, cancel=True)
+        
+        if self.diarizer:
+            print(f"Diarization summary: {self.diarizer.stats()}")
+        if self.preprocessor:
+            print(f"Preprocessing summary: {self.preprocessor.stats()}")
+        return {
+            'complete': completed and self.transcription_dropped == 0,
+            'dropped_chunks': self.transcription_dropped,
+            'pending_chunks': self.transcription_pool.pending() if self.transcription_pool else 0
+        }
+            
+    def close(self):
+        """Release audio resources when the session is evicted"""
+        self._cancel_transcription.set()
+        self.visualization.stop()
+        self.analyzer.stop()
+        if self.recording:
+            self.recording.close()
+        if self.audio is not None:
+            self.audio.terminate()
+            self.audio = None
             
-    def get_audio_data(self):
-        if not self.audio_chunks:
+    def get_audio_data(self, start_time=0.0, end_time=None):
+        """Read-only int16 view of the recording, optionally limited to a time range"""
+        if len(self.audio_store) == 0:
             return None
-        return np.concatenate(self.audio_chunks)
-    
-    def save_audio(self, filename):
-        audio_data = self.get_audio_data()
-        if audio_data is not None:
-            sf.write(filename, audio_data, self.sample_rate)
-            return filename
-        return None
+        return self.audio_store.view_seconds(start_time, end_time)
     
     def get_full_transcript(self):
         """Get the complete transcript from all recorded chunks with speaker information"""
-        with self.transcript_lock:
-            if not self.live_transcripts:
-                return "No transcript available"
-            
-            # Combine all transcripts with speaker information
-            full_text = ""
-            for item in self.live_transcripts:
-                speaker_label = item.get('speaker', 'Unknown')
-                full_text += f"[{item['time']}] {speaker_label}: {item['text']}\n\n"
-            
-            return full_text.strip()
+        if not len(self.transcripts):
+            return "No transcript available"
+        
+        # Lines are rendered once as segments arrive
+        return self.transcripts.render()
     
     def get_transcript_summary(self):
         """Get a summary of all transcripts for analysis"""
-        with self.transcript_lock:
-            if not self.live_transcripts:
-                return ""
-            
-            # Combine all transcripts into one text for GPT analysis
-            return " ".join([item['text'] for item in self.live_transcripts])
+        # Combine all transcripts into one text for GPT analysis
+        return self.transcripts.text()
     
     def get_speaker_statistics(self):
         """Get statistics about speaker participation"""
-        with self.transcript_lock:
-            if not self.live_transcripts:
-                return {}
-            
-            speaker_stats = {}
-            for item in self.live_transcripts:
-                speaker = item.get('speaker', 'Unknown')
-                if speaker not in speaker_stats:
-                    speaker_stats[speaker] = {
-                        'segments': 0,
-                        'words': 0,
-                        'total_duration': 0
-                    }
-                
-                speaker_stats[speaker]['segments'] += 1
-                speaker_stats[speaker]['words'] += len(item['text'].split())
-                duration = item.get('end_time', 0) - item.get('start_time', 0)
-                speaker_stats[speaker]['total_duration'] += duration
-            
-            return speaker_stats
+        return self.speaker_stats.snapshot()
 
-# Initialize audio processor
-audio_processor = RealTimeAudioProcessor()
+# One audio processor per interview session
+sessions = SessionManager(
+    RealTimeAudioProcessor,
+    max_sessions=SESSION_CONFIG['max_sessions'],
+    idle_timeout=SESSION_CONFIG['idle_timeout']
+)
+
+# Background finalization after a recording stops
+jobs = JobManager(retention=JOBS_CONFIG['retention'], max_finished=JOBS_CONFIG['max_finished'])
+
+def _process_rss_bytes():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+# Gauges read at scrape time, so keeping them costs nothing between scrapes
+Gauge('sessions_active', 'Interview sessions held in memory', callback=lambda: len(sessions))
+Gauge('sessions_recording', 'Interview sessions currently recording',
+      callback=lambda: sum(1 for _, processor in sessions.items() if processor.is_recording))
+Gauge('transcription_queue_depth', 'Chunks waiting for or undergoing transcription', ['session'],
+      callback=lambda: {(session_id,): processor.transcription_backlog() for session_id, processor in sessions.items()})
+Gauge('session_audio_bytes', 'Memory reserved for recorded audio', ['session'],
+      callback=lambda: {(session_id,): processor.audio_store.nbytes for session_id, processor in sessions.items()})
+Gauge('session_transcript_segments', 'Transcript segments of the current recording', ['session'],
+      callback=lambda: {(session_id,): len(processor.transcripts) for session_id, processor in sessions.items()})
+Gauge('transcription_chunk_target_seconds', 'Preferred chunk length chosen by the adaptive controller', ['session'],
+      callback=lambda: {(session_id,): processor.chunk_controller.target for session_id, processor in sessions.items()
+                        if processor.chunk_controller})
+Gauge('process_resident_memory_bytes', 'Resident memory of the server process', callback=_process_rss_bytes)
+Gauge('openai_circuit_open', 'Whether the circuit breaker holds back requests for a model', ['model'],
+      callback=lambda: {(model,): int(lane['circuit'] != 'closed') for model, lane in scheduler.stats().items()} if scheduler else {})
+Gauge('openai_requests_waiting', 'OpenAI requests queued for a model', ['model'],
+      callback=lambda: {(model,): lane['waiting'] for model, lane in scheduler.stats().items()} if scheduler else {})
+Gauge('socketio_dispatch_queue', 'Events waiting in the outbound Socket.IO dispatcher',
+      callback=lambda: dispatcher.stats()['queued'])
+
+def _request_session_id():
+    """Session ID from the JSON body or query string, falling back to the default session"""
+    data = request.get_json(silent=True) or {}
+    return data.get('session_id') or request.args.get('session_id') or SESSION_CONFIG['default_session_id']
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_template(
+        'index.html',
+        audio_source=INGEST_CONFIG['default_source'],
+        sample_rate=AUDIO_CONFIG['sample_rate'],
+        frame_samples=int(AUDIO_CONFIG['sample_rate'] * INGEST_CONFIG['frame_duration'])
+    )
 
 @app.route('/start_recording', methods=['POST'])
 def start_recording():
     try:
-        audio_processor.start_recording()
-        return jsonify({'status': 'success', 'message': 'Recording started with real-time transcription'})
+        session_id = _request_session_id()
+        source = (request.get_json(silent=True) or {}).get('source', 'microphone')
+        if source not in ('microphone', 'browser'):
+            return jsonify({'status': 'error', 'message': f'Unknown audio source: {source}'})
+        if jobs.active_for_session(session_id):
+            return jsonify({'status': 'error', 'message': 'The previous recording is still being finalized'})
+        audio_processor = sessions.get_or_create(session_id)
+        audio_processor.start_recording(source=source)
+        return jsonify({'status': 'success', 'session_id': session_id, 'message': 'Recording started with real-time transcription'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
 @app.route('/stop_recording', methods=['POST'])
 def stop_recording():
+    """Stop capture and return at once; transcription and analysis finish in a background job"""
     try:
-        audio_processor.stop_recording()
-        
-        # Add delay before final processing if configured
-        if REALTIME_CONFIG['final_processing_delay'] > 0:
-            time.sleep(REALTIME_CONFIG['final_processing_delay'])
+        session_id = _request_session_id()
+        audio_processor = sessions.get(session_id)
+        if audio_processor is None:
+            return jsonify({'status': 'error', 'message': f'Unknown session: {session_id}'})
         
-        # Save audio to temporary file
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-            audio_file = audio_processor.save_audio(temp_file.name)
-        
-        if audio_file:
-            # Get the full transcript from all chunks
-            full_transcript = audio_processor.get_full_transcript()
-            transcript_summary = audio_processor.get_transcript_summary()
-            speaker_stats = audio_processor.get_speaker_statistics()
-            
-            # Extract candidate details using GPT
-            candidate_details = extract_candidate_details(transcript_summary)
+        job = jobs.active_for_session(session_id)
+        if job is None:
+            if not audio_processor.is_recording:
+                return jsonify({'status': 'error', 'message': 'Recording is not running'})
+            audio_processor.stop_recording()
+            if len(audio_processor.audio_store) == 0:
+                audio_processor.finish_transcription(timeout=0)
+                # No finalize job will run, so stop the rolling analysis here
+                audio_processor.analyzer.stop()
+                return jsonify({'status': 'error', 'message': 'No audio data recorded'})
             
-            # Add speaker statistics to candidate details
-            if speaker_stats:
-                candidate_details['speaker_statistics'] = speaker_stats
-            
-            # Clean up temporary file
-            os.unlink(audio_file)
-            
-            return jsonify({
-                'status': 'success',
-                'transcript': full_transcript,
-                'candidate_details': candidate_details,
-                'speaker_stats': speaker_stats
-            })
-        else:
-            return jsonify({'status': 'error', 'message': 'No audio data recorded'})
+            job = jobs.submit(
+                lambda job: _finalize_session(audio_processor, job),
+                session_id=session_id,
+                on_update=lambda data: _socket_emit('job_update', data, audio_processor.room)
+            )
+        
+        return jsonify({
+            'status': 'success',
+            'session_id': session_id,
+            'job_id': job.job_id,
+            'message': 'Recording stopped; final results will follow'
+        })
             
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
-def transcribe_audio(audio_file_path):
-    """Transcribe audio using OpenAI Whisper API"""
-    try:
-        with open(audio_file_path, 'rb') as audio_file:
-            response = client.audio.transcriptions.create(
-                model=OPENAI_CONFIG['whisper_model'],
-                file=audio_file,
-                response_format="text"
-            )
-        return response
-    except Exception as e:
-        print(f"Error transcribing audio: {e}")
-        return "Error transcribing audio"
+def _finalize_session(audio_processor, job):
+    """Drain the transcription queue, then analyze the interview; runs as a background job"""
+    job.update('transcribing', pending_chunks=audio_processor.transcription_backlog())
+    transcription = audio_processor.finish_transcription(
+        REALTIME_CONFIG['final_drain_timeout'],
+        on_progress=lambda backlog: job.update('transcribing', pending_chunks=backlog)
+    )
+    
+    # Get the full transcript from all chunks
+    full_transcript = audio_processor.get_full_transcript()
+    transcript_summary = audio_processor.get_transcript_summary()
+    speaker_stats = audio_processor.get_speaker_statistics()
+    
+    # Finish the rolling analysis with a pass over the segments it hasn't seen;
+    # fall back to analysing the whole transcript if that pass failed or produced nothing
+    job.update('analyzing', segments=len(audio_processor.transcripts))
+    candidate_details = None
+    analysis = 'rolling'
+    if ANALYSIS_CONFIG['rolling']:
+        try:
+            candidate_details = dict(audio_processor.analyzer.finalize(timeout=ANALYSIS_CONFIG['final_timeout']))
+        except Exception as e:
+            print(f"Final rolling analysis failed, analysing the whole transcript: {e}")
+            candidate_details = None
+    if not candidate_details:
+        analysis = 'full'
+        candidate_details = extract_candidate_details(client, transcript_summary, result_cache, scheduler,
+                                                      on_field=audio_processor._emit_candidate_field)
+    
+    # Add speaker statistics to candidate details
+    if speaker_stats:
+        candidate_details['speaker_statistics'] = speaker_stats
+    
+    return {
+        'session_id': audio_processor.session_id,
+        'transcript': full_transcript,
+        'candidate_details': candidate_details,
+        'analysis': analysis,
+        'speaker_stats': speaker_stats,
+        'transcription': transcription,
+        'capture': audio_processor.capture.stats() if audio_processor.capture else None,
+        'recording': audio_processor.recording.stats() if audio_processor.recording else None
+    }
 
-def extract_candidate_details(transcript):
-    """Extract candidate details using GPT-4"""
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f'Unknown job: {job_id}'})
+    return jsonify({'status': 'success', 'job': job.to_dict()})
+
+@app.route('/sessions', methods=['GET'])
+def list_sessions():
+    result = []
+    for session_id in sessions.session_ids():
+        audio_processor = sessions.get(session_id)
+        if audio_processor is not None:
+            result.append({
+                'session_id': session_id,
+                'is_recording': audio_processor.is_recording,
+                'duration': audio_processor.audio_store.duration
+            })
+    return jsonify({'status': 'success', 'sessions': result, 'max_sessions': sessions.max_sessions})
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+def evict_session(session_id):
+    if sessions.evict(session_id):
+        return jsonify({'status': 'success', 'message': f'Session {session_id} closed'})
+    return jsonify({'status': 'error', 'message': f'Unknown session: {session_id}'})
+
+def _float_arg(name):
+    value = request.args.get(name)
+    return None if value is None else float(value)
+
+@app.route('/sessions/<session_id>/transcript', methods=['GET'])
+def get_session_transcript(session_id):
+    """A page of transcript segments, filtered by speaker and start time (seconds).
+    Reads the live recording of an active session, otherwise the stored one."""
     try:
-        prompt = f"""
-        Based on the following interview transcript, extract and organize the candidate's details in a structured format:
-
-        Transcript:
-        {transcript}
-
-        Please provide the following information in JSON format:
-        - name: Candidate's name (if mentioned)
-        - experience: Years of experience and relevant background
-        - skills: Technical and soft skills mentioned
-        - education: Educational background
-        - current_role: Current or most recent position
-        - key_achievements: Notable accomplishments mentioned
-        - interview_notes: General observations and notes
-        - strengths: Key strengths demonstrated
-        - areas_of_concern: Any concerns or areas for improvement
-        - overall_assessment: Brief overall assessment
-        """
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = min(int(request.args.get('limit', TRANSCRIPT_CONFIG['page_size'])), TRANSCRIPT_CONFIG['max_page_size'])
+        speaker = request.args.get('speaker')
+        start_time = _float_arg('start')
+        end_time = _float_arg('end')
+        recording_id = request.args.get('recording_id')
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f'Invalid parameter: {e}'})
+    
+    audio_processor = sessions.get(session_id)
+    if audio_processor is not None and recording_id in (None, audio_processor.transcripts.recording_id):
+        store = audio_processor.transcripts
+        recording_id = store.recording_id
+        if start_time is None and end_time is None:
+            total = store.count(speaker)
+            items = store.items(offset, limit, speaker)
+        else:
+            matching = store.range(start_time, end_time, speaker)
+            total = len(matching)
+            items = matching[offset:offset + limit]
+    elif transcript_db is not None:
+        if recording_id is None:
+            recordings = transcript_db.recordings(session_id)
+            if not recordings:
+                return jsonify({'status': 'error', 'message': f'No transcript for session: {session_id}'})
+            recording_id = recordings[0]['recording_id']
+        items = transcript_db.read(recording_id, offset, limit, speaker, start_time, end_time)
+        total = transcript_db.count(recording_id, speaker, start_time, end_time)
+    else:
+        return jsonify({'status': 'error', 'message': f'Unknown session: {session_id}'})
+    
+    return jsonify({
+        'status': 'success',
+        'session_id': session_id,
+        'recording_id': recording_id,
+        'offset': offset,
+        'limit': limit,
+        'total': total,
+        'segments': items
+    })
 
-        response = client.chat.completions.create(
-            model=OPENAI_CONFIG['gpt_model'],
-            messages=[
-                {"role": "system", "content": "You are an expert HR analyst. Extract candidate details from interview transcripts in a structured format."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=OPENAI_CONFIG['max_tokens'],
-            temperature=OPENAI_CONFIG['temperature']
-        )
-        
-        # Try to parse JSON response
-        try:
-            return json.loads(response.choices[0].message.content)
-        except json.JSONDecodeError:
-            # If JSON parsing fails, return the raw response
-            return {
-                "raw_response": response.choices[0].message.content,
-                "transcript": transcript
-            }
-            
-    except Exception as e:
-        print(f"Error extracting candidate details: {e}")
-        return {
-            "error": str(e),
-            "transcript": transcript
-        }
+@app.route('/sessions/<session_id>/chunking', methods=['GET'])
+def get_session_chunking(session_id):
+    """Chunk length controller state and its recent decisions"""
+    audio_processor = sessions.get(session_id)
+    if audio_processor is None:
+        return jsonify({'status': 'error', 'message': f'Unknown session: {session_id}'})
+    return jsonify({
+        'status': 'success',
+        'session_id': session_id,
+        'adaptive': audio_processor.chunk_controller is not None,
+        'controller': audio_processor.chunk_controller.stats() if audio_processor.chunk_controller else None,
+        'chunker': audio_processor.chunker.stats()
+    })
+
+@app.route('/sessions/<session_id>/recordings', methods=['GET'])
+def list_session_recordings(session_id):
+    """Stored transcripts of a session, each with its audio file if one is kept"""
+    if transcript_db is None and not RECORDING_CONFIG['enabled']:
+        return jsonify({'status': 'error', 'message': 'Transcript and recording storage are disabled'})
+    recordings = transcript_db.recordings(session_id) if transcript_db is not None else []
+    audio = list_recordings(RECORDING_CONFIG['directory'], session_id)
+    for recording in recordings:
+        recording['audio'] = audio.pop(recording['recording_id'], None)
+    # Recordings without transcript segments are only on disk
+    recordings.extend({'recording_id': recording_id, 'started_at': None, 'segments': 0, 'audio': info}
+                      for recording_id, info in audio.items())
+    return jsonify({'status': 'success', 'session_id': session_id, 'recordings': recordings})
+
+@app.route('/sessions/<session_id>/recordings/<recording_id>/audio', methods=['GET'])
+def get_recording_audio(session_id, recording_id):
+    audio = list_recordings(RECORDING_CONFIG['directory'], session_id).get(recording_id)
+    if audio is None:
+        return jsonify({'status': 'error', 'message': f'No audio kept for recording {recording_id}'})
+    return send_file(os.path.abspath(audio['path']), as_attachment=True)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    if result_cache is None:
+        return jsonify({'status': 'error', 'message': 'Result cache is disabled'})
+    return jsonify({'status': 'success', 'cache': result_cache.stats()})
+
+@app.route('/scheduler/stats', methods=['GET'])
+def scheduler_stats():
+    if scheduler is None:
+        return jsonify({'status': 'error', 'message': 'OpenAI scheduler is disabled'})
+    return jsonify({'status': 'success', 'models': scheduler.stats()})
 
 @socketio.on('connect')
 def handle_connect():
@@ -404,6 +820,71 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     print('Client disconnected')
+    session_id = sessions.detach_client(request.sid)
+    audio_processor = sessions.get(session_id) if session_id else None
+    if audio_processor is not None:
+        audio_processor.visualization.remove_client(request.sid)
+
+def _set_visualization_resolution(audio_processor, bins):
+    old_bins, bins = audio_processor.visualization.set_client_resolution(request.sid, bins)
+    if old_bins is not None and old_bins != bins:
+        leave_room(audio_processor.visualization.room_for(old_bins))
+    join_room(audio_processor.visualization.room_for(bins))
+    emit('visualization_config', {'bins': bins, 'frame_rate': VISUALIZATION_CONFIG['frame_rate']})
+
+@socketio.on('join_session')
+def handle_join_session(data):
+    """Subscribe a client to one interview's events, creating the session if needed"""
+    data = data or {}
+    session_id = data.get('session_id') or SESSION_CONFIG['default_session_id']
+    try:
+        audio_processor = sessions.get_or_create(session_id)
+    except SessionLimitError as e:
+        emit('session_error', {'session_id': session_id, 'message': str(e)})
+        return
+    
+    previous_id = sessions.attach_client(request.sid, session_id)
+    previous = sessions.get(previous_id) if previous_id and previous_id != session_id else None
+    if previous is not None:
+        leave_room(previous.room)
+        old_bins = previous.visualization.remove_client(request.sid)
+        if old_bins is not None:
+            leave_room(previous.visualization.room_for(old_bins))
+    
+    join_room(audio_processor.room)
+    _set_visualization_resolution(audio_processor, data.get('bins'))
+    emit('session_joined', {'session_id': session_id, 'is_recording': audio_processor.is_recording})
+
+@socketio.on('start_ingest')
+def handle_start_ingest(data):
+    """Make this client the audio source of its session's browser recording"""
+    data = data or {}
+    audio_processor = sessions.get(data.get('session_id') or sessions.session_for_client(request.sid))
+    if audio_processor is None or audio_processor.ingest is None:
+        emit('ingest_error', {'message': 'Session is not recording from the browser'})
+        return
+    if data.get('encoding', 'pcm16') != 'pcm16' or int(data.get('sample_rate', 0)) != audio_processor.sample_rate:
+        emit('ingest_error', {'message': f'Expected pcm16 audio at {audio_processor.sample_rate} Hz'})
+        return
+    
+    audio_processor.ingest.client_id = request.sid
+    emit('ingest_ready', {'seq': audio_processor.ingest.last_consumed, 'credit': audio_processor.ingest.credit()})
+
+@socketio.on('audio_frame')
+def handle_audio_frame(data):
+    """One sequenced PCM frame from the browser; the client keeps within its credit"""
+    audio_processor = sessions.get(sessions.session_for_client(request.sid))
+    ingest = audio_processor.ingest if audio_processor is not None else None
+    if ingest is None or ingest.client_id != request.sid:
+        return
+    ingest.receive(int(data['seq']), data['data'])
+
+@socketio.on('set_visualization')
+def handle_set_visualization(data):
+    """Let a client choose how many envelope bins it receives per frame"""
+    audio_processor = sessions.get(sessions.session_for_client(request.sid))
+    if audio_processor is not None:
+        _set_visualization_resolution(audio_processor, (data or {}).get('bins'))
 
 if __name__ == '__main__':
     socketio.run(app, debug=FLASK_CONFIG['debug'], host=FLASK_CONFIG['host'], port=FLASK_CONFIG['port'])
\ No newline at end of file
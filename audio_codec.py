@@ -0,0 +1,44 @@
+"""
+In-memory encoding of audio chunks for upload to transcription backends
+"""
+
+import io
+from collections import namedtuple
+
+import soundfile as sf
+
+# An encoded chunk: raw bytes plus the filename and MIME type the upload needs
+EncodedAudio = namedtuple('EncodedAudio', ['data', 'filename', 'content_type'])
+
+# codec name -> (soundfile format, subtype, file extension, MIME type)
+CODECS = {
+    'wav': ('WAV', 'PCM_16', 'wav', 'audio/wav'),
+    'flac': ('FLAC', 'PCM_16', 'flac', 'audio/flac'),
+    'ogg': ('OGG', 'VORBIS', 'ogg', 'audio/ogg'),
+    'opus': ('OGG', 'OPUS', 'ogg', 'audio/ogg')
+}
+
+
+def available_codecs():
+    """Codecs supported by the installed libsndfile"""
+    formats = sf.available_formats()
+    return [
+        name for name, (file_format, subtype, _, _) in CODECS.items()
+        if file_format in formats and subtype in sf.available_subtypes(file_format)
+    ]
+
+
+def encode_audio(audio_data, sample_rate, codec='wav'):
+    """Encode int16 (or float) samples into an in-memory audio file"""
+    if codec not in CODECS:
+        raise ValueError(f"Unknown audio codec: {codec}")
+    file_format, subtype, extension, content_type = CODECS[codec]
+
+    buffer = io.BytesIO()
+    sf.write(buffer, audio_data, sample_rate, format=file_format, subtype=subtype)
+    return EncodedAudio(buffer.getvalue(), f"chunk.{extension}", content_type)
+
+
+def decode_audio(encoded_audio, dtype='int16'):
+    """Decode an EncodedAudio back into (samples, sample_rate)"""
+    return sf.read(io.BytesIO(encoded_audio.data), dtype=dtype)
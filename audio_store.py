@@ -0,0 +1,91 @@
+"""
+Array-backed storage for captured audio
+"""
+
+import threading
+
+import numpy as np
+
+
+class AudioStore:
+    """Growable int16 sample store with zero-copy views over sample ranges.
+
+    Samples are appended into one preallocated array that grows geometrically
+    (by at least `growth_seconds`), so a recording is held once, as int16, and
+    never concatenated. `view` returns read-only slices of the backing array.
+    A view taken before the array grows keeps referencing the old block,
+    which stays valid because stored samples are never modified; `clear`
+    starts a fresh array for the same reason.
+    """
+
+    def __init__(self, sample_rate, channels=1, initial_seconds=60.0, growth_seconds=60.0):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self._growth = max(1, int(growth_seconds * sample_rate))
+        self._initial = max(1, int(initial_seconds * sample_rate))
+        self._data = np.empty(self._shape(self._initial), dtype=np.int16)
+        self._length = 0
+        self._lock = threading.Lock()
+
+    def _shape(self, frames):
+        return (frames,) if self.channels == 1 else (frames, self.channels)
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def duration(self):
+        """Stored audio length in seconds"""
+        return self._length / self.sample_rate
+
+    @property
+    def nbytes(self):
+        """Bytes reserved by the backing array"""
+        return self._data.nbytes
+
+    def clear(self):
+        """Forget the stored samples; views taken before keep the old ones"""
+        with self._lock:
+            self._data = np.empty(self._shape(self._initial), dtype=np.int16)
+            self._length = 0
+
+    def append(self, samples):
+        """Append float samples in [-1, 1] or int16 samples; returns the new length"""
+        samples = np.asarray(samples)
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels)
+        count = len(samples)
+
+        with self._lock:
+            end = self._length + count
+            if end > len(self._data):
+                capacity = max(end, len(self._data) + max(self._growth, len(self._data) // 2))
+                grown = np.empty(self._shape(capacity), dtype=np.int16)
+                grown[:self._length] = self._data[:self._length]
+                self._data = grown
+
+            destination = self._data[self._length:end]
+            if samples.dtype == np.int16:
+                destination[...] = samples
+            else:
+                # Convert to 16-bit PCM once, straight into the backing array
+                np.clip(samples * 32767, -32768, 32767, out=destination, casting='unsafe')
+            self._length = end
+            return end
+
+    def view(self, start=0, end=None):
+        """Read-only view of samples [start, end) without copying"""
+        with self._lock:
+            data = self._data
+            length = self._length
+        end = length if end is None else min(end, length)
+        start = max(0, min(start, end))
+        view = data[start:end]
+        view.flags.writeable = False
+        return view
+
+    def view_seconds(self, start_time=0.0, end_time=None):
+        """Read-only view of the audio between two times in seconds"""
+        start = int(round(start_time * self.sample_rate))
+        end = None if end_time is None else int(round(end_time * self.sample_rate))
+        return self.view(start, end)
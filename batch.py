@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Batch transcription of recorded interviews.
+
+Each recording in a directory is split at pauses by the voice activity
+chunker, its pieces are transcribed concurrently by a TranscriptionPool, and
+the results are stitched onto one timeline, labelled by speaker, analysed for
+candidate details and written to the transcript database. Finished chunks are
+checkpointed, so an interrupted run picks up where it stopped.
+
+Usage: python batch.py RECORDINGS_DIR [--output DIR] [--workers N]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import librosa
+import soundfile as sf
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from config import (AUDIO_CONFIG, BATCH_CONFIG, CACHE_CONFIG, PROCESSING_CONFIG, SCHEDULER_CONFIG,
+                    SPEAKER_CONFIG, TRANSCRIPT_CONFIG, TRANSCRIPTION_CONFIG)
+from analysis import extract_candidate_details
+from audio_codec import encode_audio
+from audio_store import AudioStore
+from cache import ResultCache
+from diarization import OnlineSpeakerDiarizer
+from preprocessing import build_preprocessor
+from scheduler import OpenAIScheduler, PRIORITY_BACKGROUND
+from speaker_stats import SpeakerStatistics
+from timeline import TranscriptStitcher
+from transcript_store import TranscriptDatabase, TranscriptStore
+from transcription import CachedTranscriptionBackend, TranscriptionPool, create_transcription_backend
+from vad import VoiceActivityChunker
+
+
+def find_recordings(directory, extensions):
+    """Audio files under `directory`, as sorted paths relative to it"""
+    found = []
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            if os.path.splitext(filename)[1].lower() in extensions:
+                found.append(os.path.relpath(os.path.join(root, filename), directory))
+    return sorted(found)
+
+
+def file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as audio_file:
+        for block in iter(lambda: audio_file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_audio(path, sample_rate):
+    """Read a recording as mono int16 samples at `sample_rate` into an AudioStore"""
+    audio, file_rate = sf.read(path, dtype='float32', always_2d=True)
+    audio = audio.mean(axis=1)
+    if file_rate != sample_rate:
+        audio = librosa.resample(audio, orig_sr=file_rate, target_sr=sample_rate)
+    store = AudioStore(sample_rate, initial_seconds=max(1.0, len(audio) / sample_rate))
+    store.append(audio)
+    return store
+
+
+class BatchTranscriber:
+    """Transcribes whole recordings with the live pipeline's components.
+
+    Per recording, `output_directory` holds `<name>.chunks.jsonl`, the
+    checkpoint of transcribed chunks, until the recording is finished, then
+    `<name>.json` with the transcript, speaker statistics and candidate
+    details. Recordings whose result matches the file's content are skipped.
+    """
+
+    def __init__(self, backend, output_directory, database=None, client=None, cache=None, scheduler=None,
+                 sample_rate=16000, workers=4, max_pending=16, analyse=True):
+        self.backend = backend
+        self.output_directory = output_directory
+        self.database = database
+        self.client = client
+        self.cache = cache
+        self.scheduler = scheduler
+        self.sample_rate = sample_rate
+        self.workers = workers
+        self.max_pending = max_pending
+        self.analyse = analyse and client is not None
+        self.codec = TRANSCRIPTION_CONFIG['codec']
+        self.chunking = {
+            'min_length': BATCH_CONFIG['min_chunk_length'],
+            'target_length': BATCH_CONFIG['chunk_length'],
+            'max_length': BATCH_CONFIG['max_chunk_length'],
+            'overlap': TRANSCRIPTION_CONFIG['overlap'],
+            'silence_threshold': PROCESSING_CONFIG['silence_threshold'],
+            'min_pause': TRANSCRIPTION_CONFIG['min_pause']
+        }
+        self.preprocessing = {key: value for key, value in PROCESSING_CONFIG.items() if key != 'cpu_budget'}
+        # Nothing is live here, so preprocessing runs every stage without a CPU budget
+        self.preprocessor = build_preprocessor(PROCESSING_CONFIG)
+        os.makedirs(output_directory, exist_ok=True)
+
+    def _paths(self, name):
+        base = os.path.join(self.output_directory, name.replace(os.sep, '__'))
+        return base + '.json', base + '.chunks.jsonl'
+
+    def process(self, path, name, on_progress=None):
+        """Transcribe one recording; returns a summary with its status ('done', 'skipped' or 'incomplete')"""
+        result_path, checkpoint_path = self._paths(name)
+        digest = file_digest(path)
+        # Chunk boundaries and results depend on the chunking and preprocessing settings, so they are part of the identity
+        settings = {'chunking': self.chunking, 'preprocessing': self.preprocessing}
+        recording_id = hashlib.sha1(
+            (digest + json.dumps(settings, sort_keys=True) + self.backend.name).encode()
+        ).hexdigest()[:32]
+
+        if os.path.exists(result_path):
+            with open(result_path) as result_file:
+                if json.load(result_file).get('recording_id') == recording_id:
+                    return {'name': name, 'status': 'skipped'}
+
+        started = time.monotonic()
+        audio_store = load_audio(path, self.sample_rate)
+        chunker = VoiceActivityChunker(self.sample_rate, **self.chunking)
+        chunks = chunker.process(audio_store, final=True)
+
+        results = self._load_checkpoint(checkpoint_path, recording_id, chunks)
+        resumed = len(results)
+        failed = []
+
+        with open(checkpoint_path, 'w') as checkpoint:
+            # Rewrite what was recovered so a line cut short by an interruption is dropped
+            checkpoint.write(json.dumps({'recording_id': recording_id}) + '\n')
+            for index in sorted(results):
+                start, end = chunks[index]
+                checkpoint.write(json.dumps({'index': index, 'start': start, 'end': end,
+                                             'segments': results[index]}) + '\n')
+            checkpoint.flush()
+
+            def transcribe(job):
+                index, start, end = job
+                audio, sample_rate = audio_store.view(start, end), self.sample_rate
+                if self.preprocessor:
+                    audio, sample_rate = self.preprocessor.process(audio, sample_rate)
+                encoded_audio = encode_audio(audio, sample_rate, self.codec)
+                return self.backend.transcribe(encoded_audio, PRIORITY_BACKGROUND)
+
+            def on_result(job, segments):
+                index, start, end = job
+                if segments is None:
+                    failed.append(index)
+                else:
+                    results[index] = segments
+                    checkpoint.write(json.dumps({'index': index, 'start': start, 'end': end,
+                                                 'segments': segments}) + '\n')
+                    checkpoint.flush()
+                if on_progress:
+                    on_progress(len(results), len(chunks), resumed)
+
+            pool = TranscriptionPool(transcribe, on_result, workers=self.workers, max_pending=self.max_pending)
+            try:
+                for index, (start, end) in enumerate(chunks):
+                    if index not in results:
+                        pool.submit((index, start, end))
+                pool.wait()
+            finally:
+                pool.shutdown()
+
+        summary = {
+            'name': name,
+            'duration': round(audio_store.duration, 2),
+            'chunks': len(chunks),
+            'resumed_chunks': resumed
+        }
+        if failed:
+            # Keep the checkpoint; the next run retries only these chunks
+            summary.update(status='incomplete', failed_chunks=sorted(failed))
+            return summary
+
+        result = self._finish(name, path, recording_id, audio_store, chunks, results)
+        with open(result_path, 'w') as result_file:
+            json.dump(result, result_file, indent=2)
+        os.remove(checkpoint_path)
+        summary.update(status='done', segments=len(result['segments']), elapsed=round(time.monotonic() - started, 2))
+        return summary
+
+    def _load_checkpoint(self, checkpoint_path, recording_id, chunks):
+        """Chunk results from an interrupted run of the same recording and settings"""
+        results = {}
+        if not os.path.exists(checkpoint_path):
+            return results
+        with open(checkpoint_path) as checkpoint:
+            lines = checkpoint.read().splitlines()
+        try:
+            if not lines or json.loads(lines[0]).get('recording_id') != recording_id:
+                return results
+            for line in lines[1:]:
+                entry = json.loads(line)
+                index = entry['index']
+                if index < len(chunks) and tuple(chunks[index]) == (entry['start'], entry['end']):
+                    results[index] = entry['segments']
+        except (ValueError, KeyError) as e:
+            # A line cut short by the interruption; everything before it is still good
+            print(f"Ignoring the rest of checkpoint {checkpoint_path}: {e}")
+        return results
+
+    def _finish(self, name, path, recording_id, audio_store, chunks, results):
+        """Stitch chunk results in order, label speakers, store the transcript and analyse it"""
+        stitcher = TranscriptStitcher(self.sample_rate)
+        speaker_stats = SpeakerStatistics(SPEAKER_CONFIG['interruption_overlap'])
+        labels = SPEAKER_CONFIG['speaker_labels']
+        diarizer = None
+        if SPEAKER_CONFIG['enabled'] and SPEAKER_CONFIG['diarization_method'] == 'advanced':
+            # Offline there is no latency to protect, so every segment is analysed
+            diarizer = OnlineSpeakerDiarizer(
+                self.sample_rate,
+                labels,
+                max_speakers=SPEAKER_CONFIG['speaker_count'],
+                threshold=SPEAKER_CONFIG['similarity_threshold'],
+                min_duration=SPEAKER_CONFIG['segment_min_duration'],
+                max_analysis_seconds=SPEAKER_CONFIG['max_analysis_seconds'],
+                latency_budget=float('inf')
+            )
+
+        session_id = f"{BATCH_CONFIG['session_prefix']}{name}"
+        transcripts = TranscriptStore(session_id, self.database)
+        transcripts.reset(recording_id)
+        for index, (start, end) in enumerate(chunks):
+            segments = stitcher.stitch(start, end, results[index])
+            if not segments:
+                continue
+            if diarizer:
+                speakers = diarizer.assign(audio_store, segments)
+            else:
+                speakers = [(labels[i % 2], None) for i in range(len(segments))]
+            for segment, (speaker, confidence) in zip(segments, speakers):
+                item = {
+                    'text': segment['text'],
+                    'speaker': speaker,
+                    'speaker_confidence': confidence,
+                    'start_time': segment['start'],
+                    'end_time': segment['end'],
+                    'timestamp': time.time(),
+                    # Offset into the recording rather than wall-clock time
+                    'time': time.strftime('%H:%M:%S', time.gmtime(segment['start']))
+                }
+                transcripts.append(item)
+                speaker_stats.add(item)
+        if self.database is not None:
+            self.database.flush()
+
+        candidate_details = None
+        if self.analyse and len(transcripts):
+            candidate_details = extract_candidate_details(self.client, transcripts.text(), self.cache, self.scheduler)
+
+        return {
+            'source': os.path.abspath(path),
+            'session_id': session_id,
+            'recording_id': recording_id,
+            'duration': round(audio_store.duration, 2),
+            'chunks': len(chunks),
+            'transcript': transcripts.render(),
+            'segments': transcripts.items(),
+            'speaker_stats': speaker_stats.snapshot(),
+            'candidate_details': candidate_details,
+            'completed_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Transcribe and analyse a directory of recorded interviews")
+    parser.add_argument('directory', help='directory searched recursively for recordings')
+    parser.add_argument('--output', default=BATCH_CONFIG['output_directory'], help='where results and checkpoints go')
+    parser.add_argument('--workers', type=int, default=BATCH_CONFIG['workers'], help='concurrent transcription requests')
+    parser.add_argument('--no-analysis', action='store_true', help='skip candidate extraction')
+    parser.add_argument('--no-database', action='store_true', help='do not write transcripts to the database')
+    args = parser.parse_args()
+
+    recordings = find_recordings(args.directory, BATCH_CONFIG['extensions'])
+    if not recordings:
+        print(f"No recordings found in {args.directory}")
+        return True
+
+    client = None
+    if TRANSCRIPTION_CONFIG['backend'] == 'openai' or not args.no_analysis:
+        client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0 if SCHEDULER_CONFIG['enabled'] else 2)
+    scheduler = None
+    if SCHEDULER_CONFIG['enabled']:
+        scheduler = OpenAIScheduler(
+            SCHEDULER_CONFIG['limits'],
+            max_attempts=SCHEDULER_CONFIG['max_attempts'],
+            base_backoff=SCHEDULER_CONFIG['base_backoff'],
+            max_backoff=SCHEDULER_CONFIG['max_backoff'],
+            failure_threshold=SCHEDULER_CONFIG['failure_threshold'],
+            reset_timeout=SCHEDULER_CONFIG['reset_timeout'],
+            # Nobody is waiting on a batch run, so requests wait out rate limits instead of giving up
+            max_wait={}
+        )
+    cache = None
+    if CACHE_CONFIG['enabled']:
+        cache = ResultCache(CACHE_CONFIG['directory'], memory_bytes=CACHE_CONFIG['memory_bytes'],
+                            disk_bytes=CACHE_CONFIG['disk_bytes'])
+    backend = create_transcription_backend(TRANSCRIPTION_CONFIG['backend'], client, scheduler)
+    if cache is not None:
+        backend = CachedTranscriptionBackend(backend, cache)
+    database = None
+    if TRANSCRIPT_CONFIG['persist'] and not args.no_database:
+        database = TranscriptDatabase(TRANSCRIPT_CONFIG['database'])
+
+    transcriber = BatchTranscriber(
+        backend,
+        args.output,
+        database=database,
+        client=client,
+        cache=cache,
+        scheduler=scheduler,
+        sample_rate=AUDIO_CONFIG['sample_rate'],
+        workers=args.workers,
+        max_pending=BATCH_CONFIG['max_pending'],
+        analyse=not args.no_analysis
+    )
+
+    started = time.monotonic()
+    summaries = []
+    for number, name in enumerate(recordings, 1):
+        prefix = f"[{number}/{len(recordings)}] {name}"
+        print(f"{prefix}: starting")
+
+        def on_progress(done, total, resumed, prefix=prefix):
+            resumed_note = f", {resumed} from checkpoint" if resumed else ""
+            print(f"{prefix}: {done}/{total} chunks ({100 * done // max(total, 1)}%){resumed_note}")
+
+        try:
+            summary = transcriber.process(os.path.join(args.directory, name), name, on_progress)
+        except Exception as e:
+            print(f"Error transcribing {name}: {e}")
+            summary = {'name': name, 'status': 'error', 'error': str(e)}
+        summaries.append(summary)
+        print(f"{prefix}: {summary['status']}")
+
+    if database is not None:
+        database.close()
+
+    counts = {}
+    for summary in summaries:
+        counts[summary['status']] = counts.get(summary['status'], 0) + 1
+    audio_seconds = sum(summary.get('duration') or 0 for summary in summaries if summary['status'] == 'done')
+    elapsed = time.monotonic() - started
+    print(f"\n{len(recordings)} recordings: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+    if audio_seconds:
+        print(f"Transcribed {audio_seconds:.0f}s of audio in {elapsed:.0f}s ({audio_seconds / elapsed:.1f}x real time)")
+    for summary in summaries:
+        if summary['status'] in ('incomplete', 'error'):
+            print(f"  {summary['name']}: {summary['status']} - run again to retry")
+    return all(summary['status'] in ('done', 'skipped') for summary in summaries)
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Check that microphone capture loses no frames while the CPU and the pipeline are busy.
+
+A simulated input device produces buffers on its own clock and holds only a
+few of them, like PortAudio: if the callback is late by more than that, the
+oldest buffers are lost and the next one is flagged as an overflow. Samples
+count up, so every lost, repeated or reordered frame is found by comparing
+what reached the pipeline with what the device produced. Busy-loop threads
+compete for the GIL, and each fed buffer goes through the audio store and the
+voice activity chunker, with optional stalls. 'callback' mode is
+MicrophoneCapture; 'inline' feeds the pipeline from the callback itself.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyaudio
+
+from audio_store import AudioStore
+from capture import MicrophoneCapture
+from config import AUDIO_CONFIG, PROCESSING_CONFIG, TRANSCRIPTION_CONFIG
+from vad import VoiceActivityChunker
+
+
+class SimulatedInputStream:
+    """Calls `callback` like a PortAudio input stream with `device_buffers` buffers of headroom"""
+
+    def __init__(self, callback, sample_rate, frames_per_buffer, seconds, device_buffers):
+        self.callback = callback
+        self.sample_rate = sample_rate
+        self.frames_per_buffer = frames_per_buffer
+        self.total_buffers = int(seconds * sample_rate / frames_per_buffer)
+        self.device_buffers = device_buffers
+        self.produced = 0
+        self.overflowed_buffers = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _buffer(self, index):
+        start = index * self.frames_per_buffer
+        return (np.arange(start, start + self.frames_per_buffer) % 32768).astype(np.int16).tobytes()
+
+    def _run(self):
+        period = self.frames_per_buffer / self.sample_rate
+        started = time.perf_counter()
+        delivered = 0
+        overflow = False
+        while delivered < self.total_buffers and not self._stopped.is_set():
+            now = time.perf_counter()
+            # Buffers the device has filled by now, up to the end of the recording
+            available = min(self.total_buffers, int((now - started) / period))
+            self.produced = available
+            if available <= delivered:
+                time.sleep(period / 4)
+                continue
+            if available - delivered > self.device_buffers:
+                # The device kept only its newest buffers
+                lost = available - delivered - self.device_buffers
+                self.overflowed_buffers += lost
+                delivered += lost
+                overflow = True
+            status = pyaudio.paInputOverflow if overflow else 0
+            overflow = False
+            self.callback(self._buffer(delivered), self.frames_per_buffer,
+                          {'input_buffer_adc_time': 1.0 + delivered * period}, status)
+            delivered += 1
+        self.produced = delivered
+
+    def wait(self):
+        self._thread.join()
+
+    def stop_stream(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def close(self):
+        pass
+
+
+class SimulatedAudio:
+    """Stands in for pyaudio.PyAudio, opening SimulatedInputStreams"""
+
+    def __init__(self, seconds, device_buffers):
+        self.seconds = seconds
+        self.device_buffers = device_buffers
+        self.stream = None
+
+    def open(self, format, channels, rate, input, frames_per_buffer, stream_callback):
+        self.stream = SimulatedInputStream(stream_callback, rate, frames_per_buffer, self.seconds, self.device_buffers)
+        return self.stream
+
+
+class Pipeline:
+    """The capture-side work of RealTimeAudioProcessor.feed_audio: store the samples and cut chunks"""
+
+    def __init__(self, sample_rate, stall_every, stall_seconds):
+        self.store = AudioStore(sample_rate)
+        self.chunker = VoiceActivityChunker(
+            sample_rate,
+            min_length=TRANSCRIPTION_CONFIG['min_audio_length'],
+            target_length=TRANSCRIPTION_CONFIG['interval'],
+            max_length=TRANSCRIPTION_CONFIG['max_audio_length'],
+            overlap=TRANSCRIPTION_CONFIG['overlap'],
+            silence_threshold=PROCESSING_CONFIG['silence_threshold'],
+            min_pause=TRANSCRIPTION_CONFIG['min_pause']
+        )
+        self.stall_every = stall_every
+        self.stall_seconds = stall_seconds
+        self.buffers = 0
+
+    def feed(self, samples):
+        self.store.append(samples)
+        self.chunker.process(self.store)
+        self.buffers += 1
+        if self.stall_every and self.buffers % self.stall_every == 0:
+            time.sleep(self.stall_seconds)
+
+    def check(self):
+        """Frames received and frames missing or out of order, from the counting samples"""
+        received = self.store.view(0, len(self.store)).reshape(-1)
+        expected = (np.arange(len(received)) % 32768).astype(np.int16)
+        if len(received) and np.array_equal(received, expected):
+            return len(received), 0
+        # Each discontinuity is a jump of whole buffers
+        jumps = np.flatnonzero(np.diff(received.astype(np.int32)) % 32768 != 1)
+        return len(received), int(len(jumps))
+
+
+class InlineCapture:
+    """Feeds the pipeline from the device callback, with no queue in between"""
+
+    def __init__(self, audio, feed, sample_rate, frames_per_buffer):
+        self.audio = audio
+        self.feed = feed
+        self.sample_rate = sample_rate
+        self.frames_per_buffer = frames_per_buffer
+        self.overflows = 0
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+        self.feed(np.frombuffer(in_data, dtype=np.int16))
+        return (None, pyaudio.paContinue)
+
+    def start(self):
+        self.audio.open(format=pyaudio.paInt16, channels=1, rate=self.sample_rate, input=True,
+                        frames_per_buffer=self.frames_per_buffer, stream_callback=self._callback)
+
+    def stop(self):
+        self.audio.stream.stop_stream()
+
+    def stats(self):
+        return {'overflows': self.overflows}
+
+
+def burn(stop):
+    """Pure-Python busy loop: holds the GIL between interpreter switches"""
+    while not stop.is_set():
+        total = 0
+        for i in range(10000):
+            total += i * i
+
+
+def run(mode, args):
+    sample_rate = AUDIO_CONFIG['sample_rate']
+    frames_per_buffer = AUDIO_CONFIG['chunk_size']
+    audio = SimulatedAudio(args.seconds, args.device_buffers)
+    pipeline = Pipeline(sample_rate, args.stall_every, args.stall_seconds)
+    if mode == 'callback':
+        capture = MicrophoneCapture(audio, pipeline.feed, sample_rate, frames_per_buffer=frames_per_buffer,
+                                    max_buffers=AUDIO_CONFIG['capture_queue_buffers'])
+    else:
+        capture = InlineCapture(audio, pipeline.feed, sample_rate, frames_per_buffer)
+
+    stop = threading.Event()
+    burners = [threading.Thread(target=burn, args=(stop,), daemon=True) for _ in range(args.load_threads)]
+    for thread in burners:
+        thread.start()
+    started = time.perf_counter()
+    capture.start()
+    audio.stream.wait()
+    capture.stop()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in burners:
+        thread.join()
+
+    received, discontinuities = pipeline.check()
+    produced = audio.stream.produced * frames_per_buffer
+    return {
+        'mode': mode,
+        'seconds': round(elapsed, 2),
+        'device_frames': produced,
+        'received_frames': received,
+        'lost_frames': produced - received,
+        'discontinuities': discontinuities,
+        'device_overflowed_buffers': audio.stream.overflowed_buffers,
+        'capture': capture.stats()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=20.0, help='Length of the simulated recording')
+    parser.add_argument('--load-threads', type=int, default=4, help='Busy-loop threads competing for the CPU')
+    parser.add_argument('--device-buffers', type=int, default=4, help='Buffers the simulated device holds')
+    parser.add_argument('--stall-every', type=int, default=50, help='Stall the pipeline every N buffers (0 for never)')
+    parser.add_argument('--stall-seconds', type=float, default=0.5, help='Length of each pipeline stall')
+    parser.add_argument('--mode', choices=['callback', 'inline', 'both'], default='both')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    modes = ['callback', 'inline'] if args.mode == 'both' else [args.mode]
+    results = [run(mode, args) for mode in modes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print(f"{result['mode']:>8}: {result['received_frames']}/{result['device_frames']} frames, "
+              f"{result['lost_frames']} lost, {result['discontinuities']} discontinuities, "
+              f"{result['device_overflowed_buffers']} overflowed buffers")
+        print(f"          capture: {result['capture']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark in-memory chunk encoding: encode time and payload size per codec
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_codec import available_codecs, encode_audio
+from config import AUDIO_CONFIG, TRANSCRIPTION_CONFIG
+from synthetic import synthetic_speech
+
+
+def run(seconds, repeats, sample_rate):
+    audio = synthetic_speech(seconds, sample_rate)
+    raw_bytes = audio.nbytes
+    results = []
+    for codec in available_codecs():
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            encoded = encode_audio(audio, sample_rate, codec)
+            timings.append(time.perf_counter() - started)
+        results.append({
+            'codec': codec,
+            'chunk_seconds': seconds,
+            'encode_ms_median': round(float(np.median(timings)) * 1000, 3),
+            'encode_ms_p95': round(float(np.percentile(timings, 95)) * 1000, 3),
+            'payload_bytes': len(encoded.data),
+            'compression_ratio': round(raw_bytes / len(encoded.data), 2)
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--seconds', type=float, default=TRANSCRIPTION_CONFIG['interval'],
+                        help='chunk length in seconds')
+    parser.add_argument('--repeats', type=int, default=50)
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    results = run(args.seconds, args.repeats, AUDIO_CONFIG['sample_rate'])
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'codec':<6} {'median ms':>10} {'p95 ms':>8} {'bytes':>9} {'ratio':>6}")
+    for row in results:
+        print(f"{row['codec']:<6} {row['encode_ms_median']:>10} {row['encode_ms_p95']:>8} "
+              f"{row['payload_bytes']:>9} {row['compression_ratio']:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Compare index-parity speaker labels with online MFCC diarization on a synthetic two-speaker interview
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_store import AudioStore
+from config import AUDIO_CONFIG, PROCESSING_CONFIG, SPEAKER_CONFIG, TRANSCRIPTION_CONFIG
+from diarization import OnlineSpeakerDiarizer
+from synthetic import synthetic_interview
+from vad import VoiceActivityChunker
+
+
+def chunk_segments(audio, turns, sample_rate):
+    """Cut the interview with the VAD chunker and give each chunk the talk spurts it contains,
+    standing in for the segments Whisper would return"""
+    store = AudioStore(sample_rate)
+    store.append(audio)
+    chunker = VoiceActivityChunker(
+        sample_rate,
+        min_length=TRANSCRIPTION_CONFIG['min_audio_length'],
+        target_length=TRANSCRIPTION_CONFIG['interval'],
+        max_length=TRANSCRIPTION_CONFIG['max_audio_length'],
+        overlap=TRANSCRIPTION_CONFIG['overlap'],
+        silence_threshold=PROCESSING_CONFIG['silence_threshold'],
+        min_pause=TRANSCRIPTION_CONFIG['min_pause']
+    )
+    chunks = []
+    for chunk_start, chunk_end in chunker.process(store, final=True):
+        segments = []
+        for start, end, speaker in turns:
+            start, end = max(start, chunk_start), min(end, chunk_end)
+            if end - start > 0.1 * sample_rate:
+                segments.append({'start': start / sample_rate, 'end': end / sample_rate, 'speaker': speaker})
+        chunks.append(segments)
+    return store, chunks
+
+
+def accuracy(segments, predicted):
+    """Duration-weighted accuracy under the best mapping of predicted to true speakers"""
+    durations = np.array([s['end'] - s['start'] for s in segments])
+    truth = np.array([s['speaker'] for s in segments])
+    predicted = np.asarray(predicted)
+    total = durations.sum()
+    best = 0.0
+    for mapping in ({0: 0, 1: 1}, {0: 1, 1: 0}):
+        mapped = np.array([mapping.get(p, -1) for p in predicted])
+        best = max(best, durations[mapped == truth].sum() / total)
+    return round(float(best), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--minutes', type=float, default=10.0, help='length of the synthetic interview')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    sample_rate = AUDIO_CONFIG['sample_rate']
+    audio, turns = synthetic_interview(args.minutes * 60, sample_rate, seed=args.seed)
+    store, chunks = chunk_segments(audio, turns, sample_rate)
+
+    labels = SPEAKER_CONFIG['speaker_labels']
+    diarizer = OnlineSpeakerDiarizer(
+        sample_rate,
+        labels,
+        max_speakers=SPEAKER_CONFIG['speaker_count'],
+        threshold=SPEAKER_CONFIG['similarity_threshold'],
+        min_duration=SPEAKER_CONFIG['segment_min_duration'],
+        max_analysis_seconds=SPEAKER_CONFIG['max_analysis_seconds'],
+        latency_budget=SPEAKER_CONFIG['latency_budget']
+    )
+    warmup_started = time.perf_counter()
+    diarizer.warmup()
+    warmup_seconds = time.perf_counter() - warmup_started
+
+    segments, parity, online = [], [], []
+    for chunk in chunks:
+        segments.extend(chunk)
+        # The old labelling restarted at "Interviewer" in every chunk
+        parity.extend(i % 2 for i in range(len(chunk)))
+        online.extend(labels.index(label) if label in labels else -1
+                      for label, _ in diarizer.assign(store, chunk))
+
+    stats = diarizer.stats()
+    results = {
+        'audio_seconds': round(len(audio) / sample_rate, 2),
+        'chunks': len(chunks),
+        'segments': len(segments),
+        'parity_accuracy': accuracy(segments, parity),
+        'online_accuracy': accuracy(segments, online),
+        'diarizer': stats,
+        'warmup_seconds': round(warmup_seconds, 2),
+        'latency_budget_ms': SPEAKER_CONFIG['latency_budget'] * 1000,
+        'interval_ms': TRANSCRIPTION_CONFIG['interval'] * 1000
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Audio: {results['audio_seconds']}s in {results['chunks']} chunks, {results['segments']} segments")
+    print(f"  parity labels accuracy {results['parity_accuracy']:.1%}")
+    print(f"  online diarization accuracy {results['online_accuracy']:.1%} "
+          f"({stats['speakers']} speakers, {stats['fallbacks']} fallbacks, {stats['over_budget']} over budget)")
+    print(f"  {stats['avg_segment_ms']}ms per segment, slowest chunk {stats['max_chunk_ms']}ms "
+          f"(budget {results['latency_budget_ms']:.0f}ms, interval {results['interval_ms']:.0f}ms)")
+    print(f"  one-off warmup {results['warmup_seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency benchmark: synthetic interviews through RealTimeAudioProcessor against a local fake OpenAI server.
+
+Each session is fed synthetic audio in real time (no PyAudio) and transcribed and
+analysed through the real OpenAI client, pointed at benchmarks/fake_openai.py
+with the given latency and jitter. Reports capture-to-live_transcript latency
+percentiles, transcription queue lag, memory growth and CPU per session, as
+JSON for tracking regressions.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from fake_openai import FakeOpenAIServer
+from load_sessions import SessionDriver, rss_mb
+from synthetic import synthetic_interview
+
+
+def percentiles(values):
+    if not values:
+        return {'count': 0, 'p50': None, 'p90': None, 'p99': None, 'max': None}
+    values = np.asarray(values)
+    return {
+        'count': int(len(values)),
+        'p50': round(float(np.percentile(values, 50)), 3),
+        'p90': round(float(np.percentile(values, 90)), 3),
+        'p99': round(float(np.percentile(values, 99)), 3),
+        'max': round(float(values.max()), 3)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def watch_transcripts(driver, latencies):
+    """Record the delay from capturing the end of each segment to emitting it"""
+    emit = driver.processor._emit
+
+    def timed_emit(event, data):
+        if event == 'live_transcript' and driver.started is not None:
+            latencies.append(time.monotonic() - (driver.started + data['end_time']))
+        emit(event, data)
+
+    driver.processor._emit = timed_emit
+
+
+def run(app_module, sessions, seconds, audio):
+    drivers = []
+    latencies = []
+    for index in range(sessions):
+        _, processor = app_module.sessions.create(f"bench-{index}")
+        driver = SessionDriver(processor, audio, config.AUDIO_CONFIG['chunk_size'], config.AUDIO_CONFIG['sample_rate'])
+        watch_transcripts(driver, latencies)
+        drivers.append(driver)
+
+    backlog_samples = []
+    sampling = threading.Event()
+
+    def sample_backlog():
+        while not sampling.wait(0.25):
+            backlog_samples.extend(driver.processor.transcription_backlog() for driver in drivers
+                                   if driver.processor.transcription_pool is not None)
+
+    rss_before = rss_mb()
+    cpu_before = time.process_time()
+    wall_before = time.monotonic()
+
+    sampler = threading.Thread(target=sample_backlog)
+    sampler.daemon = True
+    sampler.start()
+    stop_event = threading.Event()
+    threads = [threading.Thread(target=driver.run, args=(stop_event,)) for driver in drivers]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+    sampling.set()
+
+    wall = time.monotonic() - wall_before
+    cpu = time.process_time() - cpu_before
+    rss_after = rss_mb()
+    controllers = [driver.processor.chunk_controller.stats() for driver in drivers if driver.processor.chunk_controller]
+    for session_id in app_module.sessions.session_ids():
+        app_module.sessions.evict(session_id)
+
+    return {
+        'live_transcript_latency_s': percentiles(latencies),
+        'chunk_delivery_lag_s': percentiles([lag for driver in drivers for lag in driver.lags]),
+        'transcription_backlog': {
+            'mean': round(float(np.mean(backlog_samples)), 2) if backlog_samples else 0.0,
+            'max': int(max(backlog_samples)) if backlog_samples else 0
+        },
+        'max_capture_lateness_s': round(max(driver.max_lateness for driver in drivers), 3),
+        'chunks': sum(driver.processor.chunker.chunks for driver in drivers),
+        'chunk_target_s': [controller['target'] for controller in controllers],
+        'chunk_target_changes': sum(len(controller['decisions']) for controller in controllers),
+        'cpu_percent_per_session': round(100 * cpu / wall / sessions, 2),
+        'rss_mb': round(rss_after, 1),
+        'rss_growth_mb_per_session': round((rss_after - rss_before) / sessions, 2),
+        'wall_s': round(wall, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=1, help='simultaneous interviews')
+    parser.add_argument('--seconds', type=float, default=60.0, help='audio fed per session (real time)')
+    parser.add_argument('--transcription-latency', type=float, default=0.8, help='fake Whisper latency (s)')
+    parser.add_argument('--chat-latency', type=float, default=1.5, help='fake GPT latency (s)')
+    parser.add_argument('--jitter', type=float, default=0.3, help='uniform +/- jitter on both latencies (s)')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of requests refused with 429')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='also write the JSON results to this file')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.transcription_latency, args.chat_latency, args.jitter, seed=args.seed,
+                              rate_limit_rate=args.rate_limit_rate).start()
+    os.environ['OPENAI_BASE_URL'] = server.base_url
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+
+    # Exercise the real OpenAI path; keep runs independent of earlier results
+    config.TRANSCRIPTION_CONFIG['backend'] = 'openai'
+    config.CACHE_CONFIG['enabled'] = False
+    config.TRANSCRIPT_CONFIG['persist'] = False
+    config.RECORDING_CONFIG['enabled'] = False
+    import app as app_module
+    app_module.sessions.max_sessions = max(app_module.sessions.max_sessions, args.sessions)
+
+    audio, _ = synthetic_interview(args.seconds + 5, config.AUDIO_CONFIG['sample_rate'], seed=args.seed)
+    try:
+        results = run(app_module, args.sessions, args.seconds, audio)
+    finally:
+        server.stop()
+
+    report = {
+        'benchmark': 'e2e',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': git_commit(),
+        'parameters': {
+            'sessions': args.sessions,
+            'seconds': args.seconds,
+            'transcription_latency': args.transcription_latency,
+            'chat_latency': args.chat_latency,
+            'jitter': args.jitter,
+            'rate_limit_rate': args.rate_limit_rate,
+            'seed': args.seed,
+            'transcription': {key: config.TRANSCRIPTION_CONFIG[key] for key in ('interval', 'workers', 'codec', 'max_pending')}
+        },
+        'requests': dict(server.requests),
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    latency = results['live_transcript_latency_s']
+    lag = results['chunk_delivery_lag_s']
+    print(f"{args.sessions} session(s), {args.seconds}s of audio, "
+          f"{report['requests']['transcriptions']} transcriptions, {report['requests']['chat']} chat calls, "
+          f"{report['requests']['rate_limited']} rate limited")
+    print(f"  capture -> live_transcript: p50={latency['p50']}s p90={latency['p90']}s "
+          f"p99={latency['p99']}s max={latency['max']}s ({latency['count']} segments)")
+    print(f"  chunk delivery lag: p50={lag['p50']}s p99={lag['p99']}s; "
+          f"backlog mean={results['transcription_backlog']['mean']} max={results['transcription_backlog']['max']}")
+    print(f"  {results['chunks']} chunks; adaptive target {results['chunk_target_s']}s "
+          f"after {results['chunk_target_changes']} changes")
+    print(f"  cpu/session={results['cpu_percent_per_session']}% rss={results['rss_mb']}MB "
+          f"(+{results['rss_growth_mb_per_session']}MB/session), capture lateness {results['max_capture_lateness_s']}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Socket.IO fan-out benchmark: emit throughput and per-client latency with many connected clients.
+
+Starts the app's Socket.IO server on a local port and connects the given number
+of python-socketio clients to one interview session. Some of them handle
+read slowly, like a page on a poor connection. A producer thread emits
+timestamped live_transcript events and audio_envelope frames through the app's
+dispatcher, as the transcription and visualization threads do. Reports how
+long producers spend per emit, how many events a second the dispatcher sends,
+and the latency from emit to handler for fast and slow clients, plus the
+envelope frames each kind received.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('OPENAI_API_KEY', 'emit-benchmark')
+
+import socketio as socketio_client
+from engineio import payload
+
+# Without websocket-client, python-socketio polls, and by default rejects polls of more than 16 packets
+payload.Payload.max_decode_packets = 100000
+
+from bench_e2e import percentiles
+
+SESSION_ID = 'emit-benchmark'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class BenchmarkClient:
+    """One connected page: records live_transcript latency and counts envelope frames.
+
+    A slow client waits `slow_delay` seconds before each read from the server,
+    like a page on a poor connection.
+    """
+
+    def __init__(self, url, slow_delay):
+        self.latencies = []
+        self.frames = 0
+        self.joined = threading.Event()
+        self.client = socketio_client.Client(reconnection=False)
+        self.client.on('session_joined', lambda data: self.joined.set())
+        self.client.on('live_transcript', self._on_transcript)
+        self.client.on('audio_envelope', self._on_frame)
+        self.client.connect(url, wait_timeout=30)
+        if slow_delay:
+            send_request = self.client.eio._send_request
+
+            def slow_send_request(method, *args, **kwargs):
+                if method == 'GET':
+                    time.sleep(slow_delay)
+                return send_request(method, *args, **kwargs)
+
+            self.client.eio._send_request = slow_send_request
+        self.client.emit('join_session', {'session_id': SESSION_ID})
+
+    def _on_transcript(self, data):
+        self.latencies.append(time.time() - data['sent'])
+
+    def _on_frame(self, data):
+        self.frames += 1
+
+    def close(self):
+        self.client.disconnect()
+
+
+def client_worker(connection, url, count, slow_count, slow_delay):
+    """Hosts `count` clients in a separate process so their decoding does not compete with the server"""
+    clients = [BenchmarkClient(url, slow_delay if index < slow_count else 0) for index in range(count)]
+    for client in clients:
+        client.joined.wait(timeout=30)
+    connection.send('ready')
+    slow, fast = clients[:slow_count], clients[slow_count:]
+    while True:
+        command = connection.recv()
+        if command == 'count':
+            connection.send(sum(len(client.latencies) for client in clients))
+        elif command == 'reset':
+            for client in clients:
+                client.latencies.clear()
+                client.frames = 0
+            connection.send('reset')
+        elif command == 'collect':
+            connection.send({
+                'fast_latencies': [value for client in fast for value in client.latencies],
+                'slow_latencies': [value for client in slow for value in client.latencies],
+                'fast_frames': [client.frames for client in fast],
+                'slow_frames': [client.frames for client in slow],
+                'transport': clients[0].client.transport() if clients else None
+            })
+        else:
+            for client in clients:
+                client.close()
+            connection.send('closed')
+            return
+
+
+class ClientPool:
+    """Spreads the benchmark clients over worker processes"""
+
+    def __init__(self, url, clients, slow_clients, slow_delay, processes):
+        context = multiprocessing.get_context('spawn')
+        self._connections = []
+        self._processes = []
+        processes = max(1, min(processes, clients))
+        for index in range(processes):
+            count = clients // processes + (1 if index < clients % processes else 0)
+            slow_count = slow_clients // processes + (1 if index < slow_clients % processes else 0)
+            parent, child = context.Pipe()
+            process = context.Process(target=client_worker, args=(child, url, count, slow_count, slow_delay))
+            process.daemon = True
+            process.start()
+            self._connections.append(parent)
+            self._processes.append(process)
+        for connection in self._connections:
+            connection.recv()
+
+    def _ask(self, command):
+        for connection in self._connections:
+            connection.send(command)
+        return [connection.recv() for connection in self._connections]
+
+    def received(self):
+        return sum(self._ask('count'))
+
+    def reset(self):
+        self._ask('reset')
+
+    def collect(self):
+        replies = self._ask('collect')
+        return {key: [value for reply in replies for value in reply[key]] if key != 'transport' else replies[0][key]
+                for key in replies[0]}
+
+    def close(self):
+        self._ask('close')
+        for process in self._processes:
+            process.join(timeout=5)
+
+
+def produce(app_module, room, frame_room, seconds, rate, frame_rate):
+    """Emit transcript events and envelope frames at fixed rates; returns seconds spent per emit"""
+    submit_times = []
+    frame = bytes(128)
+    started = time.monotonic()
+    next_event = next_frame = started
+    count = 0
+    while time.monotonic() - started < seconds:
+        now = time.monotonic()
+        if now >= next_event:
+            before = time.perf_counter()
+            app_module._socket_emit('live_transcript', {'sent': time.time(), 'text': f'segment {count}'}, room)
+            submit_times.append(time.perf_counter() - before)
+            count += 1
+            next_event += 1.0 / rate
+        if now >= next_frame:
+            app_module._socket_emit('audio_envelope', frame, frame_room)
+            next_frame += 1.0 / frame_rate
+        time.sleep(max(0.0, min(next_event, next_frame) - time.monotonic()))
+    return submit_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=200, help='Connected clients')
+    parser.add_argument('--slow-clients', type=int, default=20, help='Clients on a slow connection')
+    parser.add_argument('--slow-delay', type=float, default=0.3, help='Seconds a slow client waits before each read')
+    parser.add_argument('--seconds', type=float, default=15.0, help='Length of the measured run')
+    parser.add_argument('--rate', type=float, default=10.0, help='live_transcript events emitted per second')
+    parser.add_argument('--burst', type=int, default=200, help='Events emitted at once to measure dispatcher throughput')
+    parser.add_argument('--processes', type=int, default=4, help='Worker processes hosting the clients')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    import app as app_module
+    from config import VISUALIZATION_CONFIG
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    port = free_port()
+    server = threading.Thread(target=app_module.socketio.run, args=(app_module.app,), kwargs={
+        'host': '127.0.0.1', 'port': port, 'debug': False, 'use_reloader': False,
+        'log_output': False, 'allow_unsafe_werkzeug': True
+    })
+    server.daemon = True
+    server.start()
+    time.sleep(1.0)
+
+    pool = ClientPool(f'http://127.0.0.1:{port}', args.clients, args.slow_clients, args.slow_delay, args.processes)
+    processor = app_module.sessions.get(SESSION_ID)
+    frame_room = processor.visualization.room_for(VISUALIZATION_CONFIG['default_bins'])
+
+    # Throughput: a burst of ordered events, timed until the dispatcher has handed them all to the server
+    started = time.perf_counter()
+    for index in range(args.burst):
+        app_module._socket_emit('live_transcript', {'sent': time.time(), 'text': f'burst {index}'}, processor.room)
+    submitted = time.perf_counter() - started
+    app_module.dispatcher.wait_idle(timeout=120)
+    dispatched = time.perf_counter() - started
+    deadline = time.monotonic() + 120
+    while pool.received() < args.burst * args.clients and time.monotonic() < deadline:
+        time.sleep(0.1)
+    delivered = time.perf_counter() - started
+    time.sleep(1.0)
+    pool.reset()
+
+    submit_times = produce(app_module, processor.room, frame_room, args.seconds, args.rate,
+                           VISUALIZATION_CONFIG['frame_rate'])
+    time.sleep(2.0)
+    received = pool.collect()
+    pool.close()
+
+    result = {
+        'clients': args.clients,
+        'slow_clients': args.slow_clients,
+        'transport': received['transport'],
+        'burst_events': args.burst,
+        'submit_us_per_event': round(submitted / max(1, args.burst) * 1e6, 2),
+        'dispatched_events_per_second': round(args.burst / dispatched, 1) if args.burst else None,
+        'fanout_packets_per_second': round(args.burst * args.clients / dispatched, 1) if args.burst else None,
+        'burst_delivered_seconds': round(delivered, 2),
+        'producer_emit_ms': percentiles([value * 1000 for value in submit_times]),
+        'fast_latency_ms': percentiles([value * 1000 for value in received['fast_latencies']]),
+        'slow_latency_ms': percentiles([value * 1000 for value in received['slow_latencies']]),
+        'fast_frames_per_client': round(sum(received['fast_frames']) / max(1, len(received['fast_frames'])), 1),
+        'slow_frames_per_client': round(sum(received['slow_frames']) / max(1, len(received['slow_frames'])), 1),
+        'frames_emitted': int(args.seconds * VISUALIZATION_CONFIG['frame_rate']),
+        'dispatcher': app_module.dispatcher.stats()
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for key, value in result.items():
+        print(f"{key:>30}: {value}")
+
+
+if __name__ == '__main__':
+    main()
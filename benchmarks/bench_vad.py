@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Compare wall-clock interval chunking with voice-activity chunking on a synthetic interview
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_store import AudioStore
+from config import AUDIO_CONFIG, PROCESSING_CONFIG, TRANSCRIPTION_CONFIG
+from synthetic import synthetic_interview
+from vad import VoiceActivityChunker
+
+
+def cuts_inside_speech(ranges, turns):
+    """Number of chunk boundaries that fall inside a talk spurt"""
+    boundaries = np.array(sorted({end for _, end in ranges[:-1]}), dtype=np.int64)
+    count = 0
+    for start, end, _ in turns:
+        count += int(np.count_nonzero((boundaries > start) & (boundaries < end)))
+    return count
+
+
+def interval_chunks(total, sample_rate, interval):
+    step = int(interval * sample_rate)
+    return [(start, min(start + step, total)) for start in range(0, total, step)]
+
+
+def vad_chunks(audio, sample_rate, capture_size):
+    store = AudioStore(sample_rate)
+    chunker = VoiceActivityChunker(
+        sample_rate,
+        min_length=TRANSCRIPTION_CONFIG['min_audio_length'],
+        target_length=TRANSCRIPTION_CONFIG['interval'],
+        max_length=TRANSCRIPTION_CONFIG['max_audio_length'],
+        overlap=TRANSCRIPTION_CONFIG['overlap'],
+        silence_threshold=PROCESSING_CONFIG['silence_threshold'],
+        min_pause=TRANSCRIPTION_CONFIG['min_pause']
+    )
+    ranges = []
+    timings = []
+    for position in range(0, len(audio), capture_size):
+        store.append(audio[position:position + capture_size])
+        started = time.perf_counter()
+        ranges.extend(chunker.process(store))
+        timings.append(time.perf_counter() - started)
+    ranges.extend(chunker.process(store, final=True))
+    return ranges, timings
+
+
+def summarize(name, ranges, turns, sample_rate):
+    return {
+        'method': name,
+        'api_calls': len(ranges),
+        'billed_seconds': round(sum(end - start for start, end in ranges) / sample_rate, 2),
+        'cuts_inside_speech': cuts_inside_speech(ranges, turns)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--minutes', type=float, default=10.0, help='length of the synthetic interview')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    sample_rate = AUDIO_CONFIG['sample_rate']
+    audio, turns = synthetic_interview(args.minutes * 60, sample_rate, seed=args.seed)
+    speech_seconds = sum(end - start for start, end, _ in turns) / sample_rate
+
+    fixed = summarize('interval', interval_chunks(len(audio), sample_rate, TRANSCRIPTION_CONFIG['interval']),
+                      turns, sample_rate)
+    ranges, timings = vad_chunks(audio, sample_rate, AUDIO_CONFIG['chunk_size'])
+    vad = summarize('vad', ranges, turns, sample_rate)
+    vad['process_us_median'] = round(float(np.median(timings)) * 1e6, 1)
+    vad['process_us_p99'] = round(float(np.percentile(timings, 99)) * 1e6, 1)
+
+    results = {
+        'audio_seconds': round(len(audio) / sample_rate, 2),
+        'speech_seconds': round(speech_seconds, 2),
+        'methods': [fixed, vad],
+        'api_call_reduction': round(1 - vad['api_calls'] / fixed['api_calls'], 3),
+        'billed_seconds_reduction': round(1 - vad['billed_seconds'] / fixed['billed_seconds'], 3)
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Audio: {results['audio_seconds']}s, speech: {results['speech_seconds']}s")
+    for row in results['methods']:
+        print(f"  {row['method']:<9} calls={row['api_calls']:<5} billed={row['billed_seconds']:<9}s "
+              f"cuts inside speech={row['cuts_inside_speech']}")
+    print(f"  vad process() median {vad['process_us_median']}us, p99 {vad['process_us_p99']}us")
+    print(f"API calls -{results['api_call_reduction']:.1%}, billed seconds -{results['billed_seconds_reduction']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+Local stand-in for the OpenAI HTTP API used by benchmarks.
+
+Serves /v1/audio/transcriptions (verbose_json segments derived from the
+uploaded audio) and /v1/chat/completions (a fixed candidate profile, streamed
+as server-sent events when asked, with the first piece after a tenth of the
+latency and the rest spread over the remainder) after a
+configurable latency with uniform jitter, and answers a given fraction of
+requests with 429 rate-limit errors. Point the OpenAI client at it with
+OPENAI_BASE_URL=<server.base_url>.
+"""
+
+import io
+import json
+import random
+import threading
+import time
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import soundfile as sf
+
+PROFILE = {
+    'name': 'Synthetic Candidate',
+    'experience': '5 years',
+    'skills': ['Python', 'Flask'],
+    'education': 'BSc Computer Science',
+    'current_role': 'Software Engineer',
+    'key_achievements': [],
+    'interview_notes': 'Generated by the benchmark server',
+    'strengths': [],
+    'areas_of_concern': [],
+    'overall_assessment': 'n/a'
+}
+
+
+class FakeOpenAIServer:
+    """Threaded HTTP server answering the OpenAI endpoints the app uses"""
+
+    def __init__(self, transcription_latency=0.5, chat_latency=1.0, jitter=0.2, segment_length=2.0,
+                 host='127.0.0.1', port=0, seed=0, rate_limit_rate=0.0, retry_after=1.0):
+        self.transcription_latency = transcription_latency
+        self.chat_latency = chat_latency
+        self.jitter = jitter
+        self.segment_length = segment_length
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.requests = {'transcriptions': 0, 'chat': 0, 'rate_limited': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-openai')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def rate_limited(self):
+        """Whether to refuse the next request with a 429"""
+        with self._lock:
+            limited = self._random.random() < self.rate_limit_rate
+            if limited:
+                self.requests['rate_limited'] += 1
+        return limited
+
+    def _delay(self, latency, kind):
+        """Sleep for the simulated processing time and return it in seconds"""
+        with self._lock:
+            self.requests[kind] += 1
+            jitter = self._random.uniform(-self.jitter, self.jitter)
+        delay = max(0.0, latency + jitter)
+        time.sleep(delay)
+        return delay
+
+    def transcribe(self, audio_bytes):
+        audio, sample_rate = sf.read(io.BytesIO(audio_bytes), dtype='int16')
+        duration = len(audio) / sample_rate
+        processing = self._delay(self.transcription_latency, 'transcriptions')
+
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(start + self.segment_length, duration)
+            words = max(1, int((end - start) * 2.5))
+            segments.append({
+                'id': len(segments),
+                'start': round(start, 3),
+                'end': round(end, 3),
+                'text': ' '.join(f"word{(len(segments) * 7 + i) % 50}" for i in range(words))
+            })
+            start = end
+        return processing, {
+            'task': 'transcribe',
+            'language': 'english',
+            'duration': duration,
+            'text': ' '.join(segment['text'] for segment in segments),
+            'segments': segments
+        }
+
+    def complete(self, request):
+        processing = self._delay(self.chat_latency, 'chat')
+        # Rough token counts: about four characters per token
+        prompt_tokens = sum(len(message.get('content', '')) for message in request.get('messages', [])) // 4
+        completion_tokens = len(json.dumps(PROFILE)) // 4
+        return processing, {
+            'id': 'chatcmpl-benchmark',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'gpt-4'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': json.dumps(PROFILE)},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens}
+        }
+
+    def complete_stream(self, request, write):
+        """Stream the completion in small pieces through `write(event_dict)`"""
+        total = self._delay(self.chat_latency * 0.1, 'chat') / 0.1
+        content = json.dumps(PROFILE, indent=2)
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)]
+        interval = total * 0.9 / len(pieces)
+        base = {'id': 'chatcmpl-benchmark', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                'model': request.get('model', 'gpt-4')}
+        for index, piece in enumerate(pieces):
+            if index:
+                time.sleep(interval)
+            write(dict(base, choices=[{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]))
+        write(dict(base, choices=[{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]))
+        prompt_tokens = sum(len(message.get('content', '')) for message in request.get('messages', [])) // 4
+        completion_tokens = len(content) // 4
+        write(dict(base, choices=[], usage={'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                                            'total_tokens': prompt_tokens + completion_tokens}))
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, body, processing=None, headers=None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                if processing is not None:
+                    # Like the real API, report server-side processing time
+                    self.send_header('openai-processing-ms', str(int(processing * 1000)))
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, request):
+                # HTTP/1.0 without Content-Length: closing the connection ends the body
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.end_headers()
+
+                def write(event):
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                    self.wfile.flush()
+
+                server.complete_stream(request, write)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                try:
+                    if server.rate_limit_rate and server.rate_limited():
+                        self._reply(429, {'error': {'message': 'Rate limit reached', 'type': 'requests',
+                                                    'code': 'rate_limit_exceeded'}},
+                                    headers={'retry-after': str(server.retry_after)})
+                    elif self.path.endswith('/audio/transcriptions'):
+                        message = BytesParser().parsebytes(
+                            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+                        )
+                        parts = {part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+                                 for part in message.get_payload()}
+                        processing, response = server.transcribe(parts['file'])
+                        self._reply(200, response, processing)
+                    elif self.path.endswith('/chat/completions'):
+                        request = json.loads(body)
+                        if request.get('stream'):
+                            self._stream(request)
+                        else:
+                            processing, response = server.complete(request)
+                            self._reply(200, response, processing)
+                    else:
+                        self._reply(404, {'error': {'message': f"Unknown endpoint {self.path}"}})
+                except Exception as e:
+                    self._reply(500, {'error': {'message': str(e)}})
+
+        return Handler
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Load test: how many simultaneous interviews one server process can sustain.
+
+Each simulated interview is a RealTimeAudioProcessor fed synthetic audio in real
+time, transcribed by the local stand-in backend with a fixed latency. The test
+steps up the number of concurrent sessions and reports transcript lag, capture
+lateness, CPU and memory for each step.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('OPENAI_API_KEY', 'load-test')
+
+import config
+from synthetic import synthetic_interview
+
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class SessionDriver:
+    """Feeds one processor in real time and records when each chunk is delivered"""
+
+    def __init__(self, processor, audio, chunk_size, sample_rate):
+        self.processor = processor
+        self.audio = audio
+        self.chunk_size = chunk_size
+        self.sample_rate = sample_rate
+        self.lags = []
+        self.max_lateness = 0.0
+        self.started = None
+
+        deliver = processor._handle_transcription_result
+
+        def timed_delivery(chunk, segments):
+            end_sample = chunk['start_sample'] + len(chunk['audio'])
+            self.lags.append(time.monotonic() - (self.started + end_sample / self.sample_rate))
+            deliver(chunk, segments)
+
+        processor._handle_transcription_result = timed_delivery
+
+    def run(self, stop_event):
+        self.processor.start_recording(source='external')
+        self.started = time.monotonic()
+        position = 0
+        while not stop_event.is_set() and position < len(self.audio):
+            due = self.started + position / self.sample_rate
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.max_lateness = max(self.max_lateness, -delay)
+            self.processor.feed_audio(self.audio[position:position + self.chunk_size])
+            position += self.chunk_size
+        self.processor.stop_recording()
+        # Deliver the chunks queued before the stop so their lag is measured too
+        self.processor.finish_transcription(config.REALTIME_CONFIG['final_drain_timeout'])
+
+
+def run_step(app_module, session_count, seconds, audio):
+    sessions = app_module.sessions
+    sessions.max_sessions = session_count
+    drivers = []
+    for index in range(session_count):
+        _, processor = sessions.create(f"load-{session_count}-{index}")
+        drivers.append(SessionDriver(processor, audio, config.AUDIO_CONFIG['chunk_size'],
+                                     config.AUDIO_CONFIG['sample_rate']))
+
+    rss_before = rss_mb()
+    cpu_before = time.process_time()
+    wall_before = time.monotonic()
+
+    stop_event = threading.Event()
+    threads = [threading.Thread(target=driver.run, args=(stop_event,)) for driver in drivers]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+
+    wall = time.monotonic() - wall_before
+    cpu = time.process_time() - cpu_before
+    rss_after = rss_mb()
+    for session_id in sessions.session_ids():
+        sessions.evict(session_id)
+
+    lags = np.array([lag for driver in drivers for lag in driver.lags]) if any(d.lags for d in drivers) else np.zeros(1)
+    return {
+        'sessions': session_count,
+        'chunks': int(sum(len(driver.lags) for driver in drivers)),
+        'lag_p50_s': round(float(np.percentile(lags, 50)), 3),
+        'lag_p95_s': round(float(np.percentile(lags, 95)), 3),
+        'max_capture_lateness_s': round(max(driver.max_lateness for driver in drivers), 3),
+        'cpu_percent': round(100 * cpu / wall, 1),
+        'rss_mb': round(rss_after, 1),
+        'rss_growth_mb': round(rss_after - rss_before, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--steps', default='1,2,4,8,16,32', help='comma-separated session counts')
+    parser.add_argument('--seconds', type=float, default=30.0, help='duration of each step')
+    parser.add_argument('--latency', type=float, default=1.0, help='simulated transcription latency (s)')
+    parser.add_argument('--max-lag', type=float, default=config.TRANSCRIPTION_CONFIG['max_audio_length'],
+                        help='p95 transcript lag above which a step counts as not sustained (s)')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    config.TRANSCRIPTION_CONFIG['backend'] = 'local'
+    config.TRANSCRIPTION_CONFIG['local_latency'] = args.latency
+    # Measure the audio path only: no GPT calls and no transcript database
+    config.ANALYSIS_CONFIG['rolling'] = False
+    config.TRANSCRIPT_CONFIG['persist'] = False
+    config.RECORDING_CONFIG['enabled'] = False
+    import app as app_module
+
+    audio, _ = synthetic_interview(args.seconds + 5, config.AUDIO_CONFIG['sample_rate'])
+    results = []
+    for count in (int(step) for step in args.steps.split(',')):
+        result = run_step(app_module, count, args.seconds, audio)
+        result['sustained'] = result['lag_p95_s'] <= args.max_lag and result['max_capture_lateness_s'] < 0.5
+        results.append(result)
+        if not args.json:
+            print(f"{count:>4} sessions: chunks={result['chunks']:<5} lag p50={result['lag_p50_s']}s "
+                  f"p95={result['lag_p95_s']}s lateness={result['max_capture_lateness_s']}s "
+                  f"cpu={result['cpu_percent']}% rss={result['rss_mb']}MB "
+                  f"{'ok' if result['sustained'] else 'NOT SUSTAINED'}")
+        if not result['sustained']:
+            break
+
+    sustained = [r['sessions'] for r in results if r['sustained']]
+    summary = {'max_sustained_sessions': max(sustained) if sustained else 0, 'steps': results}
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"Max sustained sessions: {summary['max_sustained_sessions']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Synthetic audio for benchmarks
+"""
+
+import numpy as np
+
+
+def synthetic_speech(seconds, sample_rate, seed=0, pitch=140.0):
+    """Voiced harmonics with syllable-rate amplitude modulation and light noise, as int16"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    contour = pitch + 0.18 * pitch * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(contour) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t + rng.uniform(0, np.pi)), 0, None)
+    audio = 0.3 * voiced * syllables + 0.01 * rng.standard_normal(len(t))
+    return (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+
+
+def synthetic_interview(seconds, sample_rate, seed=0, pitches=(110.0, 210.0)):
+    """Alternating talk turns separated by pauses, over a low noise floor.
+
+    Returns (audio, turns) where turns is a list of (start_sample, end_sample,
+    speaker_index) for every talk spurt.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    audio = (0.002 * rng.standard_normal(total) * 32767).astype(np.int16)
+    turns = []
+    position = int(rng.uniform(0.5, 1.5) * sample_rate)
+    speaker = 0
+    while position < total:
+        # A turn is a few spurts with short in-turn pauses
+        for _ in range(int(rng.integers(1, 4))):
+            length = int(rng.uniform(1.0, 6.0) * sample_rate)
+            end = min(position + length, total)
+            if end <= position:
+                break
+            spurt = synthetic_speech((end - position) / sample_rate, sample_rate,
+                                     seed=int(rng.integers(1 << 30)), pitch=pitches[speaker])
+            audio[position:position + len(spurt)] = spurt
+            turns.append((position, position + len(spurt), speaker))
+            position = end + int(rng.uniform(0.35, 0.8) * sample_rate)
+        # Longer gap between turns, sometimes a long silence
+        position += int(rng.choice([rng.uniform(0.5, 2.0), rng.uniform(4.0, 10.0)], p=[0.8, 0.2]) * sample_rate)
+        speaker = 1 - speaker
+    return audio, turns
@@ -0,0 +1,182 @@
+"""
+Content-addressed cache for transcription and analysis results
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """Two-tier cache of JSON-serializable results keyed by content hash.
+
+    Results live in an in-memory LRU bounded by `memory_bytes` and in an
+    on-disk store under `directory` bounded by `disk_bytes`, where the least
+    recently used files are evicted first. Keys come from `make_key`: a SHA-256
+    of the content together with the model/config parameters that affect the
+    result. Pass `directory=None` for a memory-only cache.
+    """
+
+    def __init__(self, directory, memory_bytes, disk_bytes):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._disk_size = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_size = sum(size for _, size, _ in self._disk_entries())
+
+    @staticmethod
+    def make_key(namespace, content, params=None):
+        """Hash content (bytes or str) together with the parameters that shape the result"""
+        digest = hashlib.sha256()
+        digest.update(namespace.encode())
+        digest.update(b'\0')
+        digest.update(json.dumps(params or {}, sort_keys=True).encode())
+        digest.update(b'\0')
+        digest.update(content.encode() if isinstance(content, str) else bytes(content))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached result, or None on a miss"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(self._memory[key])
+
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, data)
+        return json.loads(data)
+
+    def put(self, key, value):
+        data = json.dumps(value)
+        with self._lock:
+            self._remember(key, data)
+        self._write_disk(key, data)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached result or compute, cache and return it; None results are not cached"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                'memory_evictions': self.memory_evictions,
+                'disk_evictions': self.disk_evictions,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_size,
+                'disk_bytes': self._disk_size
+            }
+
+    def _remember(self, key, data):
+        """Insert into the memory LRU; caller holds the lock"""
+        if len(data) > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_size -= len(previous)
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+            self.memory_evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as cache_file:
+                data = cache_file.read()
+            # Touch the file so disk eviction is least-recently-used
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def _write_disk(self, key, data):
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            existing = os.path.getsize(path) if os.path.exists(path) else 0
+            # Write atomically so a crash never leaves a truncated entry
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as cache_file:
+                cache_file.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error writing cache entry: {e}")
+            return
+
+        with self._lock:
+            self._disk_size += len(data.encode('utf-8')) - existing
+            over_limit = self._disk_size > self.disk_bytes
+        if over_limit:
+            self._evict_disk()
+
+    def _disk_entries(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.json'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict_disk(self):
+        """Remove least recently used files until the store is at 90% of its limit"""
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.disk_bytes * 0.9
+        evicted = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_size = total
+            self.disk_evictions += evicted
@@ -0,0 +1,157 @@
+"""
+Callback-mode microphone capture with loss accounting
+"""
+
+import collections
+import threading
+import time
+
+import numpy as np
+import pyaudio
+
+from metrics import CAPTURE_FRAMES_DROPPED, CAPTURE_OVERFLOWS
+
+
+class MicrophoneCapture:
+    """Captures the server microphone with a PyAudio stream in callback mode.
+
+    The PortAudio callback turns each buffer into int16 samples (no conversion
+    at all for paInt16 streams) and appends it to a bounded deque; a consumer
+    thread pops buffers and feeds them to the pipeline. With one producer and
+    one consumer, deque append and popleft need no lock, so the callback never
+    waits on the pipeline. Lost audio is counted by cause: buffers PortAudio
+    flags as overflowed, gaps between the ADC timestamps of consecutive buffers,
+    and buffers dropped because `max_buffers` were already queued.
+    """
+
+    def __init__(self, audio, feed, sample_rate, channels=1, frames_per_buffer=1024, sample_format='paInt16',
+                 max_buffers=256):
+        self._audio = audio
+        self._feed = feed
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        self.sample_format = sample_format
+        self.max_buffers = max_buffers
+        # A timestamp gap of more than half a buffer means frames were lost
+        self._gap_tolerance = 0.5 * frames_per_buffer / sample_rate
+        self._poll_interval = 0.5 * frames_per_buffer / sample_rate
+        self._overflow_flag = getattr(pyaudio, 'paInputOverflow', 2)
+        self._buffers = collections.deque()
+        self._stream = None
+        self._thread = None
+        self._running = False
+        self._reset()
+
+    def _reset(self):
+        self.callbacks = 0
+        self.frames = 0
+        self.overflows = 0
+        self.gaps = 0
+        self.gap_frames = 0
+        self.queue_full = 0
+        self.queue_full_frames = 0
+        self.max_queue_depth = 0
+        self.max_callback_seconds = 0.0
+        self._expected_adc_time = None
+        self._published = (0, 0, 0)
+
+    def start(self):
+        self._reset()
+        self._buffers.clear()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='microphone-capture')
+        self._thread.daemon = True
+        self._thread.start()
+        self._stream = self._audio.open(
+            format=getattr(pyaudio, self.sample_format),
+            channels=self.channels,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.frames_per_buffer,
+            stream_callback=self._callback
+        )
+
+    def stop(self, timeout=5):
+        """Stop the stream, then feed every queued buffer to the pipeline"""
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def stats(self):
+        lost_frames = self.gap_frames + self.queue_full_frames
+        return {
+            'callbacks': self.callbacks,
+            'captured_seconds': round(self.frames / self.sample_rate, 3),
+            'overflows': self.overflows,
+            'gaps': self.gaps,
+            'gap_frames': self.gap_frames,
+            'queue_full_drops': self.queue_full,
+            'lost_seconds': round(lost_frames / self.sample_rate, 3),
+            'queued': len(self._buffers),
+            'max_queue_depth': self.max_queue_depth,
+            'max_callback_ms': round(self.max_callback_seconds * 1000, 3)
+        }
+
+    def _to_int16(self, data):
+        if self.sample_format == 'paInt16':
+            return np.frombuffer(data, dtype=np.int16)
+        samples = np.frombuffer(data, dtype=np.float32)
+        return np.clip(samples * 32767, -32768, 32767).astype(np.int16)
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        # Runs on the PortAudio thread: no locks, no I/O, just bookkeeping and one append
+        started = time.perf_counter()
+        if status & self._overflow_flag:
+            self.overflows += 1
+
+        adc_time = time_info.get('input_buffer_adc_time') if time_info else None
+        if adc_time:
+            if self._expected_adc_time is not None and adc_time - self._expected_adc_time > self._gap_tolerance:
+                self.gaps += 1
+                self.gap_frames += int(round((adc_time - self._expected_adc_time) * self.sample_rate))
+            self._expected_adc_time = adc_time + frame_count / self.sample_rate
+
+        depth = len(self._buffers)
+        if depth >= self.max_buffers:
+            self.queue_full += 1
+            self.queue_full_frames += frame_count
+        else:
+            self._buffers.append(self._to_int16(in_data))
+            self.max_queue_depth = max(self.max_queue_depth, depth + 1)
+        self.callbacks += 1
+        self.frames += frame_count
+        self.max_callback_seconds = max(self.max_callback_seconds, time.perf_counter() - started)
+        return (None, pyaudio.paContinue)
+
+    def _publish_losses(self):
+        """Copy the losses the callback counted since the last call into the metrics, off the audio thread"""
+        counts = (self.overflows, self.gap_frames, self.queue_full_frames)
+        overflows, gap_frames, queue_full_frames = (now - before for now, before in zip(counts, self._published))
+        self._published = counts
+        if overflows:
+            CAPTURE_OVERFLOWS.labels('microphone').inc(overflows)
+        if gap_frames:
+            CAPTURE_FRAMES_DROPPED.labels('microphone', 'gap').inc(gap_frames)
+        if queue_full_frames:
+            CAPTURE_FRAMES_DROPPED.labels('microphone', 'queue_full').inc(queue_full_frames)
+
+    def _run(self):
+        while True:
+            try:
+                samples = self._buffers.popleft()
+            except IndexError:
+                self._publish_losses()
+                if not self._running:
+                    break
+                time.sleep(self._poll_interval)
+                continue
+            try:
+                self._feed(samples)
+            except Exception as e:
+                print(f"Error feeding captured audio: {e}")
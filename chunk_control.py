@@ -0,0 +1,115 @@
+"""
+Feedback control of the live transcription chunk length
+"""
+
+import collections
+import threading
+import time
+
+
+class ChunkIntervalController:
+    """Tunes the target chunk length from transcription round trips and queue depth.
+
+    Round-trip time and chunk length are smoothed with an exponential moving
+    average. Their ratio over the worker count, `utilization`, is the share of
+    the transcription pool a steady stream of chunks keeps busy. When
+    utilization is above `high_utilization` or more chunks are waiting than
+    there are workers, the target grows by a factor of `increase`, so fewer,
+    longer requests let the queue drain. When utilization is below
+    `low_utilization` and nothing is waiting, it shrinks by `decrease` seconds
+    for a snappier live transcript. The target stays within
+    [min_length, max_length] and changes at most once per `hold` seconds.
+    Each change is kept in `decisions` for inspection.
+    """
+
+    def __init__(self, initial, min_length, max_length, workers, low_utilization=0.3, high_utilization=0.7,
+                 increase=1.5, decrease=0.25, hold=2.0, smoothing=0.3, history=50):
+        if not 0 < min_length <= max_length:
+            raise ValueError(f"Chunk length range must satisfy 0 < min ({min_length}) <= max ({max_length})")
+        if increase <= 1 or decrease < 0:
+            raise ValueError(f"Chunk length increase ({increase}) must be above 1 and decrease ({decrease}) at least 0")
+        self.initial = initial
+        self.min_length = min_length
+        self.max_length = max_length
+        self.workers = max(1, workers)
+        self.low_utilization = low_utilization
+        self.high_utilization = high_utilization
+        self.increase = increase
+        self.decrease = decrease
+        self.hold = hold
+        self.smoothing = smoothing
+        self.decisions = collections.deque(maxlen=history)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.target = min(max(self.initial, self.min_length), self.max_length)
+            self.round_trip = None
+            self.chunk_length = None
+            self.observations = 0
+            self._last_change = None
+            self.decisions.clear()
+
+    def _smooth(self, average, value):
+        return value if average is None else average + self.smoothing * (value - average)
+
+    def observe(self, round_trip, audio_seconds):
+        """Record one completed transcription of `audio_seconds` that took `round_trip` seconds"""
+        with self._lock:
+            self.round_trip = self._smooth(self.round_trip, round_trip)
+            self.chunk_length = self._smooth(self.chunk_length, audio_seconds)
+            self.observations += 1
+
+    def utilization(self):
+        if self.round_trip is None or not self.chunk_length:
+            return None
+        return self.round_trip / (self.workers * self.chunk_length)
+
+    def update(self, backlog, now=None):
+        """Adjust the target for the current queue depth and return it"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._last_change is not None and now - self._last_change < self.hold:
+                return self.target
+            utilization = self.utilization()
+            if backlog > self.workers:
+                target, reason = self.target * self.increase, 'backlog'
+            elif utilization is None:
+                return self.target
+            elif utilization > self.high_utilization:
+                target, reason = self.target * self.increase, 'slow'
+            elif utilization < self.low_utilization and backlog == 0:
+                target, reason = self.target - self.decrease, 'fast'
+            else:
+                return self.target
+
+            target = round(min(max(target, self.min_length), self.max_length), 3)
+            if target != self.target:
+                self.decisions.append({
+                    'time': time.time(),
+                    'previous': self.target,
+                    'target': target,
+                    'reason': reason,
+                    'backlog': backlog,
+                    'round_trip': None if self.round_trip is None else round(self.round_trip, 3),
+                    'utilization': None if utilization is None else round(utilization, 3)
+                })
+                self.target = target
+                self._last_change = now
+            return self.target
+
+    def stats(self):
+        """Current target, the measurements behind it and the recent decisions"""
+        with self._lock:
+            utilization = self.utilization()
+            return {
+                'target': self.target,
+                'min_length': self.min_length,
+                'max_length': self.max_length,
+                'round_trip': None if self.round_trip is None else round(self.round_trip, 3),
+                'chunk_length': None if self.chunk_length is None else round(self.chunk_length, 3),
+                'utilization': None if utilization is None else round(utilization, 3),
+                'observations': self.observations,
+                'decisions': list(self.decisions)
+            }
@@ -5,15 +5,52 @@ AUDIO_CONFIG = {
     'sample_rate': 16000,        # Audio sample rate (Hz)
     'chunk_size': 1024,          # Audio chunk size for processing
     'channels': 1,               # Number of audio channels (1 = mono, 2 = stereo)
-    'format': 'paFloat32'        # Audio format (paFloat32, paInt16, etc.)
+    'format': 'paInt16',         # Microphone sample format (paInt16 or paFloat32); samples are stored as int16
+    'capture_queue_buffers': 256,  # Microphone buffers queued for the pipeline before new ones are dropped
+    'store_initial_seconds': 300.0,  # Audio preallocated when the store is created (seconds)
+    'store_growth_seconds': 300.0    # Minimum growth step of the audio store (seconds)
 }
 
 # Real-time Transcription Settings
 TRANSCRIPTION_CONFIG = {
-    'interval': 3.0,             # Transcription interval in seconds
+    'interval': 3.0,             # Preferred chunk length; chunks are cut at the first pause after it (seconds)
+    'adaptive_interval': True,   # Tune the preferred chunk length to backend latency and queue depth
+    'min_interval': 1.5,         # Shortest preferred chunk length when adapting (seconds)
+    'max_interval': 8.0,         # Longest preferred chunk length when adapting (seconds)
     'min_audio_length': 1.0,     # Minimum audio length to transcribe (seconds)
     'max_audio_length': 10.0,    # Maximum audio length per chunk (seconds)
-    'overlap': 0.5               # Overlap between chunks (seconds)
+    'overlap': 0.5,              # Overlap between chunks cut mid-speech (seconds)
+    'min_pause': 0.3,            # Silence that counts as a pause to cut at (seconds)
+    'backend': 'openai',         # Transcription backend ('openai' or 'local')
+    'codec': 'flac',             # Upload encoding ('wav', 'flac', 'ogg' or 'opus')
+    'workers': 3,                # Concurrent transcription requests
+    'max_pending': 8,            # Chunks in flight before scheduling blocks
+    'local_latency': 0.5         # Simulated latency of the 'local' backend (seconds)
+}
+
+# Audio Visualization Settings
+VISUALIZATION_CONFIG = {
+    'frame_rate': 15,            # Envelope frames sent to clients per second
+    'default_bins': 64,          # Envelope resolution for clients that don't choose one
+    'min_bins': 8,               # Smallest resolution a client may request
+    'max_bins': 512              # Largest resolution a client may request
+}
+
+# Interview Session Settings
+SESSION_CONFIG = {
+    'max_sessions': 8,           # Maximum concurrent interviews per server process
+    'idle_timeout': 3600,        # Evict sessions idle (and not recording) this long (seconds)
+    'default_session_id': 'default'  # Session used when a request doesn't name one
+}
+
+# Browser Audio Ingest Settings
+INGEST_CONFIG = {
+    'default_source': 'browser',     # Where the page captures audio ('browser' or 'microphone' on the server)
+    'frame_duration': 0.1,           # Audio per frame sent by the browser (seconds)
+    'max_buffered_frames': 50,       # Frames buffered per session before the client must pause
+    'max_transcription_backlog': 16, # Pending transcription chunks at which clients get no credit
+    'ack_interval': 5,               # Acknowledge every Nth frame (and whenever the credit changes)
+    'reorder_window': 8              # Frames held waiting for a late one before it counts as missing
 }
 
 # Speaker Diarization Settings
@@ -21,10 +58,14 @@ SPEAKER_CONFIG = {
     'enabled': True,             # Enable speaker diarization
     'speaker_count': 2,          # Expected number of speakers
     'speaker_labels': ['Interviewer', 'Candidate'],  # Speaker labels
-    'diarization_method': 'simple',  # 'simple' or 'advanced'
+    'diarization_method': 'advanced',  # 'simple' (alternate labels) or 'advanced' (MFCC clustering)
     'confidence_threshold': 0.7,  # Minimum confidence for speaker assignment
     'segment_min_duration': 0.5,  # Minimum segment duration (seconds)
-    'segment_max_duration': 30.0  # Maximum segment duration (seconds)
+    'segment_max_duration': 30.0,  # Maximum segment duration (seconds)
+    'similarity_threshold': 0.95,  # Cosine similarity below which a segment opens a new speaker
+    'max_analysis_seconds': 4.0,  # Audio analysed per segment (seconds)
+    'latency_budget': 0.3,        # Diarization time allowed per chunk (seconds)
+    'interruption_overlap': 0.1   # A speaker change starting this long before the previous segment ended is an interruption (seconds)
 }
 
 # OpenAI API Settings
@@ -35,6 +76,72 @@ OPENAI_CONFIG = {
     'temperature': 0.3                # Temperature for GPT response
 }
 
+# OpenAI Request Scheduling Settings
+SCHEDULER_CONFIG = {
+    'enabled': True,             # Send OpenAI requests through the shared scheduler
+    'limits': {                  # Account limits per model (None for no limit)
+        'whisper-1': {'requests_per_minute': 50, 'tokens_per_minute': None},
+        'gpt-4': {'requests_per_minute': 500, 'tokens_per_minute': 10000}
+    },
+    'max_attempts': 6,           # Attempts per request before giving up
+    'base_backoff': 0.5,         # First retry delay; doubles per attempt, with full jitter (seconds)
+    'max_backoff': 20.0,         # Longest retry delay (seconds)
+    'failure_threshold': 5,      # Consecutive failures that open the circuit breaker
+    'reset_timeout': 30.0,       # Time the circuit stays open before a probe request (seconds)
+    'max_wait': {                # Total time a request may wait and retry, by priority (seconds)
+        'final': 600.0,
+        'live': 300.0,
+        'background': 60.0
+    }
+}
+
+# Candidate Analysis Settings
+ANALYSIS_CONFIG = {
+    'rolling': True,             # Update the candidate profile during the interview
+    'min_batch_items': 4,        # Transcript segments needed before a background update
+    'interval': 20.0,            # Minimum time between background updates (seconds)
+    'final_timeout': 60.0,       # Wait for an in-flight update at stop (seconds)
+    'max_chunk_tokens': 5000,    # Transcript tokens per extraction prompt; longer transcripts are map-reduced
+    'map_workers': 4             # Transcript parts analysed concurrently
+}
+
+# Result Cache Settings
+CACHE_CONFIG = {
+    'enabled': True,                     # Reuse results for identical audio and transcripts
+    'directory': '.cache/results',       # On-disk store (None for memory only)
+    'memory_bytes': 32 * 1024 * 1024,    # In-memory LRU size
+    'disk_bytes': 512 * 1024 * 1024      # On-disk store size
+}
+
+# Transcript Storage Settings
+TRANSCRIPT_CONFIG = {
+    'persist': True,                     # Keep transcripts in SQLite across restarts
+    'database': 'data/transcripts.db',   # SQLite database file
+    'page_size': 50,                     # Default segments per page
+    'max_page_size': 500                 # Largest page a client may request
+}
+
+# Recording Storage Settings
+RECORDING_CONFIG = {
+    'enabled': True,                     # Stream each recording to disk while it is captured
+    'directory': 'data/recordings',      # One 16-bit WAV file per recording, in a subdirectory per session
+    'flush_interval': 2.0,               # Seconds of audio a crash can lose at most
+    'fsync': True,                       # Force each write to disk
+    'keep_per_session': 20               # Newest recordings kept per session (None keeps all)
+}
+
+# Batch Transcription Settings (batch.py)
+BATCH_CONFIG = {
+    'output_directory': 'data/batch',    # Results and checkpoints, one pair of files per recording
+    'extensions': ('.wav', '.flac', '.ogg', '.mp3'),  # Files picked up from the input directory
+    'chunk_length': 30.0,        # Preferred piece length; cut at the first pause after it (seconds)
+    'min_chunk_length': 5.0,     # Shortest piece cut at a pause (seconds)
+    'max_chunk_length': 60.0,    # Longest piece; longer speech is cut at its quietest point (seconds)
+    'workers': 4,                # Concurrent transcription requests
+    'max_pending': 16,           # Pieces in flight or awaiting ordered delivery
+    'session_prefix': 'batch:'   # Transcript database session ID is this plus the file's relative path
+}
+
 # Flask Settings
 FLASK_CONFIG = {
     'host': '0.0.0.0',
@@ -43,12 +150,27 @@ FLASK_CONFIG = {
     'secret_key': 'your-secret-key-here'
 }
 
+# Outbound Socket.IO Settings
+SOCKETIO_CONFIG = {
+    'coalesce_events': ['speaker_stats', 'candidate_profile', 'audio_ack'],  # Snapshots: a queued one is replaced by a newer one
+    'frame_events': ['audio_envelope'],  # Frames: only the newest is sent, and not to clients that are behind
+    'max_client_backlog': 2      # Packets waiting to be written to a client before it misses frames
+}
+
 # Audio Processing Settings
 PROCESSING_CONFIG = {
     'buffer_size': 48000,        # Audio buffer size (3 seconds at 16kHz)
     'silence_threshold': 0.01,   # Silence detection threshold
-    'noise_reduction': True,     # Enable noise reduction
-    'normalize_audio': True      # Normalize audio levels
+    'remove_dc': True,           # Subtract each chunk's DC offset before transcription
+    'highpass_cutoff': 80.0,     # Remove rumble below this frequency (Hz); None disables
+    'noise_reduction': True,     # Spectral-gate noise reduction
+    'noise_gate_db': 6.0,        # Bins less than this above the noise floor are gated (dB)
+    'noise_reduction_db': 12.0,  # Attenuation of gated bins (dB)
+    'normalize_audio': True,     # Normalize audio levels
+    'target_level_dbfs': -20.0,  # RMS level of speech after normalization (dBFS)
+    'max_gain_db': 20.0,         # Largest gain normalization applies (dB)
+    'resample_rate': None,       # Resample chunks before upload (Hz); None keeps the capture rate
+    'cpu_budget': 0.05           # Preprocessing time allowed per second of live audio (seconds); None for no limit
 }
 
 # Real-time Processing Settings
@@ -56,5 +178,11 @@ REALTIME_CONFIG = {
     'background_processing': True,    # Process transcription in background
     'show_live_updates': False,      # Don't show live transcript updates
     'store_intermediate_results': True,  # Store all transcription chunks
-    'final_processing_delay': 1.0    # Delay before final processing (seconds)
+    'final_drain_timeout': 30.0      # Time allowed to transcribe queued audio after stopping (seconds)
+}
+
+# Background Job Settings
+JOBS_CONFIG = {
+    'retention': 3600,           # Keep finished jobs for polling this long (seconds)
+    'max_finished': 100          # Maximum number of finished jobs kept
 }
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""
+Online speaker diarization of transcript segments on the CPU
+"""
+
+import threading
+import time
+
+import librosa
+import numpy as np
+
+
+class OnlineSpeakerDiarizer:
+    """Labels transcript segments by speaker with MFCC embeddings and online clustering.
+
+    Each segment is reduced to an embedding: the L2-normalized mean and
+    standard deviation of its MFCCs (without the energy coefficient) over
+    voiced frames. Embeddings are matched by cosine similarity against speaker
+    centroids that persist across chunks. A segment that matches no centroid by
+    `threshold` opens a new speaker while fewer than `max_speakers` exist;
+    otherwise it joins the closest one.
+
+    Segments shorter than `min_duration`, and segments left once a chunk has
+    used up `latency_budget` seconds, keep the previous speaker without
+    updating the centroids. At most `max_analysis_seconds` from the middle of a
+    segment are analysed, so the cost per chunk stays bounded.
+    """
+
+    def __init__(self, sample_rate, labels, max_speakers=2, threshold=0.95, min_duration=0.5,
+                 n_mfcc=20, n_mels=40, max_analysis_seconds=4.0, latency_budget=0.3, max_centroid_weight=50):
+        self.sample_rate = sample_rate
+        self.labels = list(labels)
+        self.max_speakers = max_speakers
+        self.threshold = threshold
+        self.min_duration = min_duration
+        self.n_mfcc = n_mfcc
+        self.n_mels = n_mels
+        self.max_analysis_samples = int(max_analysis_seconds * sample_rate)
+        self.latency_budget = latency_budget
+        self.max_centroid_weight = max_centroid_weight
+
+        # ~32 ms analysis windows with a 10 ms hop, whatever the sample rate
+        self.n_fft = 1 << int(np.ceil(np.log2(0.032 * sample_rate)))
+        self.hop_length = max(1, int(0.01 * sample_rate))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._centroids = []
+            self._weights = []
+            self._previous = None
+            self.segments = 0
+            self.fallbacks = 0
+            self.over_budget = 0
+            self.total_time = 0.0
+            self.max_chunk_time = 0.0
+
+    def label_for(self, speaker_index):
+        if speaker_index < len(self.labels):
+            return self.labels[speaker_index]
+        return f"Speaker {speaker_index + 1}"
+
+    def speaker_count(self):
+        with self._lock:
+            return len(self._centroids)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'speakers': len(self._centroids),
+                'segments': self.segments,
+                'fallbacks': self.fallbacks,
+                'over_budget': self.over_budget,
+                'avg_segment_ms': round(1000 * self.total_time / self.segments, 2) if self.segments else 0.0,
+                'max_chunk_ms': round(1000 * self.max_chunk_time, 2)
+            }
+
+    def warmup(self):
+        """Run the feature pipeline once; librosa's first call pays a few seconds of one-off setup"""
+        with self._lock:
+            self._embed(np.zeros(self.n_fft * 8, dtype=np.float32))
+
+    def assign(self, audio_store, segments):
+        """Return (speaker_label, confidence) for each segment.
+
+        Segment times are absolute seconds on the session clock and are read
+        from `audio_store`. Call with the segments of each chunk in order.
+        """
+        results = []
+        with self._lock:
+            started = time.perf_counter()
+            for segment in segments:
+                start = int(segment['start'] * self.sample_rate)
+                end = int(segment['end'] * self.sample_rate)
+                embedding = None
+                if (segment['end'] - segment['start'] >= self.min_duration
+                        and time.perf_counter() - started < self.latency_budget):
+                    embedding = self._embed(audio_store.view(start, end))
+                elif segment['end'] - segment['start'] >= self.min_duration:
+                    self.over_budget += 1
+
+                if embedding is None:
+                    speaker, confidence = self._fallback()
+                else:
+                    speaker, confidence = self._cluster(embedding)
+                    self._previous = speaker
+                results.append((self.label_for(speaker), confidence))
+
+            elapsed = time.perf_counter() - started
+            self.segments += len(segments)
+            self.total_time += elapsed
+            self.max_chunk_time = max(self.max_chunk_time, elapsed)
+        return results
+
+    def _fallback(self):
+        """Keep the previous speaker for segments too short (or too late) to embed"""
+        self.fallbacks += 1
+        if self._previous is None:
+            return 0, 0.0
+        return self._previous, 0.0
+
+    def _embed(self, audio):
+        if len(audio) > self.max_analysis_samples:
+            offset = (len(audio) - self.max_analysis_samples) // 2
+            audio = audio[offset:offset + self.max_analysis_samples]
+        if len(audio) < self.n_fft:
+            return None
+
+        audio = np.asarray(audio)
+        if audio.dtype == np.int16:
+            audio = audio.astype(np.float32) / 32768.0
+        else:
+            audio = audio.astype(np.float32, copy=False)
+
+        mfcc = librosa.feature.mfcc(y=audio, sr=self.sample_rate, n_mfcc=self.n_mfcc, n_mels=self.n_mels,
+                                    n_fft=self.n_fft, hop_length=self.hop_length)
+        # c0 is the mean log-mel energy scaled by sqrt(n_mels); keep frames within
+        # 30 dB of the loudest so pauses and breaths don't dilute the voice
+        energy = mfcc[0]
+        voiced = mfcc[1:, energy >= energy.max() - 30.0 * np.sqrt(self.n_mels)]
+        if voiced.shape[1] < 3:
+            return None
+
+        embedding = np.concatenate([voiced.mean(axis=1), voiced.std(axis=1)])
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm > 0 else None
+
+    def _cluster(self, embedding):
+        if not self._centroids:
+            self._centroids.append(embedding)
+            self._weights.append(1)
+            return 0, 1.0
+
+        similarities = np.array([centroid @ embedding for centroid in self._centroids])
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold and len(self._centroids) < self.max_speakers:
+            self._centroids.append(embedding)
+            self._weights.append(1)
+            confidence = (self.threshold - similarities[best]) / (1.0 - self.threshold)
+            return len(self._centroids) - 1, float(np.clip(confidence, 0.0, 1.0))
+
+        # Running mean with a capped weight so centroids can follow a drifting voice
+        weight = self._weights[best]
+        centroid = self._centroids[best] * weight + embedding
+        self._centroids[best] = centroid / np.linalg.norm(centroid)
+        self._weights[best] = min(weight + 1, self.max_centroid_weight)
+
+        # Confidence is the winning margin, in units of the new-speaker margin
+        if len(similarities) > 1:
+            runner_up = np.partition(similarities, -2)[-2]
+            confidence = (similarities[best] - runner_up) / (1.0 - self.threshold)
+        else:
+            confidence = (similarities[best] - self.threshold) / (1.0 - self.threshold)
+        return best, float(np.clip(confidence, 0.0, 1.0))
@@ -0,0 +1,135 @@
+"""
+Single outbound dispatcher for server-initiated Socket.IO events
+"""
+
+import collections
+import threading
+import time
+
+from metrics import SOCKETIO_DISPATCH_SECONDS, SOCKETIO_EVENTS_COALESCED, SOCKETIO_FRAMES_SKIPPED
+
+
+class EmitDispatcher:
+    """Sends server-initiated Socket.IO events from one background thread.
+
+    Processing threads call `submit`, which only queues the event, so
+    serializing payloads and fanning them out to many clients never holds up
+    capture or transcription. Events named in `coalesce` carry complete
+    snapshots: while one is still queued for a room, a newer one replaces its
+    payload instead of queueing behind it. Events named in `per_client` are
+    frames only worth showing while fresh; they are coalesced the same way and
+    skip clients that still have more than `max_client_backlog` packets waiting
+    to be written, so a slow client gets fewer frames instead of later ones.
+
+    `send(event, data, to, skip_sid)` emits an event, `participants(room)`
+    lists the client IDs in a room and `client_backlog(sid)` returns how many
+    packets are queued for a client.
+    """
+
+    def __init__(self, send, participants, client_backlog, coalesce=(), per_client=(), max_client_backlog=2):
+        self._send = send
+        self._participants = participants
+        self._client_backlog = client_backlog
+        self.coalesce = set(coalesce)
+        self.per_client = set(per_client)
+        self.max_client_backlog = max_client_backlog
+        self._queue = collections.deque()
+        self._pending = {}
+        self._condition = threading.Condition()
+        self._running = False
+        self._sending = False
+        self._thread = None
+        self.sent = 0
+        self.coalesced = 0
+        self.skipped = 0
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name='socketio-dispatcher')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """Send what is queued, then stop"""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def submit(self, event, data, to):
+        """Queue an event for the clients in room `to`; never blocks on the network"""
+        key = (event, to)
+        with self._condition:
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry[1] = data
+                self.coalesced += 1
+            else:
+                entry = [event, data, to, time.monotonic()]
+                if event in self.coalesce or event in self.per_client:
+                    self._pending[key] = entry
+                self._queue.append(entry)
+                self._condition.notify()
+                return
+        SOCKETIO_EVENTS_COALESCED.labels(event).inc()
+
+    def wait_idle(self, timeout=None):
+        """Wait until every queued event has been sent; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._queue or self._sending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._sending = False
+                self._condition.notify_all()
+                while not self._queue and self._running:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                entry = self._queue.popleft()
+                event, data, to, submitted = entry
+                if self._pending.get((event, to)) is entry:
+                    del self._pending[(event, to)]
+                self._sending = True
+
+            SOCKETIO_DISPATCH_SECONDS.labels(event).observe(time.monotonic() - submitted)
+            try:
+                if event in self.per_client:
+                    self._send_fresh(event, data, to)
+                else:
+                    self._send(event, data, to, None)
+                    self.sent += 1
+            except Exception as e:
+                print(f"Error emitting {event}: {e}")
+
+    def _send_fresh(self, event, data, to):
+        participants = list(self._participants(to))
+        lagging = [sid for sid in participants if self._client_backlog(sid) > self.max_client_backlog]
+        if lagging:
+            self.skipped += len(lagging)
+            SOCKETIO_FRAMES_SKIPPED.labels(event).inc(len(lagging))
+        if len(lagging) < len(participants):
+            self._send(event, data, to, lagging or None)
+            self.sent += 1
+
+    def stats(self):
+        with self._condition:
+            queued = len(self._queue)
+        return {
+            'queued': queued,
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'skipped_frames': self.skipped
+        }
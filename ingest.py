@@ -0,0 +1,157 @@
+"""
+Bounded ingest of audio frames streamed from the browser over Socket.IO
+"""
+
+import queue
+import threading
+
+import numpy as np
+
+from metrics import CAPTURE_FRAMES_DROPPED
+
+
+class AudioIngest:
+    """Server-side buffer between a browser audio source and the recording pipeline.
+
+    Frames are 16-bit little-endian mono PCM at the session sample rate, each
+    with a sequence number. Received frames wait in a bounded queue and are fed
+    to the pipeline by a consumer thread. The server acknowledges progress with
+    `{'seq': last consumed sequence, 'credit': frames the client may send beyond it}`.
+    Credit is the size of the queue, or zero while the transcription backlog is
+    at `max_backlog`, so a client that keeps within it never overflows the
+    queue and a slow backend makes clients pause instead of growing server memory.
+    Acks go out every `ack_interval` consumed frames, whenever the credit
+    changes, and when the stream goes idle with frames unacknowledged.
+
+    Socket.IO handles each event on its own thread, so frames can arrive out of
+    order. A frame that arrives ahead of a missing one is held until the gap
+    is filled; after `reorder_window` held frames the gap is counted as
+    missing and the held frames are queued in order.
+    """
+
+    def __init__(self, feed, backlog, send_ack, max_buffered_frames, max_backlog, ack_interval, reorder_window=8):
+        self._feed = feed
+        self._backlog = backlog
+        self._send_ack = send_ack
+        self.max_backlog = max_backlog
+        self.ack_interval = max(1, ack_interval)
+        self.max_buffered_frames = max_buffered_frames
+        self.reorder_window = max(0, reorder_window)
+        self._frames = queue.Queue(maxsize=max_buffered_frames)
+        # Frames that arrived ahead of a missing one, by sequence number
+        self._held = {}
+        self._lock = threading.Lock()
+
+        self.client_id = None
+        self.last_received = -1
+        self.last_consumed = -1
+        self.received = 0
+        self.duplicates = 0
+        self.missing = 0
+        self.rejected = 0
+        self._last_credit = None
+        self._unacked = 0
+
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def credit(self):
+        """Frames the client may have outstanding beyond the last acknowledged one"""
+        if self._backlog() >= self.max_backlog:
+            return 0
+        return self.max_buffered_frames
+
+    def stats(self):
+        return {
+            'received': self.received,
+            'duplicates': self.duplicates,
+            'missing': self.missing,
+            'rejected': self.rejected,
+            'held': len(self._held),
+            'buffered': self._frames.qsize(),
+            'last_consumed': self.last_consumed
+        }
+
+    def receive(self, sequence, payload):
+        """Accept one frame; returns False if a frame was rejected because the buffer is full"""
+        with self._lock:
+            if sequence <= self.last_received or sequence in self._held:
+                self.duplicates += 1
+                return True
+            self._held[sequence] = payload
+            if sequence > self.last_received + 1 and len(self._held) <= self.reorder_window:
+                return True
+            accepted = self._release(skip_gap=len(self._held) > self.reorder_window)
+        if not accepted:
+            self.ack()
+        return accepted
+
+    def _release(self, skip_gap=False):
+        """Queue held frames that are next in order; returns False if any was rejected.
+
+        With `skip_gap`, the frames missing before the first held one are
+        given up on. Later gaps may still be filled.
+        """
+        accepted = True
+        while self._held:
+            sequence = self.last_received + 1
+            if sequence not in self._held:
+                if not skip_gap:
+                    break
+                sequence = min(self._held)
+                self.missing += sequence - self.last_received - 1
+                CAPTURE_FRAMES_DROPPED.labels('browser', 'missing').inc(sequence - self.last_received - 1)
+            skip_gap = False
+            payload = self._held.pop(sequence)
+            self.last_received = sequence
+            try:
+                self._frames.put_nowait((sequence, payload))
+            except queue.Full:
+                # Only a client ignoring its credit gets here; the frame is lost
+                self.rejected += 1
+                CAPTURE_FRAMES_DROPPED.labels('browser', 'rejected').inc()
+                accepted = False
+                continue
+            self.received += 1
+        return accepted
+
+    def ack(self):
+        credit = self.credit()
+        self._last_credit = credit
+        self._unacked = 0
+        self._send_ack({'seq': self.last_consumed, 'credit': credit})
+
+    def close(self, timeout=5):
+        """Feed every buffered and held frame to the pipeline, then stop the consumer thread"""
+        with self._lock:
+            while self._held:
+                self._release(skip_gap=True)
+        self._frames.put(None)
+        self._thread.join(timeout=timeout)
+
+    def _run(self):
+        while True:
+            try:
+                item = self._frames.get(timeout=0.25)
+            except queue.Empty:
+                # Tell a paused client as soon as the backlog has cleared, and settle the last frames
+                if self._unacked or (self._last_credit == 0 and self.credit() > 0):
+                    self.ack()
+                continue
+            if item is None:
+                break
+
+            sequence, payload = item
+            try:
+                self._feed(np.frombuffer(payload, dtype='<i2'))
+            except Exception as e:
+                print(f"Error ingesting audio frame {sequence}: {e}")
+            self.last_consumed = sequence
+            self._unacked += 1
+
+            if self._unacked >= self.ack_interval or self.credit() != self._last_credit:
+                try:
+                    self.ack()
+                except Exception as e:
+                    print(f"Error sending audio ack: {e}")
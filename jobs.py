@@ -0,0 +1,123 @@
+"""
+Background jobs with progress reporting
+"""
+
+import threading
+import time
+import uuid
+
+
+class Job:
+    """A unit of background work; progress and results are read with `to_dict`"""
+
+    def __init__(self, job_id, session_id, on_update=None):
+        self.job_id = job_id
+        self.session_id = session_id
+        self.status = 'pending'
+        self.stage = None
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._on_update = on_update
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def update(self, stage, **progress):
+        """Record the current stage of the job and notify listeners"""
+        with self._lock:
+            self.status = 'running'
+            self.stage = stage
+            self.progress = progress
+        self._notify()
+
+    def _finish(self, status, result=None, error=None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+        self._notify()
+
+    def _notify(self):
+        if self._on_update:
+            try:
+                self._on_update(self.to_dict())
+            except Exception as e:
+                print(f"Error sending job update: {e}")
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'job_id': self.job_id,
+                'session_id': self.session_id,
+                'status': self.status,
+                'stage': self.stage,
+                'progress': dict(self.progress),
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at,
+                'finished_at': self.finished_at
+            }
+
+
+class JobManager:
+    """Runs jobs on background threads and keeps their state for polling.
+
+    `submit(work, session_id)` starts `work(job)` on its own thread; its return
+    value becomes the job result and an exception marks the job failed.
+    Finished jobs are kept for `retention` seconds, and at most `max_finished`
+    of them are kept at all.
+    """
+
+    def __init__(self, retention, max_finished):
+        self.retention = retention
+        self.max_finished = max_finished
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, work, session_id=None, on_update=None):
+        self._expire()
+        job = Job(uuid.uuid4().hex, session_id, on_update)
+        with self._lock:
+            self._jobs[job.job_id] = job
+
+        def run():
+            try:
+                job._finish('done', result=work(job))
+            except Exception as e:
+                print(f"Error in job {job.job_id}: {e}")
+                job._finish('failed', error=str(e))
+
+        thread = threading.Thread(target=run, name=f"job-{job.job_id[:8]}")
+        thread.daemon = True
+        thread.start()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active_for_session(self, session_id):
+        """Return the unfinished job for a session, or None"""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.session_id == session_id and not job.finished:
+                    return job
+        return None
+
+    def _expire(self):
+        now = time.time()
+        with self._lock:
+            finished = sorted(
+                (job for job in self._jobs.values() if job.finished),
+                key=lambda job: job.finished_at
+            )
+            excess = len(finished) - self.max_finished
+            for index, job in enumerate(finished):
+                if index < excess or now - job.finished_at > self.retention:
+                    del self._jobs[job.job_id]
@@ -0,0 +1,78 @@
+"""
+Incremental parsing of a JSON object as it is streamed
+"""
+
+import json
+
+
+class JSONObjectStream:
+    """Yields the top-level members of a streamed JSON object as each one completes.
+
+    Text is fed in arbitrary pieces. A member is complete once the comma or
+    closing brace after it arrives; nested objects and arrays are returned
+    whole. Anything before the opening brace (such as a Markdown code fence)
+    and after the closing one is ignored. Members that do not parse are
+    skipped, leaving the caller's final `json.loads` of the whole text to
+    report the error.
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self.started = False
+        self.finished = False
+        self._member = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text):
+        """Consume more text and return [(key, value)] for the members it completed"""
+        completed = []
+        member = self._member
+        for char in text:
+            if self.finished:
+                break
+            if not self.started:
+                if char == '{':
+                    self.started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                member.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self.finished = True
+                    self._complete(completed)
+                    continue
+            elif char == ',' and self._depth == 1:
+                self._complete(completed)
+                continue
+            member.append(char)
+        return completed
+
+    def _complete(self, completed):
+        text = ''.join(self._member).strip()
+        self._member.clear()
+        if not text:
+            return
+        try:
+            parsed = json.loads('{' + text + '}')
+        except ValueError:
+            return
+        for key, value in parsed.items():
+            self.fields[key] = value
+            completed.append((key, value))
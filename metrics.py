@@ -0,0 +1,264 @@
+"""
+Minimal Prometheus-style metrics registry and the application's metrics
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Holds metrics and renders them in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                print(f"Error collecting metric {metric.name}: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values, **kwargs):
+        """Return the child for one combination of label values; keep it to skip the lookup"""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels() if not self.labelnames else None
+
+    def samples(self):
+        with self._lock:
+            children = list(self._children.items())
+        result = []
+        for key, child in children:
+            result.extend(child.samples(self.name, _format_labels(self.labelnames, key), self.labelnames, key))
+        return result
+
+
+class _CounterChild:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def samples(self, name, labels, labelnames, key):
+        return [(name, labels, self._value)]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+
+class _GaugeChild(_CounterChild):
+    def set(self, value):
+        self._value = value
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+
+class Gauge(_Metric):
+    """A value that goes up and down; with `callback`, read at scrape time instead.
+
+    The callback returns a number, or a dict mapping label-value tuples to numbers.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY, callback=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self._callback = callback
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._default().set(value)
+
+    def samples(self):
+        if self._callback is None:
+            return super().samples()
+        values = self._callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in values.items()]
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def samples(self, name, labels, labelnames, key):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        result = []
+        cumulative = 0
+        for bound, count in zip(self._buckets + (float('inf'),), counts):
+            cumulative += count
+            bucket_labels = _format_labels(labelnames, key, ('le', _format_value(float(bound))))
+            result.append((f"{name}_bucket", bucket_labels, cumulative))
+        result.append((f"{name}_sum", labels, total))
+        result.append((f"{name}_count", labels, cumulative))
+        return result
+
+
+class Histogram(_Metric):
+    """Distribution of observations in fixed buckets; observing is one bisect and one locked add"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+# Transcription pipeline
+TRANSCRIPTION_ENCODE_SECONDS = Histogram(
+    'transcription_encode_seconds', 'Time to encode a chunk for upload', ['codec'])
+TRANSCRIPTION_UPLOAD_BYTES = Histogram(
+    'transcription_upload_bytes', 'Size of encoded chunks sent for transcription', ['codec'], buckets=BYTES_BUCKETS)
+TRANSCRIPTION_REQUEST_SECONDS = Histogram(
+    'transcription_request_seconds', 'Time to transcribe a chunk, scheduling and retries included', ['backend'])
+TRANSCRIPTION_API_SECONDS = Histogram(
+    'transcription_api_seconds', 'Server-side processing time reported by the transcription API', ['backend'])
+TRANSCRIPTION_UPLOAD_SECONDS = Histogram(
+    'transcription_upload_seconds', 'Request round trip minus server processing (upload and network)', ['backend'])
+TRANSCRIPTION_ERRORS = Counter(
+    'transcription_errors_total', 'Chunks whose transcription failed')
+TRANSCRIPTION_CHUNKS_DROPPED = Counter(
+    'transcription_chunks_dropped_total', 'Chunks dropped because finalization ran out of time')
+PREPROCESS_STAGE_SECONDS = Histogram(
+    'preprocess_stage_seconds', 'Time spent in each audio preprocessing stage per chunk', ['stage'])
+PREPROCESS_STAGES_SKIPPED = Counter(
+    'preprocess_stages_skipped_total', 'Preprocessing stages skipped to keep a chunk within its CPU budget', ['stage'])
+PREPROCESS_OVER_BUDGET = Counter(
+    'preprocess_over_budget_total', 'Chunks whose preprocessing took longer than their CPU budget')
+
+# OpenAI scheduling
+OPENAI_QUEUE_SECONDS = Histogram(
+    'openai_queue_seconds', 'Time requests waited for rate limits, the circuit breaker and their turn', ['model', 'priority'])
+OPENAI_RETRIES = Counter(
+    'openai_retries_total', 'Transient OpenAI failures (rate limits and outages), by reason', ['model', 'reason'])
+OPENAI_FAILURES = Counter(
+    'openai_failures_total', 'OpenAI requests that failed for good', ['model'])
+
+# Capture
+CAPTURE_FRAMES_DROPPED = Counter(
+    'capture_frames_dropped_total', 'Captured audio frames lost before reaching the pipeline', ['source', 'reason'])
+CAPTURE_OVERFLOWS = Counter(
+    'capture_overflows_total', 'Capture buffers the audio device flagged as overflowed', ['source'])
+
+# Socket.IO
+SOCKETIO_EMITS = Counter(
+    'socketio_emits_total', 'Socket.IO events emitted', ['event'])
+SOCKETIO_EMIT_BYTES = Counter(
+    'socketio_emit_bytes_total', 'Encoded bytes of Socket.IO events sent, counted once per emit', ['event'])
+SOCKETIO_DISPATCH_SECONDS = Histogram(
+    'socketio_dispatch_seconds', 'Time events waited in the outbound dispatcher queue', ['event'])
+SOCKETIO_EVENTS_COALESCED = Counter(
+    'socketio_events_coalesced_total', 'Events replaced by a newer one before they were sent', ['event'])
+SOCKETIO_FRAMES_SKIPPED = Counter(
+    'socketio_frames_skipped_total', 'Frames not sent to a client because it was behind', ['event'])
+
+# GPT
+GPT_REQUEST_SECONDS = Histogram(
+    'gpt_request_seconds', 'Latency of GPT chat completion requests', ['model'])
+GPT_FIRST_FIELD_SECONDS = Histogram(
+    'gpt_first_field_seconds', 'Time from sending a streamed GPT request to its first complete field', ['model'])
+GPT_TOKENS = Counter(
+    'gpt_tokens_total', 'GPT tokens used', ['model', 'type'])
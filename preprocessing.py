@@ -0,0 +1,242 @@
+"""
+Vectorized audio preprocessing of chunks before transcription
+"""
+
+import threading
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from metrics import PREPROCESS_STAGE_SECONDS, PREPROCESS_STAGES_SKIPPED, PREPROCESS_OVER_BUDGET
+
+
+def _fft_length(length):
+    """Next power of two, which transforms fast"""
+    return 1 << max(0, int(length - 1).bit_length())
+
+
+class DCRemoval:
+    """Subtracts the chunk's mean"""
+
+    name = 'dc_removal'
+
+    def __call__(self, audio, sample_rate):
+        return audio - np.float32(audio.mean(dtype=np.float64)), sample_rate
+
+
+class HighPassFilter:
+    """Removes rumble below `cutoff` Hz with a raised-cosine roll-off from `cutoff / 2`, applied in the frequency domain"""
+
+    name = 'highpass'
+
+    def __init__(self, cutoff=80.0):
+        self.cutoff = cutoff
+
+    def __call__(self, audio, sample_rate):
+        # Pad by several periods of the cutoff so the filtered end does not wrap around onto the start
+        length = _fft_length(len(audio) + int(4 * sample_rate / self.cutoff))
+        frequencies = np.fft.rfftfreq(length, 1.0 / sample_rate)
+        ramp = np.clip((frequencies - self.cutoff / 2) / (self.cutoff / 2), 0.0, 1.0)
+        gain = 0.5 - 0.5 * np.cos(np.pi * ramp)
+        filtered = np.fft.irfft(np.fft.rfft(audio, length) * gain, length)[:len(audio)]
+        return filtered.astype(np.float32), sample_rate
+
+
+class SpectralGate:
+    """Attenuates time-frequency bins that do not rise `threshold_db` above the noise floor.
+
+    The noise floor of each frequency is the `noise_percentile` of its
+    magnitude over the chunk's frames, so the pauses a chunk contains set it.
+    Gated bins are lowered by `reduction_db`, and the gain is averaged over
+    three frames to avoid warbling. Frames are Hann-windowed at 50% overlap,
+    which sums to one, so overlap-add restores ungated audio exactly.
+    """
+
+    name = 'spectral_gate'
+
+    def __init__(self, threshold_db=6.0, reduction_db=12.0, frame_length=512, noise_percentile=10):
+        self.threshold = 10 ** (threshold_db / 20)
+        self.floor = 10 ** (-reduction_db / 20)
+        self.frame_length = frame_length
+        self.noise_percentile = noise_percentile
+        self._window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frame_length) / frame_length)).astype(np.float32)
+
+    def __call__(self, audio, sample_rate):
+        frame = self.frame_length
+        hop = frame // 2
+        if len(audio) < 4 * frame:
+            return audio, sample_rate
+        padded = np.pad(audio, (hop, hop + (-len(audio)) % hop))
+        frames = sliding_window_view(padded, frame)[::hop] * self._window
+        spectrum = np.fft.rfft(frames, axis=1)
+        magnitude = np.abs(spectrum)
+
+        noise = np.percentile(magnitude, self.noise_percentile, axis=0)
+        gain = np.where(magnitude > noise * self.threshold, 1.0, self.floor).astype(np.float32)
+        gain[1:-1] = (gain[:-2] + gain[1:-1] + gain[2:]) / 3
+        frames = np.fft.irfft(spectrum * gain, frame, axis=1)
+
+        count = len(frames)
+        output = np.zeros((count + 1) * hop, dtype=np.float32)
+        output[:count * hop].reshape(count, hop)[...] += frames[:, :hop]
+        output[hop:].reshape(count, hop)[...] += frames[:, hop:]
+        return output[hop:hop + len(audio)], sample_rate
+
+
+class LoudnessNormalizer:
+    """Scales the chunk so its speech reaches `target_dbfs` RMS.
+
+    Loudness is measured over 20 ms frames louder than `silence_threshold`, so
+    pauses do not pull it down. Gain is limited to `max_gain_db` and to what
+    keeps peaks below `peak_limit`.
+    """
+
+    name = 'normalize'
+
+    def __init__(self, target_dbfs=-20.0, max_gain_db=20.0, silence_threshold=0.01, peak_limit=0.99):
+        self.target = 10 ** (target_dbfs / 20)
+        self.max_gain = 10 ** (max_gain_db / 20)
+        self.silence_threshold = silence_threshold
+        self.peak_limit = peak_limit
+
+    def __call__(self, audio, sample_rate):
+        frame = max(1, int(0.02 * sample_rate))
+        count = len(audio) // frame
+        if count == 0:
+            return audio, sample_rate
+        power = np.mean(np.square(audio[:count * frame].reshape(count, frame)), axis=1)
+        active = power > self.silence_threshold ** 2
+        if not active.any():
+            return audio, sample_rate
+        gain = min(self.max_gain, self.target / np.sqrt(power[active].mean()))
+        peak = float(np.abs(audio).max())
+        if peak * gain > self.peak_limit:
+            gain = self.peak_limit / peak
+        return audio * np.float32(gain), sample_rate
+
+
+class Resampler:
+    """Resamples to `target_rate` by truncating or zero-padding the spectrum"""
+
+    name = 'resample'
+
+    def __init__(self, target_rate):
+        self.target_rate = target_rate
+
+    def __call__(self, audio, sample_rate):
+        if sample_rate == self.target_rate or len(audio) == 0:
+            return audio, sample_rate
+        output_length = int(round(len(audio) * self.target_rate / sample_rate))
+        spectrum = np.fft.rfft(audio)
+        resized = np.zeros(output_length // 2 + 1, dtype=spectrum.dtype)
+        kept = min(len(resized), len(spectrum))
+        resized[:kept] = spectrum[:kept]
+        resampled = np.fft.irfft(resized, output_length) * (output_length / len(audio))
+        return resampled.astype(np.float32), self.target_rate
+
+
+class AudioPreprocessor:
+    """Runs preprocessing stages over each chunk within a CPU budget.
+
+    Chunks are downmixed to mono float32, passed through `stages` in order and
+    returned as int16 with their (possibly new) sample rate. Every stage is
+    timed, and its cost per second of audio is smoothed with an exponential
+    moving average. With `budget` set, a chunk may spend at most `budget`
+    seconds per second of audio in preprocessing: a stage whose expected cost
+    would overrun what is left is skipped, and its estimate decays on each
+    skip so it is tried again once load eases.
+    """
+
+    def __init__(self, stages, budget=None, smoothing=0.2):
+        self.stages = list(stages)
+        self.budget = budget
+        self.smoothing = smoothing
+        self.chunks = 0
+        self.over_budget = 0
+        self._cost = {}
+        self._seconds = {stage.name: 0.0 for stage in self.stages}
+        self._skipped = {stage.name: 0 for stage in self.stages}
+        self._lock = threading.Lock()
+
+    def process(self, audio, sample_rate):
+        started = time.perf_counter()
+        audio = np.asarray(audio)
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        if audio.dtype == np.int16:
+            samples = audio.astype(np.float32) / 32768.0
+        else:
+            samples = audio.astype(np.float32)
+        seconds = len(samples) / sample_rate
+        budget = None if self.budget is None else self.budget * seconds
+
+        for stage in self.stages:
+            if budget is not None:
+                with self._lock:
+                    cost = self._cost.get(stage.name)
+                    if cost is not None and time.perf_counter() - started + cost * seconds > budget:
+                        self._cost[stage.name] = cost * (1 - self.smoothing)
+                        self._skipped[stage.name] += 1
+                        skip = True
+                    else:
+                        skip = False
+                if skip:
+                    PREPROCESS_STAGES_SKIPPED.labels(stage.name).inc()
+                    continue
+            stage_started = time.perf_counter()
+            samples, sample_rate = stage(samples, sample_rate)
+            elapsed = time.perf_counter() - stage_started
+            PREPROCESS_STAGE_SECONDS.labels(stage.name).observe(elapsed)
+            if seconds > 0:
+                with self._lock:
+                    cost = self._cost.get(stage.name)
+                    per_second = elapsed / seconds
+                    self._cost[stage.name] = per_second if cost is None else cost + self.smoothing * (per_second - cost)
+                    self._seconds[stage.name] += elapsed
+
+        output = np.clip(samples * 32767, -32768, 32767).astype(np.int16)
+        with self._lock:
+            self.chunks += 1
+            if budget is not None and time.perf_counter() - started > budget:
+                self.over_budget += 1
+                over_budget = True
+            else:
+                over_budget = False
+        if over_budget:
+            PREPROCESS_OVER_BUDGET.inc()
+        return output, sample_rate
+
+    def stats(self):
+        """Chunks processed, and per stage the smoothed cost (ms per second of audio), total time and skips"""
+        with self._lock:
+            return {
+                'chunks': self.chunks,
+                'over_budget': self.over_budget,
+                'stages': {
+                    stage.name: {
+                        'ms_per_audio_second': None if stage.name not in self._cost
+                        else round(self._cost[stage.name] * 1000, 3),
+                        'total_seconds': round(self._seconds[stage.name], 3),
+                        'skipped': self._skipped[stage.name]
+                    }
+                    for stage in self.stages
+                }
+            }
+
+
+def build_preprocessor(config, budget=None):
+    """The stages `config` (PROCESSING_CONFIG) enables, or None if there are none"""
+    stages = []
+    if config['remove_dc']:
+        stages.append(DCRemoval())
+    if config['highpass_cutoff']:
+        stages.append(HighPassFilter(config['highpass_cutoff']))
+    if config['noise_reduction']:
+        stages.append(SpectralGate(config['noise_gate_db'], config['noise_reduction_db']))
+    if config['normalize_audio']:
+        stages.append(LoudnessNormalizer(config['target_level_dbfs'], config['max_gain_db'],
+                                         config['silence_threshold']))
+    if config['resample_rate']:
+        stages.append(Resampler(config['resample_rate']))
+    return AudioPreprocessor(stages, budget) if stages else None
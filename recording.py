@@ -0,0 +1,178 @@
+"""
+Recordings streamed to disk while they are captured
+"""
+
+import os
+import re
+import struct
+import threading
+import time
+
+WAV_HEADER_BYTES = 44
+
+
+def _wav_header(sample_rate, channels, data_bytes):
+    """Canonical 44-byte header of a 16-bit PCM WAV file holding `data_bytes` of samples"""
+    block_align = channels * 2
+    return (b'RIFF' + struct.pack('<I', 36 + data_bytes) + b'WAVE'
+            + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, sample_rate, sample_rate * block_align, block_align, 16)
+            + b'data' + struct.pack('<I', data_bytes))
+
+
+def repair_wav(path):
+    """Make the header of a WAV file written by RecordingWriter cover all the samples on disk.
+
+    A crash between writing samples and updating the header leaves the header
+    short by at most one flush; returns True if it had to be fixed.
+    """
+    with open(path, 'r+b') as wav:
+        header = wav.read(WAV_HEADER_BYTES)
+        if len(header) < WAV_HEADER_BYTES or header[:4] != b'RIFF' or header[36:40] != b'data':
+            return False
+        channels, = struct.unpack('<H', header[22:24])
+        data_bytes = os.fstat(wav.fileno()).st_size - WAV_HEADER_BYTES
+        data_bytes -= data_bytes % (channels * 2)
+        if struct.unpack('<I', header[40:44])[0] == data_bytes:
+            return False
+        wav.seek(4)
+        wav.write(struct.pack('<I', 36 + data_bytes))
+        wav.seek(40)
+        wav.write(struct.pack('<I', data_bytes))
+    return True
+
+
+def session_directory(directory, session_id):
+    return os.path.join(directory, re.sub(r'[^A-Za-z0-9_.-]', '_', session_id))
+
+
+def recording_path(directory, session_id, recording_id):
+    return os.path.join(session_directory(directory, session_id), recording_id + '.wav')
+
+
+def list_recordings(directory, session_id):
+    """Audio files kept for a session, newest first, keyed by recording ID"""
+    folder = session_directory(directory, session_id)
+    try:
+        names = os.listdir(folder)
+    except FileNotFoundError:
+        return {}
+    recordings = {}
+    for name in names:
+        recording_id, extension = os.path.splitext(name)
+        if extension != '.wav':
+            continue
+        path = os.path.join(folder, name)
+        stat = os.stat(path)
+        recordings[recording_id] = {'path': path, 'bytes': stat.st_size, 'modified': stat.st_mtime}
+    return dict(sorted(recordings.items(), key=lambda item: item[1]['modified'], reverse=True))
+
+
+def prune_recordings(directory, session_id, keep):
+    """Delete all but the `keep` newest recordings of a session; returns the deleted paths"""
+    if keep is None:
+        return []
+    deleted = []
+    for recording in list(list_recordings(directory, session_id).values())[keep:]:
+        try:
+            os.remove(recording['path'])
+            deleted.append(recording['path'])
+        except OSError as e:
+            print(f"Error deleting recording {recording['path']}: {e}")
+    return deleted
+
+
+def recover_recordings(directory):
+    """Fix the headers of WAV recordings cut short by a crash; returns the repaired paths"""
+    repaired = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.endswith('.wav'):
+                path = os.path.join(root, name)
+                try:
+                    if repair_wav(path):
+                        repaired.append(path)
+                except OSError as e:
+                    print(f"Error repairing recording {path}: {e}")
+    return repaired
+
+
+class RecordingWriter:
+    """Streams one recording from an AudioStore to a 16-bit PCM WAV file while it is captured.
+
+    Every `flush_interval` seconds a background thread appends the samples
+    stored since its previous pass and rewrites the sizes in the header, so
+    capture never waits on the disk, stopping only writes the last few
+    seconds, and the file is always a valid WAV holding all but the newest
+    samples. With `fsync`, each pass is forced to disk.
+    """
+
+    def __init__(self, store, path, flush_interval=2.0, fsync=True):
+        self.store = store
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.written = 0
+        self.flushes = 0
+        self.max_flush_seconds = 0.0
+        self._file = None
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._file = open(self.path, 'wb')
+        self._file.write(_wav_header(self.store.sample_rate, self.store.channels, 0))
+        self._file.flush()
+        self._thread = threading.Thread(target=self._run, name='recording-writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error writing recording {self.path}: {e}")
+
+    def flush(self):
+        """Write the samples stored since the last flush and bring the header up to date"""
+        with self._lock:
+            end = len(self.store)
+            if self._file is None or end <= self.written:
+                return
+            started = time.perf_counter()
+            self._file.write(self.store.view(self.written, end).astype('<i2', copy=False).tobytes())
+            data_bytes = end * self.store.channels * 2
+            self._file.seek(4)
+            self._file.write(struct.pack('<I', 36 + data_bytes))
+            self._file.seek(40)
+            self._file.write(struct.pack('<I', data_bytes))
+            self._file.seek(0, os.SEEK_END)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.written = end
+            self.flushes += 1
+            self.max_flush_seconds = max(self.max_flush_seconds, time.perf_counter() - started)
+
+    def close(self):
+        """Write the rest of the recording and close the file; returns `stats()`"""
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        return self.stats()
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'seconds': round(self.written / self.store.sample_rate, 3),
+            'flushes': self.flushes,
+            'max_flush_ms': round(self.max_flush_seconds * 1000, 3)
+        }
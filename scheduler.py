@@ -0,0 +1,308 @@
+"""
+Client-side scheduling of OpenAI requests: rate limits, retries, circuit breaking and priorities
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+
+import openai
+
+from metrics import OPENAI_QUEUE_SECONDS, OPENAI_RETRIES, OPENAI_FAILURES
+
+# Lower values are sent first
+PRIORITY_FINAL = 0        # work a finalizing job is waiting on
+PRIORITY_LIVE = 1         # live transcription chunks
+PRIORITY_BACKGROUND = 2   # rolling candidate analysis
+
+PRIORITY_NAMES = {PRIORITY_FINAL: 'final', PRIORITY_LIVE: 'live', PRIORITY_BACKGROUND: 'background'}
+
+
+class SchedulingError(Exception):
+    """Raised when a request could not be sent before its deadline"""
+
+
+class TokenBucket:
+    """Allows `per_minute` units a minute, with bursts of up to a minute's worth"""
+
+    def __init__(self, per_minute, now):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = now
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` units are available; larger requests wait for a full bucket"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.tokens -= amount
+
+    def available(self, now):
+        self._refill(now)
+        return self.tokens
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures.
+
+    While open, requests wait; after `reset_timeout` seconds a single probe is
+    let through, and its outcome closes the circuit or opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def wait_time(self, now):
+        """Seconds until a request may be sent, or None to wait for the probe in flight"""
+        if self.state == 'open':
+            remaining = self._opened_at + self.reset_timeout - now
+            if remaining > 0:
+                return remaining
+            self.state = 'half_open'
+        if self.state == 'half_open' and self._probing:
+            return None
+        return 0.0
+
+    def dispatched(self):
+        if self.state == 'half_open':
+            self._probing = True
+
+    def release(self):
+        """Let another probe through after one that said nothing about the API"""
+        self._probing = False
+
+    def record_success(self):
+        self.state = 'closed'
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self, now):
+        self.failures += 1
+        self._probing = False
+        if self.state == 'half_open' or self.failures >= self.failure_threshold:
+            self.state = 'open'
+            self._opened_at = now
+
+
+class _Lane:
+    """Limits, circuit breaker and priority queue of one model"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute, breaker, now):
+        self.requests = TokenBucket(requests_per_minute, now) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, now) if tokens_per_minute else None
+        self.breaker = breaker
+        self.paused_until = 0.0
+        self.waiting = []
+        self.condition = threading.Condition()
+
+    def wait_time(self, entry, tokens, now):
+        """Seconds until `entry` may be sent, or None to wait for a notification"""
+        if self.waiting[0] != entry:
+            return None
+        breaker_wait = self.breaker.wait_time(now)
+        if breaker_wait is None:
+            return None
+        wait = max(breaker_wait, self.paused_until - now)
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+
+class OpenAIScheduler:
+    """Sends OpenAI requests within the account's rate limits, in priority order.
+
+    Each model has its own requests-per-minute and tokens-per-minute buckets
+    (`limits` maps model names to 'requests_per_minute' and 'tokens_per_minute',
+    None for no limit) and its own circuit breaker. Callers block in `call`
+    until their request is first in line among those waiting for the model and
+    the buckets allow it. Rate-limit responses pause the whole model for their
+    Retry-After time; transient failures are retried with jittered exponential
+    backoff, keeping the request's place in line. Requests give up once they
+    have waited `max_wait[priority]` seconds in total (None waits forever).
+    """
+
+    def __init__(self, limits=None, max_attempts=6, base_backoff=0.5, max_backoff=20.0,
+                 failure_threshold=5, reset_timeout=30.0, max_wait=None):
+        self.limits = limits or {}
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_wait = max_wait or {}
+        self._lanes = {}
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def _lane(self, model):
+        lane = self._lanes.get(model)
+        if lane is None:
+            with self._lock:
+                lane = self._lanes.get(model)
+                if lane is None:
+                    limits = self.limits.get(model, {})
+                    lane = self._lanes[model] = _Lane(
+                        limits.get('requests_per_minute'),
+                        limits.get('tokens_per_minute'),
+                        CircuitBreaker(self.failure_threshold, self.reset_timeout),
+                        time.monotonic()
+                    )
+        return lane
+
+    def call(self, model, request, priority=PRIORITY_LIVE, tokens=0):
+        """Run `request()` against `model` when the limits allow it and return its result.
+
+        `tokens` is the request's cost against the tokens-per-minute limit.
+        Raises SchedulingError if the request could not be sent in time, or
+        the last error once retries are exhausted.
+        """
+        lane = self._lane(model)
+        max_wait = self.max_wait.get(PRIORITY_NAMES.get(priority))
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        entry = (priority, next(self._sequence))
+
+        attempt = 0
+        while True:
+            attempt += 1
+            self._acquire(lane, model, entry, tokens, deadline)
+            try:
+                result = request()
+            except Exception as e:
+                retry_after = self._handle_error(lane, model, e)
+                if retry_after is None or attempt >= self.max_attempts:
+                    OPENAI_FAILURES.labels(model).inc()
+                    raise
+                backoff = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1)))
+                delay = max(retry_after, backoff)
+                if deadline is not None and time.monotonic() + delay > deadline:
+                    OPENAI_FAILURES.labels(model).inc()
+                    raise
+                print(f"Retrying {model} request in {delay:.1f}s (attempt {attempt}): {e}")
+                time.sleep(delay)
+                continue
+
+            with lane.condition:
+                lane.breaker.record_success()
+                lane.condition.notify_all()
+            return result
+
+    def _acquire(self, lane, model, entry, tokens, deadline):
+        """Wait until `entry` is first in line and the limits allow it, then take its share"""
+        started = time.monotonic()
+        with lane.condition:
+            heapq.heappush(lane.waiting, entry)
+            lane.condition.notify_all()
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = lane.wait_time(entry, tokens, now)
+                    if wait == 0:
+                        break
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise SchedulingError(
+                                f"{model} request not sent within its deadline (circuit {lane.breaker.state})")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    lane.condition.wait(wait)
+
+                heapq.heappop(lane.waiting)
+                if lane.requests is not None:
+                    lane.requests.take(1, now)
+                if lane.tokens is not None and tokens:
+                    lane.tokens.take(tokens, now)
+                lane.breaker.dispatched()
+            finally:
+                if entry in lane.waiting:
+                    lane.waiting.remove(entry)
+                    heapq.heapify(lane.waiting)
+                lane.condition.notify_all()
+        OPENAI_QUEUE_SECONDS.labels(model, PRIORITY_NAMES.get(entry[0], entry[0])).observe(time.monotonic() - started)
+
+    def _handle_error(self, lane, model, error):
+        """Update the lane for a failed request; return the minimum delay before a retry, or None if it is final"""
+        now = time.monotonic()
+        with lane.condition:
+            if isinstance(error, openai.RateLimitError) and _error_code(error) != 'insufficient_quota':
+                # The API is up but we are over a limit: hold every request for this model
+                retry_after = _retry_after(error)
+                lane.paused_until = max(lane.paused_until, now + retry_after)
+                lane.breaker.record_success()
+                reason = 'rate_limited'
+            elif isinstance(error, (openai.APIConnectionError, openai.InternalServerError)) or \
+                    getattr(error, 'status_code', None) in (408, 409):
+                lane.breaker.record_failure(now)
+                retry_after = 0.0
+                reason = 'unavailable'
+            else:
+                # The request itself was rejected; retrying will not help
+                if isinstance(error, openai.APIStatusError):
+                    lane.breaker.record_success()
+                else:
+                    lane.breaker.release()
+                retry_after = None
+                reason = None
+            lane.condition.notify_all()
+        if reason is not None:
+            OPENAI_RETRIES.labels(model, reason).inc()
+        return retry_after
+
+    def stats(self):
+        """Circuit state, queue length and bucket levels per model"""
+        result = {}
+        with self._lock:
+            lanes = dict(self._lanes)
+        for model, lane in lanes.items():
+            with lane.condition:
+                now = time.monotonic()
+                result[model] = {
+                    'circuit': lane.breaker.state,
+                    'waiting': len(lane.waiting),
+                    'paused_for': round(max(0.0, lane.paused_until - now), 2),
+                    'requests_available': None if lane.requests is None else round(lane.requests.available(now), 1),
+                    'tokens_available': None if lane.tokens is None else round(lane.tokens.available(now), 1)
+                }
+        return result
+
+
+def _error_code(error):
+    body = getattr(error, 'body', None)
+    if isinstance(body, dict):
+        return body.get('code') or (body.get('error') or {}).get('code')
+    return getattr(error, 'code', None)
+
+
+def _retry_after(error, default=1.0):
+    """Delay asked for by a rate-limit response, in seconds"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000.0
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except ValueError:
+        pass
+    return default
+
+
+def estimate_tokens(text, max_tokens=0):
+    """Tokens a chat request counts against the limit: about four characters per prompt token plus max_tokens"""
+    return len(text) // 4 + (max_tokens or 0)
@@ -0,0 +1,121 @@
+"""
+Per-interview session management
+"""
+
+import threading
+import time
+import uuid
+
+
+class SessionLimitError(Exception):
+    """Raised when creating a session would exceed the concurrent session cap"""
+
+
+class SessionManager:
+    """Creates, looks up and evicts one audio processor per interview.
+
+    `factory(session_id)` builds a processor; processors must provide
+    `is_recording`, `stop_recording()` and `close()`. Sessions idle for longer
+    than `idle_timeout` seconds (and not recording) are evicted when a new
+    session is created. Socket.IO clients are attached to at most one session.
+    """
+
+    def __init__(self, factory, max_sessions, idle_timeout):
+        self._factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = {}
+        self._last_active = {}
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def get(self, session_id):
+        """Return the processor for a session, or None"""
+        with self._lock:
+            processor = self._sessions.get(session_id)
+            if processor is not None:
+                self._last_active[session_id] = time.monotonic()
+            return processor
+
+    def create(self, session_id=None):
+        """Create a session; raises SessionLimitError when the cap is reached"""
+        self.evict_idle()
+        session_id = session_id or uuid.uuid4().hex
+        with self._lock:
+            if session_id in self._sessions:
+                raise ValueError(f"Session already exists: {session_id}")
+            if len(self._sessions) >= self.max_sessions:
+                raise SessionLimitError(f"Maximum of {self.max_sessions} concurrent sessions reached")
+            processor = self._factory(session_id)
+            self._sessions[session_id] = processor
+            self._last_active[session_id] = time.monotonic()
+        return session_id, processor
+
+    def get_or_create(self, session_id):
+        processor = self.get(session_id)
+        if processor is not None:
+            return processor
+        try:
+            return self.create(session_id)[1]
+        except ValueError:
+            # Created concurrently by another request
+            return self.get(session_id)
+
+    def evict(self, session_id):
+        """Stop and remove a session; returns True if it existed"""
+        with self._lock:
+            processor = self._sessions.pop(session_id, None)
+            self._last_active.pop(session_id, None)
+            for client_id in [c for c, s in self._clients.items() if s == session_id]:
+                del self._clients[client_id]
+        if processor is None:
+            return False
+        try:
+            if processor.is_recording:
+                processor.stop_recording()
+            processor.close()
+        except Exception as e:
+            print(f"Error closing session {session_id}: {e}")
+        return True
+
+    def evict_idle(self):
+        """Evict sessions that are not recording and have been idle too long"""
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                session_id for session_id, last_active in self._last_active.items()
+                if now - last_active > self.idle_timeout and not self._sessions[session_id].is_recording
+            ]
+        for session_id in idle:
+            self.evict(session_id)
+        return idle
+
+    def session_ids(self):
+        with self._lock:
+            return list(self._sessions)
+
+    def items(self):
+        """(session_id, processor) pairs, without counting as activity"""
+        with self._lock:
+            return list(self._sessions.items())
+
+    def attach_client(self, client_id, session_id):
+        """Associate a Socket.IO client with a session; returns the previous session ID"""
+        with self._lock:
+            previous = self._clients.get(client_id)
+            self._clients[client_id] = session_id
+            if session_id in self._sessions:
+                self._last_active[session_id] = time.monotonic()
+            return previous
+
+    def detach_client(self, client_id):
+        with self._lock:
+            return self._clients.pop(client_id, None)
+
+    def session_for_client(self, client_id):
+        with self._lock:
+            return self._clients.get(client_id)
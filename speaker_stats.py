@@ -0,0 +1,77 @@
+"""
+Incremental per-speaker participation statistics
+"""
+
+import threading
+
+
+class SpeakerStatistics:
+    """Per-speaker talk-time counters updated as transcript segments arrive.
+
+    `add` does constant work per segment (one split of its text), and
+    `snapshot` is proportional to the number of speakers, so the cost of
+    keeping the statistics live does not grow with the length of the session.
+    A segment counts as an interruption when it starts more than
+    `interruption_overlap` seconds before the previous speaker's segment
+    ended. Back-to-back segments, the usual turn change in Whisper output,
+    are not interruptions.
+    """
+
+    def __init__(self, interruption_overlap=0.1):
+        self.interruption_overlap = interruption_overlap
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._speakers = {}
+            self._previous_speaker = None
+            self._previous_end = None
+            self._total_duration = 0.0
+            self.version = 0
+
+    def add(self, item):
+        """Count one transcript segment"""
+        speaker = item.get('speaker', 'Unknown')
+        words = len(item['text'].split())
+        start = item.get('start_time', 0)
+        end = item.get('end_time', 0)
+        duration = max(0.0, end - start)
+
+        with self._lock:
+            stats = self._speakers.get(speaker)
+            if stats is None:
+                stats = self._speakers[speaker] = {
+                    'segments': 0,
+                    'words': 0,
+                    'total_duration': 0.0,
+                    'turns': 0,
+                    'interruptions': 0
+                }
+
+            if speaker != self._previous_speaker:
+                stats['turns'] += 1
+                if self._previous_end is not None and start < self._previous_end - self.interruption_overlap:
+                    stats['interruptions'] += 1
+
+            stats['segments'] += 1
+            stats['words'] += words
+            stats['total_duration'] += duration
+            self._total_duration += duration
+            self._previous_speaker = speaker
+            self._previous_end = end
+            self.version += 1
+
+    def snapshot(self):
+        """Current statistics per speaker, with words per minute and share of talk time"""
+        with self._lock:
+            result = {}
+            for speaker, stats in self._speakers.items():
+                duration = stats['total_duration']
+                result[speaker] = dict(
+                    stats,
+                    total_duration=round(duration, 2),
+                    words_per_minute=round(60.0 * stats['words'] / duration, 1) if duration > 0 else 0.0,
+                    talk_share=round(duration / self._total_duration, 3) if self._total_duration > 0 else 0.0
+                )
+            return result
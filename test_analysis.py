@@ -0,0 +1,57 @@
+"""
+Tests for the rolling candidate analysis
+"""
+
+import threading
+import time
+
+import pytest
+
+from analysis import RollingCandidateAnalyzer
+
+
+def items(*texts):
+    return [{'speaker': 'Candidate', 'text': text} for text in texts]
+
+
+def test_finalize_folds_in_the_remaining_items():
+    seen = []
+
+    def update(profile, transcript, final):
+        seen.append((transcript, final))
+        return dict(profile, notes=transcript)
+
+    analyzer = RollingCandidateAnalyzer(update, min_batch_items=10, interval=60)
+    analyzer.start()
+    analyzer.add(items('I led a team of five.'))
+    assert analyzer.finalize(timeout=5) == {'notes': 'Candidate: I led a team of five.'}
+    assert seen == [('Candidate: I led a team of five.', True)]
+
+
+def test_failed_final_pass_is_raised():
+    def update(profile, transcript, final):
+        raise RuntimeError('API unavailable')
+
+    analyzer = RollingCandidateAnalyzer(update, min_batch_items=10, interval=60)
+    analyzer.start()
+    analyzer.add(items('I led a team of five.'))
+    with pytest.raises(RuntimeError):
+        analyzer.finalize(timeout=5)
+
+
+def test_finalize_is_bounded_by_an_update_in_flight():
+    release = threading.Event()
+
+    def update(profile, transcript, final):
+        release.wait(5)
+        return profile
+
+    analyzer = RollingCandidateAnalyzer(update, min_batch_items=1, interval=0.01)
+    analyzer.start()
+    analyzer.add(items('I led a team of five.'))
+    time.sleep(0.2)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        analyzer.finalize(timeout=0.3)
+    assert time.monotonic() - started < 1.0
+    release.set()
@@ -0,0 +1,40 @@
+"""
+Tests for the growable audio sample store
+"""
+
+import numpy as np
+
+from audio_store import AudioStore
+
+
+def test_float_samples_are_stored_as_int16():
+    store = AudioStore(16000, initial_seconds=1.0)
+    store.append(np.array([0.0, 0.5, -1.0, 2.0]))
+    assert store.view().tolist() == [0, 16383, -32767, 32767]
+
+
+def test_views_survive_growth():
+    store = AudioStore(100, initial_seconds=1.0, growth_seconds=1.0)
+    store.append(np.arange(100, dtype=np.int16))
+    view = store.view(10, 20)
+    store.append(np.arange(500, dtype=np.int16))
+    assert len(store) == 600
+    assert view.tolist() == list(range(10, 20))
+    assert store.view(100, 105).tolist() == list(range(5))
+
+
+def test_views_survive_clear():
+    store = AudioStore(100, initial_seconds=1.0)
+    store.append(np.full(50, 7, dtype=np.int16))
+    view = store.view()
+    store.clear()
+    store.append(np.full(50, -3, dtype=np.int16))
+    assert view.tolist() == [7] * 50
+    assert store.view().tolist() == [-3] * 50
+
+
+def test_views_are_read_only():
+    store = AudioStore(100)
+    store.append(np.zeros(10, dtype=np.int16))
+    view = store.view()
+    assert not view.flags.writeable
@@ -0,0 +1,92 @@
+"""
+Tests for adaptive control of the chunk length
+"""
+
+import pytest
+
+from chunk_control import ChunkIntervalController
+
+
+def controller(**settings):
+    values = dict(min_length=1.5, max_length=8.0, workers=3, hold=2.0, smoothing=1.0)
+    values.update(settings)
+    return ChunkIntervalController(3.0, **values)
+
+
+def test_no_change_before_any_measurement():
+    control = controller()
+    assert control.update(backlog=0, now=0.0) == 3.0
+    assert not control.decisions
+
+
+def test_grows_when_round_trips_keep_workers_busy():
+    control = controller()
+    # 7.5 s to transcribe 3 s chunks on 3 workers: utilization 0.83
+    control.observe(7.5, 3.0)
+    assert control.update(backlog=0, now=0.0) == 4.5
+    assert control.decisions[-1]['reason'] == 'slow'
+
+
+def test_grows_when_chunks_queue_up():
+    control = controller()
+    assert control.update(backlog=4, now=0.0) == 4.5
+    assert control.decisions[-1]['reason'] == 'backlog'
+
+
+def test_shrinks_on_recovery():
+    control = controller()
+    control.observe(0.3, 3.0)
+    assert control.update(backlog=0, now=0.0) == 2.75
+    assert control.update(backlog=0, now=2.0) == 2.5
+    assert [decision['reason'] for decision in control.decisions] == ['fast', 'fast']
+
+
+def test_holds_between_changes():
+    control = controller()
+    control.observe(7.5, 3.0)
+    assert control.update(backlog=0, now=0.0) == 4.5
+    assert control.update(backlog=0, now=1.0) == 4.5
+    assert control.update(backlog=0, now=2.0) == 6.75
+
+
+def test_stays_within_bounds():
+    control = controller()
+    control.observe(30.0, 3.0)
+    for step in range(10):
+        target = control.update(backlog=10, now=step * 2.0)
+    assert target == 8.0
+
+    control.observe(0.01, 1.5)
+    for step in range(10, 60):
+        target = control.update(backlog=0, now=step * 2.0)
+    assert target == 1.5
+
+
+def test_steady_utilization_keeps_the_target():
+    control = controller()
+    # Utilization 0.5 sits between the thresholds
+    control.observe(4.5, 3.0)
+    assert control.update(backlog=1, now=0.0) == 3.0
+    assert not control.decisions
+
+
+def test_reset_returns_to_the_initial_target():
+    control = controller()
+    control.update(backlog=10, now=0.0)
+    control.reset()
+    assert control.target == 3.0
+    assert control.stats()['observations'] == 0
+
+
+def test_initial_target_is_clamped():
+    assert ChunkIntervalController(20.0, min_length=1.5, max_length=8.0, workers=3).target == 8.0
+
+
+@pytest.mark.parametrize('settings', [
+    {'min_length': 0.0},
+    {'increase': 1.0},
+    {'decrease': -0.5},
+])
+def test_invalid_settings_are_rejected(settings):
+    with pytest.raises(ValueError):
+        controller(**settings)
@@ -0,0 +1,135 @@
+"""
+Tests for browser audio ingest
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from ingest import AudioIngest
+
+
+class Pipeline:
+    """Records the first sample of each fed frame; `block` holds the consumer thread"""
+
+    def __init__(self):
+        self.fed = []
+        self.acks = []
+        self.block = threading.Event()
+        self.block.set()
+
+    def feed(self, samples):
+        self.block.wait()
+        self.fed.append(int(samples[0]))
+
+    def ingest(self, **settings):
+        values = dict(max_buffered_frames=50, max_backlog=16, ack_interval=5)
+        values.update(settings)
+        return AudioIngest(self.feed, lambda: 0, self.acks.append, **values)
+
+
+def frame(sequence):
+    return np.full(160, sequence, dtype='<i2').tobytes()
+
+
+def test_reordered_frames_are_fed_in_order():
+    pipeline = Pipeline()
+    ingest = pipeline.ingest()
+    for sequence in (0, 2, 1, 3):
+        ingest.receive(sequence, frame(sequence))
+    ingest.close()
+    assert pipeline.fed == [0, 1, 2, 3]
+    assert ingest.stats()['duplicates'] == 0
+    assert ingest.stats()['missing'] == 0
+
+
+def test_duplicate_frames_are_dropped():
+    pipeline = Pipeline()
+    ingest = pipeline.ingest()
+    for sequence in (0, 1, 1, 2, 0):
+        ingest.receive(sequence, frame(sequence))
+    ingest.close()
+    assert pipeline.fed == [0, 1, 2]
+    assert ingest.stats()['duplicates'] == 2
+
+
+def test_gap_counts_as_missing_after_reorder_window():
+    pipeline = Pipeline()
+    ingest = pipeline.ingest(reorder_window=2)
+    for sequence in (0, 2, 3):
+        ingest.receive(sequence, frame(sequence))
+    assert ingest.stats()['held'] == 2
+    ingest.receive(4, frame(4))
+    assert ingest.stats()['missing'] == 1
+    assert ingest.stats()['held'] == 0
+    ingest.receive(1, frame(1))
+    ingest.close()
+    assert pipeline.fed == [0, 2, 3, 4]
+    assert ingest.stats()['duplicates'] == 1
+
+
+def test_frames_held_at_close_are_fed():
+    pipeline = Pipeline()
+    ingest = pipeline.ingest()
+    for sequence in (0, 3, 4):
+        ingest.receive(sequence, frame(sequence))
+    ingest.close()
+    assert pipeline.fed == [0, 3, 4]
+    assert ingest.stats()['missing'] == 2
+
+
+def test_full_queue_rejects_frames():
+    pipeline = Pipeline()
+    pipeline.block.clear()
+    ingest = pipeline.ingest(max_buffered_frames=2)
+    results = [ingest.receive(sequence, frame(sequence)) for sequence in range(5)]
+    # The consumer may already hold the first frame, leaving room for one more
+    assert results[:2] == [True, True]
+    assert results[-1] is False
+    assert ingest.stats()['rejected'] >= 2
+    assert pipeline.acks and pipeline.acks[-1]['credit'] == 2
+    pipeline.block.set()
+    ingest.close()
+    assert pipeline.fed == sorted(pipeline.fed)
+
+
+def test_concurrent_frames_are_all_fed_in_order():
+    pipeline = Pipeline()
+    ingest = pipeline.ingest(max_buffered_frames=1000, reorder_window=1000)
+    threads = [threading.Thread(target=ingest.receive, args=(sequence, frame(sequence))) for sequence in range(200)]
+    for thread in reversed(threads):
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ingest.close()
+    assert pipeline.fed == list(range(200))
+    assert ingest.stats()['received'] == 200
+
+
+def test_acks_follow_the_interval_not_every_frame():
+    pipeline = Pipeline()
+    ingest = pipeline.ingest(ack_interval=5)
+    for sequence in range(100):
+        ingest.receive(sequence, frame(sequence))
+        # Let the consumer drain the queue, as it does between frames of a live stream
+        time.sleep(0.002)
+    time.sleep(0.4)
+    # One ack for the initial credit, one every 5 frames and one when the stream goes idle
+    assert len(pipeline.acks) <= 100 // 5 + 2
+    assert pipeline.acks[-1] == {'seq': 99, 'credit': 50}
+    ingest.close()
+
+
+def test_credit_change_is_acked_at_once():
+    pipeline = Pipeline()
+    backlog = [0]
+    ingest = AudioIngest(pipeline.feed, lambda: backlog[0], pipeline.acks.append,
+                         max_buffered_frames=50, max_backlog=16, ack_interval=100)
+    ingest.receive(0, frame(0))
+    time.sleep(0.1)
+    backlog[0] = 16
+    ingest.receive(1, frame(1))
+    time.sleep(0.1)
+    ingest.close()
+    assert [ack['credit'] for ack in pipeline.acks[:2]] == [50, 0]
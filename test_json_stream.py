@@ -0,0 +1,54 @@
+"""
+Tests for incremental parsing of streamed JSON objects
+"""
+
+import json
+
+from json_stream import JSONObjectStream
+
+
+def feed_in_pieces(text, size):
+    parser = JSONObjectStream()
+    completed = []
+    for index in range(0, len(text), size):
+        completed.extend(parser.feed(text[index:index + size]))
+    return parser, completed
+
+
+def test_members_complete_as_their_separator_arrives():
+    parser = JSONObjectStream()
+    assert parser.feed('{"name": "Ada", "years') == [('name', 'Ada')]
+    assert parser.feed('": 7') == []
+    assert parser.feed('}') == [('years', 7)]
+    assert parser.finished
+
+
+def test_code_fence_around_the_object_is_ignored():
+    text = '```json\n{"name": "Ada", "skills": ["Python"]}\n```'
+    parser, completed = feed_in_pieces(text, 3)
+    assert completed == [('name', 'Ada'), ('skills', ['Python'])]
+    assert parser.finished
+
+
+def test_escapes_and_delimiters_inside_strings():
+    value = 'She said "hi, {there}" \\ then left'
+    text = json.dumps({'quote': value, 'next': 1})
+    for size in (1, 2, 5):
+        _, completed = feed_in_pieces(text, size)
+        assert completed == [('quote', value), ('next', 1)]
+
+
+def test_nested_values_are_returned_whole():
+    document = {
+        'experience': [{'company': 'Acme', 'roles': ['dev', 'lead']}, {'company': 'Initech', 'roles': []}],
+        'contact': {'email': 'ada@example.com', 'phone': None},
+        'score': 4.5
+    }
+    parser, completed = feed_in_pieces(json.dumps(document), 4)
+    assert dict(completed) == document
+    assert parser.fields == document
+
+
+def test_member_that_does_not_parse_is_skipped():
+    _, completed = feed_in_pieces('{"name": "Ada", "broken": tru, "years": 7}', 6)
+    assert completed == [('name', 'Ada'), ('years', 7)]
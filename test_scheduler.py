@@ -0,0 +1,103 @@
+"""
+Tests for OpenAI request scheduling
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from scheduler import (OpenAIScheduler, SchedulingError, PRIORITY_BACKGROUND, PRIORITY_FINAL, PRIORITY_LIVE,
+                       estimate_tokens)
+
+MODEL = 'whisper-1'
+
+
+def response(status_code, headers=None):
+    return SimpleNamespace(request=None, status_code=status_code, headers=headers or {})
+
+
+def rate_limited(retry_after):
+    return openai.RateLimitError('Rate limit reached', response=response(429, {'retry-after': str(retry_after)}),
+                                 body=None)
+
+
+def failing(*errors, result='ok'):
+    """A request that raises each of `errors` in turn, then returns `result`"""
+    errors = list(errors)
+
+    def request():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return request
+
+
+def test_waiting_requests_are_sent_in_priority_order():
+    scheduler = OpenAIScheduler()
+    scheduler._lane(MODEL).paused_until = time.monotonic() + 0.3
+    sent = []
+    threads = []
+    for priority in (PRIORITY_BACKGROUND, PRIORITY_LIVE, PRIORITY_FINAL):
+        thread = threading.Thread(target=scheduler.call, args=(MODEL, lambda p=priority: sent.append(p), priority))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join(timeout=5)
+    assert sent == [PRIORITY_FINAL, PRIORITY_LIVE, PRIORITY_BACKGROUND]
+
+
+def test_rate_limit_pauses_the_model_for_retry_after():
+    scheduler = OpenAIScheduler(base_backoff=0.01)
+    started = time.monotonic()
+    assert scheduler.call(MODEL, failing(rate_limited(0.3))) == 'ok'
+    assert time.monotonic() - started >= 0.3
+    assert scheduler.stats()[MODEL]['circuit'] == 'closed'
+
+
+def test_rejected_request_is_not_retried():
+    scheduler = OpenAIScheduler()
+    error = openai.BadRequestError('Invalid file format', response=response(400), body=None)
+    request = failing(error, result='unreachable')
+    with pytest.raises(openai.BadRequestError):
+        scheduler.call(MODEL, request)
+
+
+def test_breaker_opens_after_failures_and_closes_after_a_probe():
+    scheduler = OpenAIScheduler(max_attempts=1, failure_threshold=2, reset_timeout=0.3)
+    for _ in range(2):
+        with pytest.raises(openai.APIConnectionError):
+            scheduler.call(MODEL, failing(openai.APIConnectionError(request=None)))
+    assert scheduler.stats()[MODEL]['circuit'] == 'open'
+
+    started = time.monotonic()
+    assert scheduler.call(MODEL, failing()) == 'ok'
+    assert time.monotonic() - started >= 0.25
+    assert scheduler.stats()[MODEL]['circuit'] == 'closed'
+
+
+def test_request_gives_up_at_its_deadline_while_the_circuit_is_open():
+    scheduler = OpenAIScheduler(max_attempts=1, failure_threshold=1, reset_timeout=30.0,
+                                max_wait={'background': 0.1})
+    with pytest.raises(openai.APIConnectionError):
+        scheduler.call(MODEL, failing(openai.APIConnectionError(request=None)))
+    with pytest.raises(SchedulingError):
+        scheduler.call(MODEL, failing(), PRIORITY_BACKGROUND)
+    assert scheduler.stats()[MODEL]['waiting'] == 0
+
+
+def test_request_bucket_spaces_out_requests():
+    scheduler = OpenAIScheduler(limits={MODEL: {'requests_per_minute': 600}})
+    lane = scheduler._lane(MODEL)
+    lane.requests.tokens = 0
+    started = time.monotonic()
+    scheduler.call(MODEL, failing())
+    # 600 a minute refills one request every 0.1 s
+    assert time.monotonic() - started >= 0.09
+
+
+def test_estimate_tokens():
+    assert estimate_tokens('x' * 400, max_tokens=100) == 200
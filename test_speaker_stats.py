@@ -0,0 +1,47 @@
+"""
+Tests for per-speaker participation statistics
+"""
+
+import pytest
+
+from speaker_stats import SpeakerStatistics
+
+
+def item(speaker, text, start, end):
+    return {'speaker': speaker, 'text': text, 'start_time': start, 'end_time': end}
+
+
+def test_back_to_back_turns_are_not_interruptions():
+    stats = SpeakerStatistics()
+    for index, speaker in enumerate(['Interviewer', 'Candidate', 'Interviewer', 'Candidate']):
+        stats.add(item(speaker, 'a few words here', index * 2.0, index * 2.0 + 2.0))
+    snapshot = stats.snapshot()
+    assert snapshot['Interviewer']['turns'] == 2
+    assert snapshot['Candidate']['turns'] == 2
+    assert sum(speaker['interruptions'] for speaker in snapshot.values()) == 0
+
+
+def test_overlapping_turn_is_an_interruption():
+    stats = SpeakerStatistics()
+    stats.add(item('Interviewer', 'tell me about your last role', 0.0, 4.0))
+    stats.add(item('Candidate', 'sure', 3.5, 4.5))
+    assert stats.snapshot()['Candidate']['interruptions'] == 1
+    assert stats.snapshot()['Interviewer']['interruptions'] == 0
+
+
+def test_same_speaker_continuing_is_one_turn():
+    stats = SpeakerStatistics()
+    stats.add(item('Candidate', 'I led the team', 0.0, 2.0))
+    stats.add(item('Candidate', 'for two years', 1.5, 3.0))
+    snapshot = stats.snapshot()['Candidate']
+    assert (snapshot['turns'], snapshot['segments'], snapshot['interruptions']) == (1, 2, 0)
+
+
+def test_rates_and_shares():
+    stats = SpeakerStatistics()
+    stats.add(item('Interviewer', 'one two three four five', 0.0, 3.0))
+    stats.add(item('Candidate', 'one two three four five six seven eight nine ten', 3.0, 12.0))
+    snapshot = stats.snapshot()
+    assert snapshot['Interviewer']['words_per_minute'] == pytest.approx(100.0)
+    assert snapshot['Candidate']['talk_share'] == pytest.approx(0.75)
+    assert stats.version == 2
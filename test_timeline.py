@@ -0,0 +1,55 @@
+"""
+Tests for stitching transcribed chunks onto the session timeline
+"""
+
+from timeline import TranscriptStitcher
+
+SAMPLE_RATE = 16000
+
+
+def segment(text, start, end):
+    return {'text': text, 'start': start, 'end': end}
+
+
+def texts(segments):
+    return [item['text'] for item in segments]
+
+
+def test_segments_are_rebased_onto_the_session_clock():
+    stitcher = TranscriptStitcher(SAMPLE_RATE)
+    segments = stitcher.stitch(5 * SAMPLE_RATE, 8 * SAMPLE_RATE, [segment('Hello there.', 0.5, 2.0)])
+    assert (segments[0]['start'], segments[0]['end']) == (5.5, 7.0)
+
+
+def test_adjacent_chunk_keeps_its_words():
+    """Chunks cut at a pause do not overlap, even when Whisper times a segment past the cut"""
+    stitcher = TranscriptStitcher(SAMPLE_RATE)
+    stitcher.stitch(0, 3 * SAMPLE_RATE, [segment('Well, I guess so.', 1.0, 3.02)])
+    segments = stitcher.stitch(3 * SAMPLE_RATE, 8 * SAMPLE_RATE, [segment('So, tell me about it.', 0.0, 2.0)])
+    assert texts(segments) == ['So, tell me about it.']
+    assert stitcher.duplicate_words == 0
+
+
+def test_single_word_match_in_overlap_is_kept():
+    stitcher = TranscriptStitcher(SAMPLE_RATE)
+    stitcher.stitch(0, 10 * SAMPLE_RATE, [segment('I worked there for years so', 7.0, 10.0)])
+    segments = stitcher.stitch(int(9.5 * SAMPLE_RATE), 15 * SAMPLE_RATE, [segment('so what next', 0.0, 1.5)])
+    assert texts(segments) == ['so what next']
+
+
+def test_words_repeated_in_overlap_are_removed():
+    stitcher = TranscriptStitcher(SAMPLE_RATE)
+    stitcher.stitch(0, 10 * SAMPLE_RATE, [segment('We shipped the new billing system', 7.0, 10.0)])
+    segments = stitcher.stitch(int(9.5 * SAMPLE_RATE), 15 * SAMPLE_RATE, [
+        segment('billing system', 0.0, 0.6),
+        segment('last spring.', 0.6, 1.5)
+    ])
+    assert texts(segments) == ['last spring.']
+    assert stitcher.duplicate_words == 2
+
+
+def test_repeated_words_outside_the_overlap_are_kept():
+    stitcher = TranscriptStitcher(SAMPLE_RATE)
+    stitcher.stitch(0, 10 * SAMPLE_RATE, [segment('thank you', 1.0, 2.0), segment('Okay.', 8.0, 10.0)])
+    segments = stitcher.stitch(int(9.5 * SAMPLE_RATE), 15 * SAMPLE_RATE, [segment('thank you very much', 3.0, 5.0)])
+    assert texts(segments) == ['thank you very much']
@@ -0,0 +1,65 @@
+"""
+Tests for the ordered transcription pool
+"""
+
+import random
+import threading
+import time
+
+from transcription import TranscriptionPool
+
+
+def test_results_are_delivered_in_submission_order():
+    delivered = []
+
+    def transcribe(job):
+        time.sleep(random.uniform(0, 0.02))
+        return job * 10
+
+    pool = TranscriptionPool(transcribe, lambda job, result: delivered.append((job, result)), workers=4)
+    for job in range(30):
+        pool.submit(job)
+    assert pool.wait(timeout=10)
+    pool.shutdown()
+    assert delivered == [(job, job * 10) for job in range(30)]
+
+
+def test_slow_delivery_does_not_block_pending():
+    delivering = threading.Event()
+    release = threading.Event()
+
+    def on_result(job, result):
+        delivering.set()
+        release.wait(5)
+
+    pool = TranscriptionPool(lambda job: job, on_result, workers=2)
+    pool.submit(0)
+    pool.submit(1)
+    assert delivering.wait(5)
+    started = time.monotonic()
+    assert pool.pending() == 2
+    assert time.monotonic() - started < 0.5
+    release.set()
+    assert pool.wait(timeout=5)
+    assert pool.pending() == 0
+    pool.shutdown()
+
+
+def test_cancelled_pool_delivers_no_late_results():
+    delivered = []
+    release = threading.Event()
+
+    def transcribe(job):
+        if job > 0:
+            release.wait(5)
+        return job
+
+    pool = TranscriptionPool(transcribe, lambda job, result: delivered.append(job), workers=2)
+    for job in range(4):
+        pool.submit(job)
+    assert not pool.wait(timeout=0.2)
+    pool.shutdown(wait=False, cancel=True)
+    release.set()
+    time.sleep(0.2)
+    assert delivered == [0]
+    assert pool.pending() == 3
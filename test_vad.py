@@ -0,0 +1,84 @@
+"""
+Tests for voice activity chunking
+"""
+
+import numpy as np
+import pytest
+
+from audio_store import AudioStore
+from chunk_control import ChunkIntervalController
+from vad import VoiceActivityChunker
+
+SAMPLE_RATE = 16000
+
+
+def store_of(*spans):
+    """AudioStore holding (seconds, amplitude) spans of a 300 Hz tone; amplitude 0 is silence"""
+    store = AudioStore(SAMPLE_RATE)
+    for seconds, amplitude in spans:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        store.append(amplitude * np.sin(2 * np.pi * 300 * t))
+    return store
+
+
+def chunker(**settings):
+    values = dict(min_length=1.0, target_length=3.0, max_length=10.0, overlap=0.5, silence_threshold=0.01)
+    values.update(settings)
+    return VoiceActivityChunker(SAMPLE_RATE, **values)
+
+
+def test_target_equal_to_max_cuts_continuous_speech():
+    vad = chunker(target_length=10.0, max_length=10.0)
+    chunks = vad.process(store_of((25, 0.5)))
+    assert chunks
+    assert all(end - start <= 10.0 * SAMPLE_RATE for start, end in chunks)
+
+
+def test_target_raised_to_max_by_controller():
+    vad = chunker()
+    vad.set_target_length(30.0)
+    assert vad.process(store_of((25, 0.5)))
+
+
+def test_chunk_cut_without_pause_overlaps_the_next():
+    vad = chunker()
+    (first_start, first_end), (second_start, _) = vad.process(store_of((25, 0.5)))[:2]
+    assert first_start == 0
+    assert first_end - second_start == pytest.approx(0.5 * SAMPLE_RATE, abs=vad.frame_size)
+
+
+def test_chunk_cut_at_pause_does_not_overlap():
+    vad = chunker()
+    chunks = vad.process(store_of((4, 0.5), (1, 0), (4, 0.5)), final=True)
+    assert len(chunks) == 2
+    assert chunks[1][0] >= chunks[0][1]
+
+
+def test_final_chunk_trims_trailing_silence():
+    vad = chunker()
+    chunks = vad.process(store_of((2, 0.5), (5, 0)), final=True)
+    assert len(chunks) == 1
+    start, end = chunks[0]
+    assert start == 0
+    assert end <= (2 + 0.2) * SAMPLE_RATE + vad.frame_size
+
+
+def test_silence_is_never_sent():
+    vad = chunker()
+    assert vad.process(store_of((5, 0)), final=True) == []
+    assert vad.stats()['submitted_seconds'] == 0
+
+
+@pytest.mark.parametrize('settings', [
+    {'min_length': 5.0, 'target_length': 3.0},
+    {'target_length': 12.0},
+    {'overlap': 10.0},
+])
+def test_inconsistent_lengths_are_rejected(settings):
+    with pytest.raises(ValueError):
+        chunker(**settings)
+
+
+def test_controller_rejects_inverted_range():
+    with pytest.raises(ValueError):
+        ChunkIntervalController(3.0, min_length=8.0, max_length=1.5, workers=3)
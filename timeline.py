@@ -0,0 +1,110 @@
+"""
+Rebasing of chunk-relative transcript segments onto the session timeline
+"""
+
+import re
+from collections import deque
+
+_TOKEN_NORMALIZE = re.compile(r"[^\w']+")
+
+
+def _normalize(token):
+    return _TOKEN_NORMALIZE.sub('', token.lower())
+
+
+class TranscriptStitcher:
+    """Puts transcribed chunks on one session clock and drops words repeated in overlaps.
+
+    Chunks must be stitched in order. Each chunk is identified by the absolute
+    sample range it covers; segment times are shifted by its start. Only a
+    chunk whose audio starts before the previous chunk's audio ended can repeat
+    words. For such a chunk, the longest run of at least `min_repeated_words`
+    words that ends the previous chunk and also starts this one is removed,
+    counting only words timed inside the overlap (give or take `slack`
+    seconds). Word times are estimated by spreading each segment's words
+    evenly over it. Only the last `max_overlap_words` words are kept between
+    calls, so the cost per chunk does not depend on transcript length.
+    """
+
+    def __init__(self, sample_rate, max_overlap_words=16, min_repeated_words=2, slack=0.5):
+        self.sample_rate = sample_rate
+        self.max_overlap_words = max_overlap_words
+        self.min_repeated_words = min_repeated_words
+        self.slack = slack
+        self.reset()
+
+    def reset(self):
+        # (normalized word, estimated time) of the last words stitched
+        self._tail = deque(maxlen=self.max_overlap_words)
+        self._previous_end_sample = 0
+        self.duplicate_words = 0
+
+    def stitch(self, start_sample, end_sample, segments):
+        """Return segments with absolute 'start'/'end' times and overlap duplicates removed"""
+        offset = start_sample / self.sample_rate
+        rebased = [
+            {
+                'text': segment['text'],
+                'start': round(offset + segment['start'], 3),
+                'end': round(offset + segment['end'], 3)
+            }
+            for segment in segments
+        ]
+
+        if start_sample < self._previous_end_sample and self._tail:
+            rebased = self._drop_repeated_prefix(rebased, offset, self._previous_end_sample / self.sample_rate)
+
+        for segment in rebased:
+            self._tail.extend(_timed_words(segment))
+        self._previous_end_sample = max(self._previous_end_sample, end_sample)
+        return rebased
+
+    def _drop_repeated_prefix(self, segments, overlap_start, overlap_end):
+        tail = []
+        for word, time in reversed(self._tail):
+            if time < overlap_start - self.slack:
+                break
+            tail.append(word)
+        tail.reverse()
+
+        head = []
+        for segment in segments:
+            for word, time in _timed_words(segment):
+                if time > overlap_end + self.slack or len(head) >= len(tail):
+                    break
+                head.append(word)
+            else:
+                continue
+            break
+
+        repeated = 0
+        for length in range(min(len(tail), len(head)), self.min_repeated_words - 1, -1):
+            if tail[-length:] == head[:length]:
+                repeated = length
+                break
+        if not repeated:
+            return segments
+        self.duplicate_words += repeated
+
+        # Remove the repeated words from the leading segments
+        stitched = []
+        remaining = repeated
+        for segment in segments:
+            tokens = segment['text'].split()
+            if remaining >= len(tokens):
+                remaining -= len(tokens)
+                continue
+            if remaining:
+                segment = dict(segment, text=' '.join(tokens[remaining:]),
+                               start=min(max(segment['start'], overlap_end), segment['end']))
+                remaining = 0
+            stitched.append(segment)
+        return stitched
+
+
+def _timed_words(segment):
+    """(normalized word, estimated time) for each word, spread evenly over the segment"""
+    tokens = segment['text'].split()
+    duration = segment['end'] - segment['start']
+    return [(_normalize(token), segment['start'] + duration * (index + 0.5) / len(tokens))
+            for index, token in enumerate(tokens)]
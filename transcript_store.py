@@ -0,0 +1,259 @@
+"""
+Append-only transcript storage with time and speaker indexes
+"""
+
+import bisect
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+SEGMENT_FIELDS = ('text', 'speaker', 'speaker_confidence', 'start_time', 'end_time', 'timestamp', 'time')
+
+
+def render_item(item):
+    """One transcript line as shown in the full transcript"""
+    return f"[{item['time']}] {item.get('speaker', 'Unknown')}: {item['text']}"
+
+
+class TranscriptDatabase:
+    """SQLite persistence for transcript segments shared by all sessions.
+
+    Appends are handed to a single writer thread that commits them in batches,
+    so the transcription path never waits on disk. The database runs in WAL
+    mode and readers open their own connections, so reads see committed
+    segments without blocking the writer.
+    """
+
+    def __init__(self, path, batch_size=64):
+        self.path = path
+        self.batch_size = batch_size
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with closing(self._connect()) as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS recordings (
+                    recording_id TEXT PRIMARY KEY,
+                    session_id TEXT NOT NULL,
+                    started_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS recordings_by_session ON recordings (session_id, started_at);
+                CREATE TABLE IF NOT EXISTS segments (
+                    recording_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    speaker TEXT,
+                    speaker_confidence REAL,
+                    start_time REAL,
+                    end_time REAL,
+                    timestamp REAL,
+                    time TEXT,
+                    PRIMARY KEY (recording_id, position)
+                );
+                CREATE INDEX IF NOT EXISTS segments_by_time ON segments (recording_id, start_time);
+                CREATE INDEX IF NOT EXISTS segments_by_speaker ON segments (recording_id, speaker, position);
+            """)
+
+        self._writes = queue.Queue()
+        self._writer = threading.Thread(target=self._run, name='transcript-writer')
+        self._writer.daemon = True
+        self._writer.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def add_recording(self, recording_id, session_id, started_at):
+        self._writes.put(('recording', (recording_id, session_id, started_at)))
+
+    def add_segment(self, recording_id, position, item):
+        self._writes.put(('segment', (recording_id, position) + tuple(item.get(field) for field in SEGMENT_FIELDS)))
+
+    def flush(self, timeout=None):
+        """Wait until everything appended so far is committed"""
+        done = threading.Event()
+        self._writes.put(('flush', done))
+        return done.wait(timeout)
+
+    def close(self):
+        self._writes.put(None)
+        self._writer.join(timeout=5)
+
+    def recordings(self, session_id):
+        """Recordings of a session, newest first"""
+        return self._query(
+            """SELECT r.recording_id, r.started_at, COUNT(s.position) AS segments
+               FROM recordings r LEFT JOIN segments s ON s.recording_id = r.recording_id
+               WHERE r.session_id = ? GROUP BY r.recording_id ORDER BY r.started_at DESC""",
+            (session_id,)
+        )
+
+    def read(self, recording_id, offset=0, limit=None, speaker=None, start_time=None, end_time=None):
+        """Segments of a recording in order, filtered by speaker and start-time range"""
+        where, params = self._where(recording_id, speaker, start_time, end_time)
+        query = f"SELECT {', '.join(SEGMENT_FIELDS)} FROM segments WHERE {where} ORDER BY position LIMIT ? OFFSET ?"
+        return self._query(query, params + [-1 if limit is None else limit, offset])
+
+    def count(self, recording_id, speaker=None, start_time=None, end_time=None):
+        where, params = self._where(recording_id, speaker, start_time, end_time)
+        return self._query(f"SELECT COUNT(*) AS total FROM segments WHERE {where}", params)[0]['total']
+
+    @staticmethod
+    def _where(recording_id, speaker, start_time, end_time):
+        conditions = ["recording_id = ?"]
+        params = [recording_id]
+        if speaker is not None:
+            conditions.append("speaker = ?")
+            params.append(speaker)
+        if start_time is not None:
+            conditions.append("start_time >= ?")
+            params.append(start_time)
+        if end_time is not None:
+            conditions.append("start_time < ?")
+            params.append(end_time)
+        return " AND ".join(conditions), params
+
+    def _query(self, query, params):
+        with closing(self._connect()) as connection:
+            return [dict(row) for row in connection.execute(query, params).fetchall()]
+
+    def _run(self):
+        connection = self._connect()
+        stop = False
+        while not stop:
+            batch = [self._writes.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            flushed = []
+            try:
+                with connection:
+                    for entry in batch:
+                        if entry is None:
+                            stop = True
+                        elif entry[0] == 'recording':
+                            connection.execute("INSERT OR IGNORE INTO recordings VALUES (?, ?, ?)", entry[1])
+                        elif entry[0] == 'segment':
+                            connection.execute("INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", entry[1])
+                        else:
+                            flushed.append(entry[1])
+            except sqlite3.Error as e:
+                print(f"Error writing transcript segments: {e}")
+            for done in flushed:
+                done.set()
+        connection.close()
+
+
+class _Segments:
+    """Segments and indexes of one recording"""
+
+    def __init__(self):
+        self.items = []
+        self.start_times = []
+        self.lines = []
+        self.by_speaker = {}
+        self.count = 0
+
+
+class TranscriptStore:
+    """Append-only transcript of the current recording of one session.
+
+    Segments are appended by a single writer (the transcription result
+    callback) and never modified, so readers take a snapshot of the length and
+    read up to it without locking. Start times are kept in order for bisecting
+    time ranges, positions are indexed by speaker, and each segment's rendered
+    line is computed once on append. Segments are also written to `database`
+    (a TranscriptDatabase) when one is given.
+    """
+
+    def __init__(self, session_id, database=None):
+        self.session_id = session_id
+        self.database = database
+        self._write_lock = threading.Lock()
+        self.reset()
+
+    def reset(self, recording_id=None):
+        """Start a new, empty recording; a known `recording_id` makes rewriting it idempotent"""
+        with self._write_lock:
+            self.recording_id = recording_id or uuid.uuid4().hex
+            self.started_at = time.time()
+            # Swapped in one assignment so readers see either the old recording or the new one
+            self._segments = _Segments()
+
+    def __len__(self):
+        return self._segments.count
+
+    def append(self, item):
+        """Add a segment and return its position"""
+        with self._write_lock:
+            segments = self._segments
+            position = segments.count
+            segments.items.append(item)
+            segments.start_times.append(item.get('start_time', 0.0))
+            segments.lines.append(render_item(item))
+            segments.by_speaker.setdefault(item.get('speaker', 'Unknown'), []).append(position)
+            # Publish only after every index holds the new segment
+            segments.count = position + 1
+            recording_id = self.recording_id
+        if self.database is not None:
+            # Recordings are stored from their first segment, so empty ones leave no trace
+            if position == 0:
+                self.database.add_recording(recording_id, self.session_id, self.started_at)
+            self.database.add_segment(recording_id, position, item)
+        return position
+
+    def speakers(self):
+        return list(self._segments.by_speaker)
+
+    def items(self, offset=0, limit=None, speaker=None):
+        """A page of segments in order, optionally only one speaker's"""
+        segments = self._segments
+        count = segments.count
+        if speaker is None:
+            end = count if limit is None else min(count, offset + limit)
+            return segments.items[offset:end]
+
+        positions = segments.by_speaker.get(speaker, [])
+        # The speaker's list may already hold positions past our snapshot
+        positions = positions[:bisect.bisect_left(positions, count)]
+        end = len(positions) if limit is None else offset + limit
+        return [segments.items[position] for position in positions[offset:end]]
+
+    def count(self, speaker=None):
+        segments = self._segments
+        count = segments.count
+        if speaker is None:
+            return count
+        return bisect.bisect_left(segments.by_speaker.get(speaker, []), count)
+
+    def range(self, start_time=None, end_time=None, speaker=None):
+        """Segments starting in [start_time, end_time) seconds"""
+        segments = self._segments
+        count = segments.count
+        low = 0 if start_time is None else bisect.bisect_left(segments.start_times, start_time, 0, count)
+        high = count if end_time is None else bisect.bisect_left(segments.start_times, end_time, low, count)
+        items = segments.items[low:high]
+        if speaker is not None:
+            items = [item for item in items if item.get('speaker', 'Unknown') == speaker]
+        return items
+
+    def render(self, offset=0):
+        """Full transcript text from `offset` on; pass the previous length to render only new lines"""
+        segments = self._segments
+        return "\n\n".join(segments.lines[offset:segments.count])
+
+    def text(self):
+        """All segment text joined for analysis"""
+        segments = self._segments
+        return " ".join(item['text'] for item in segments.items[:segments.count])
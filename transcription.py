@@ -0,0 +1,229 @@
+"""
+Transcription backends and the concurrent worker pool used for live transcription
+"""
+
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_codec import decode_audio
+from config import OPENAI_CONFIG, TRANSCRIPTION_CONFIG
+from metrics import TRANSCRIPTION_API_SECONDS, TRANSCRIPTION_UPLOAD_SECONDS
+from scheduler import PRIORITY_LIVE
+
+
+class TranscriptionBackend:
+    """Interface for speech-to-text backends"""
+
+    name = 'base'
+
+    def transcribe(self, encoded_audio, priority=PRIORITY_LIVE):
+        """Transcribe an EncodedAudio chunk and return a list of segment dicts.
+
+        Each segment has 'text', 'start' and 'end' keys, with times in seconds
+        relative to the start of the chunk. Backends that call a rate-limited
+        API queue the request at `priority`.
+        """
+        raise NotImplementedError
+
+
+class OpenAITranscriptionBackend(TranscriptionBackend):
+    """Transcription through the OpenAI Whisper API, optionally through an OpenAIScheduler"""
+
+    name = 'openai'
+
+    def __init__(self, client, model=None, scheduler=None):
+        self.client = client
+        self.model = model or OPENAI_CONFIG['whisper_model']
+        self.scheduler = scheduler
+
+    def transcribe(self, encoded_audio, priority=PRIORITY_LIVE):
+        timing = {}
+
+        def request():
+            # Upload straight from memory; the filename tells the API the container format
+            started = time.perf_counter()
+            raw_response = self.client.audio.transcriptions.with_raw_response.create(
+                model=self.model,
+                file=(encoded_audio.filename, encoded_audio.data, encoded_audio.content_type),
+                response_format="verbose_json",
+                timestamp_granularities=["segment"]
+            )
+            timing['elapsed'] = time.perf_counter() - started
+            return raw_response
+
+        if self.scheduler is None:
+            raw_response = request()
+        else:
+            raw_response = self.scheduler.call(self.model, request, priority)
+        elapsed = timing['elapsed']
+        response = raw_response.parse()
+
+        # Split the round trip into server processing and upload/network time
+        processing_ms = raw_response.headers.get('openai-processing-ms')
+        if processing_ms:
+            processing = float(processing_ms) / 1000.0
+            TRANSCRIPTION_API_SECONDS.labels(self.name).observe(processing)
+            TRANSCRIPTION_UPLOAD_SECONDS.labels(self.name).observe(max(0.0, elapsed - processing))
+
+        segments = getattr(response, 'segments', None) or []
+        return [
+            {
+                'text': segment.text.strip(),
+                'start': getattr(segment, 'start', 0),
+                'end': getattr(segment, 'end', 0)
+            }
+            for segment in segments
+        ]
+
+
+class LocalTranscriptionBackend(TranscriptionBackend):
+    """Deterministic offline stand-in for Whisper.
+
+    Produces one segment per `segment_length` seconds of audio, with text derived
+    from a hash of the samples, after sleeping `latency` seconds. Used to measure
+    pipeline throughput without network access.
+    """
+
+    name = 'local'
+
+    def __init__(self, latency=0.0, segment_length=1.5):
+        self.latency = latency
+        self.segment_length = segment_length
+
+    def transcribe(self, encoded_audio, priority=PRIORITY_LIVE):
+        audio_data, sample_rate = decode_audio(encoded_audio)
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        duration = len(audio_data) / sample_rate
+        digest = hashlib.sha1(audio_data.tobytes()).hexdigest()
+
+        segments = []
+        start = 0.0
+        index = 0
+        while start < duration:
+            end = min(start + self.segment_length, duration)
+            segments.append({
+                'text': f"local segment {index} ({end - start:.2f}s) {digest[index % 32:index % 32 + 8]}",
+                'start': round(start, 3),
+                'end': round(end, 3)
+            })
+            start = end
+            index += 1
+        return segments
+
+
+def create_transcription_backend(name, client=None, scheduler=None):
+    """Create the transcription backend configured by name ('openai' or 'local')"""
+    if name == 'openai':
+        return OpenAITranscriptionBackend(client, scheduler=scheduler)
+    if name == 'local':
+        return LocalTranscriptionBackend(latency=TRANSCRIPTION_CONFIG['local_latency'])
+    raise ValueError(f"Unknown transcription backend: {name}")
+
+
+class CachedTranscriptionBackend(TranscriptionBackend):
+    """Wraps a backend so identical audio bytes are only transcribed once"""
+
+    def __init__(self, backend, cache):
+        self.backend = backend
+        self.cache = cache
+        self.name = backend.name
+
+    def transcribe(self, encoded_audio, priority=PRIORITY_LIVE):
+        key = self.cache.make_key('transcription', encoded_audio.data, {
+            'backend': self.backend.name,
+            'model': getattr(self.backend, 'model', None),
+            'content_type': encoded_audio.content_type
+        })
+        return self.cache.get_or_compute(key, lambda: self.backend.transcribe(encoded_audio, priority))
+
+
+class TranscriptionPool:
+    """Bounded pool of transcription workers that delivers results in chunk order.
+
+    Jobs are numbered as they are submitted and run concurrently on up to
+    `workers` threads. Completed results are held back until every earlier job
+    has been delivered, so `on_result` is always called in submission order.
+    One worker at a time delivers, outside the lock, so a slow `on_result`
+    never blocks `submit` or `pending`.
+    At most `max_pending` jobs may be in flight or waiting for delivery;
+    `submit` blocks once that limit is reached.
+    """
+
+    def __init__(self, transcribe, on_result, workers=3, max_pending=8):
+        self._transcribe = transcribe
+        self._on_result = on_result
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='transcription')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._delivery = threading.Condition()
+        self._completed = {}
+        self._next_submit = 0
+        self._next_delivery = 0
+        self._delivering = False
+        self._cancelled = False
+
+    def submit(self, job, timeout=None):
+        """Queue a job for transcription and return its sequence number,
+        or None if no slot freed up within `timeout` seconds"""
+        if not self._slots.acquire(timeout=timeout):
+            return None
+        with self._delivery:
+            sequence = self._next_submit
+            self._next_submit += 1
+        self._executor.submit(self._run, sequence, job)
+        return sequence
+
+    def pending(self):
+        """Number of submitted jobs whose results have not been delivered yet"""
+        with self._delivery:
+            return self._next_submit - self._next_delivery
+
+    def wait(self, timeout=None):
+        """Wait until every submitted job has been delivered"""
+        with self._delivery:
+            return self._delivery.wait_for(lambda: self._next_delivery == self._next_submit, timeout)
+
+    def shutdown(self, wait=True, cancel=False):
+        """Stop the workers. With `cancel`, jobs not started yet are dropped and
+        results still to come are discarded; once this returns, `on_result`
+        is never called again."""
+        if cancel:
+            with self._delivery:
+                self._cancelled = True
+                self._delivery.wait_for(lambda: not self._delivering)
+        self._executor.shutdown(wait=wait, cancel_futures=cancel)
+
+    def _run(self, sequence, job):
+        try:
+            result = self._transcribe(job)
+        except Exception as e:
+            print(f"Error in transcription pool: {e}")
+            result = None
+
+        with self._delivery:
+            if self._cancelled:
+                return
+            self._completed[sequence] = (job, result)
+            if self._delivering:
+                # The worker delivering now will also deliver this result when its turn comes
+                return
+            self._delivering = True
+
+        while True:
+            with self._delivery:
+                if self._cancelled or self._next_delivery not in self._completed:
+                    self._delivering = False
+                    self._delivery.notify_all()
+                    return
+                ready_job, ready_result = self._completed.pop(self._next_delivery)
+            try:
+                self._on_result(ready_job, ready_result)
+            except Exception as e:
+                print(f"Error delivering transcription result: {e}")
+            with self._delivery:
+                self._next_delivery += 1
+                self._slots.release()
+                self._delivery.notify_all()
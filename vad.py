@@ -0,0 +1,169 @@
+"""
+Energy-based voice activity detection and chunking for live transcription
+"""
+
+import numpy as np
+
+
+class VoiceActivityChunker:
+    """Cuts captured audio into transcription chunks at pauses in speech.
+
+    Audio is analysed in fixed frames; a frame is voiced when its RMS level is
+    above `silence_threshold` (on the [-1, 1] scale). Chunks start just before
+    the first voiced frame, so silent spans are never sent. Once a chunk is at
+    least `target_length` long it is cut at the latest pause of `min_pause`
+    seconds that leaves it at least `min_length` long. If no pause appears before
+    `max_length`, the chunk is cut at its quietest frame and the next chunk
+    starts `overlap` seconds earlier, so a word split by the cut is heard whole
+    by one of the two chunks.
+
+    `process` only analyses frames it has not seen before and returns
+    (start_sample, end_sample) ranges in absolute sample positions.
+    """
+
+    def __init__(self, sample_rate, min_length, target_length, max_length, overlap,
+                 silence_threshold, frame_duration=0.03, min_pause=0.3, padding=0.2):
+        if not 0 <= min_length <= target_length <= max_length or max_length <= 0:
+            raise ValueError(f"Chunk lengths must satisfy 0 <= min ({min_length}) <= target ({target_length}) "
+                             f"<= max ({max_length}) and max > 0")
+        if not 0 <= overlap < max_length:
+            raise ValueError(f"Chunk overlap ({overlap}) must be at least 0 and shorter than max length ({max_length})")
+        self.sample_rate = sample_rate
+        self.frame_size = max(1, int(frame_duration * sample_rate))
+        self.min_frames = self._frames(min_length)
+        self.max_frames = max(self._frames(max_length), self.min_frames + 1)
+        self.target_frames = self._clamp_target(target_length)
+        self.pause_frames = max(1, self._frames(min_pause))
+        self.padding_frames = self._frames(padding)
+        self.overlap_frames = self._frames(overlap)
+        self.silence_threshold = silence_threshold
+        self.reset()
+
+    def set_target_length(self, seconds):
+        """Change the preferred chunk length; applies to the chunk being built"""
+        self.target_frames = self._clamp_target(seconds)
+
+    def _clamp_target(self, seconds):
+        # Below max_frames, so a chunk cut at max length always has a window to find its quietest frame in
+        return min(max(self._frames(seconds), self.min_frames), self.max_frames - 1)
+
+    def _frames(self, seconds):
+        return int(round(seconds * self.sample_rate / self.frame_size))
+
+    def reset(self):
+        # Per-frame RMS levels for frames [_base_frame, _next_frame)
+        self._levels = np.empty(0, dtype=np.float32)
+        self._base_frame = 0
+        self._next_frame = 0
+        # Start frame of the open chunk, or None while in silence
+        self._chunk_start = None
+        # Chunks may not start before this frame (end of the previous chunk)
+        self._floor = 0
+        self.chunks = 0
+        self.submitted_frames = 0
+
+    def stats(self):
+        """Chunking totals in seconds, for measuring how much audio is sent"""
+        frame_seconds = self.frame_size / self.sample_rate
+        analysed = self._next_frame * frame_seconds
+        submitted = self.submitted_frames * frame_seconds
+        return {
+            'chunks': self.chunks,
+            'analysed_seconds': round(analysed, 3),
+            'submitted_seconds': round(submitted, 3),
+            'skipped_seconds': round(max(0.0, analysed - submitted), 3)
+        }
+
+    def process(self, audio_store, final=False):
+        """Analyse newly stored audio and return the chunks that are ready"""
+        self._analyse(audio_store)
+
+        ranges = []
+        while True:
+            cut = self._next_cut(final)
+            if cut is None:
+                break
+            start, end, next_floor = cut
+            if end > start:
+                ranges.append((start * self.frame_size, end * self.frame_size))
+                self.chunks += 1
+                self.submitted_frames += end - start
+            self._chunk_start = None
+            self._floor = next_floor
+            self._trim(next_floor)
+        return ranges
+
+    def _analyse(self, audio_store):
+        available = len(audio_store) // self.frame_size
+        if available <= self._next_frame:
+            return
+        samples = audio_store.view(self._next_frame * self.frame_size, available * self.frame_size)
+        frames = samples.reshape(available - self._next_frame, self.frame_size).astype(np.float32)
+        frames /= 32768.0
+        levels = np.sqrt(np.mean(frames * frames, axis=1))
+        self._levels = np.concatenate((self._levels, levels))
+        self._next_frame = available
+
+    def _trim(self, frame):
+        """Forget levels of frames before `frame`; they can no longer be part of a chunk"""
+        drop = min(frame, self._next_frame) - self._base_frame
+        if drop > 0:
+            self._levels = self._levels[drop:]
+            self._base_frame += drop
+
+    def _next_cut(self, final):
+        """Return (start_frame, end_frame, next_floor) for the next chunk, or None"""
+        if self._chunk_start is None:
+            search_from = max(self._floor, self._base_frame)
+            voiced = np.flatnonzero(self._levels[search_from - self._base_frame:] > self.silence_threshold)
+            if len(voiced) == 0:
+                # Nothing but silence so far; it never needs to be sent
+                self._trim(max(self._floor, self._next_frame - self.padding_frames))
+                return None
+            first_voiced = search_from + int(voiced[0])
+            self._chunk_start = max(first_voiced - self.padding_frames, self._floor)
+
+        start = self._chunk_start
+        length = self._next_frame - start
+        levels = self._levels[start - self._base_frame:]
+        voiced = levels > self.silence_threshold
+
+        if length >= self.target_frames:
+            pause = self._last_pause(voiced[:self.max_frames])
+            if pause is not None:
+                end = min(start + pause + self.padding_frames, start + len(voiced))
+                return start, end, end
+
+        if length >= self.max_frames:
+            # No usable pause: cut at the quietest frame between target and max
+            window = levels[self.target_frames:self.max_frames]
+            end = start + self.target_frames + int(np.argmin(window)) + 1
+            return start, end, max(end - self.overlap_frames, start + 1)
+
+        if final and length > 0:
+            # Trim trailing silence from the last chunk of the recording
+            voiced_frames = np.flatnonzero(voiced)
+            end = start + int(voiced_frames[-1]) + 1 + self.padding_frames if len(voiced_frames) else start
+            return start, min(end, self._next_frame), self._next_frame
+
+        return None
+
+    def _last_pause(self, voiced):
+        """Offset where the latest pause of at least min_pause frames begins, or None.
+
+        The offset is never less than min_length, so cutting there keeps the
+        chunk long enough.
+        """
+        silent = ~voiced
+        if len(silent) < self.min_frames + self.pause_frames:
+            return None
+        # Every window of pause_frames consecutive silent frames sums to pause_frames
+        runs = np.convolve(silent.astype(np.int8), np.ones(self.pause_frames, dtype=np.int8), mode='valid')
+        windows = np.flatnonzero(runs[self.min_frames:] == self.pause_frames)
+        if len(windows) == 0:
+            return None
+        # Walk back from the last silent window to the start of its silent run
+        window = self.min_frames + int(windows[-1])
+        voiced_before = np.flatnonzero(voiced[:window])
+        run_start = int(voiced_before[-1]) + 1 if len(voiced_before) else 0
+        return max(run_start, self.min_frames)
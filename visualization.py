@@ -0,0 +1,133 @@
+"""
+Rate-limited binary audio envelope stream for the client visualizer
+"""
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+def compute_envelope(audio_data, bins):
+    """Decimate audio into `bins` peak/RMS pairs.
+
+    Returns a uint8 array of length 2 * bins: the first half holds per-bin peak
+    levels and the second half per-bin RMS levels, both scaled to 0-255.
+    Accepts float samples in [-1, 1] or int16 samples.
+    """
+    audio_data = np.asarray(audio_data)
+    if audio_data.dtype == np.int16:
+        audio_data = audio_data.astype(np.float32) / 32768.0
+    else:
+        audio_data = audio_data.astype(np.float32, copy=False)
+    envelope = np.zeros(2 * bins, dtype=np.uint8)
+    if len(audio_data) == 0:
+        return envelope
+
+    # Pad to a whole number of samples per bin so the reshape is a single view
+    samples_per_bin = -(-len(audio_data) // bins)
+    padded = np.zeros(samples_per_bin * bins, dtype=np.float32)
+    padded[:len(audio_data)] = audio_data
+    frames = padded.reshape(bins, samples_per_bin)
+
+    peak = np.abs(frames).max(axis=1)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    envelope[:bins] = np.clip(peak * 255, 0, 255)
+    envelope[bins:] = np.clip(rms * 255, 0, 255)
+    return envelope
+
+
+class VisualizationStream:
+    """Emits decimated audio envelopes at a fixed frame rate.
+
+    The capture thread only appends chunks with `push`; a background thread
+    collects everything captured since the previous frame, computes one envelope
+    per requested resolution and emits it as a binary payload to the Socket.IO
+    room for that resolution (see `room_for`).
+    """
+
+    def __init__(self, emit, frame_rate, default_bins, min_bins, max_bins, max_buffered_chunks=64, room_prefix=''):
+        self._emit = emit
+        self.room_prefix = room_prefix
+        self.frame_interval = 1.0 / frame_rate
+        self.default_bins = default_bins
+        self.min_bins = min_bins
+        self.max_bins = max_bins
+
+        self._chunks = deque(maxlen=max_buffered_chunks)
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    def room_for(self, bins):
+        return f"{self.room_prefix}visualization_{bins}"
+
+    def clamp_bins(self, bins):
+        try:
+            bins = int(bins)
+        except (TypeError, ValueError):
+            return self.default_bins
+        return max(self.min_bins, min(self.max_bins, bins))
+
+    def set_client_resolution(self, client_id, bins):
+        """Record the resolution a client asked for; returns (old_bins, new_bins)"""
+        bins = self.clamp_bins(bins)
+        with self._lock:
+            old_bins = self._clients.get(client_id)
+            self._clients[client_id] = bins
+        return old_bins, bins
+
+    def remove_client(self, client_id):
+        """Forget a client; returns the resolution it had, or None"""
+        with self._lock:
+            return self._clients.pop(client_id, None)
+
+    def push(self, audio_data):
+        """Queue a captured chunk for the next frame; cheap enough for the capture thread"""
+        self._chunks.append(audio_data)
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._chunks.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _run(self):
+        next_frame = time.monotonic()
+        while self._running:
+            next_frame += self.frame_interval
+            delay = next_frame - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Running late; skip ahead instead of emitting a burst of frames
+                next_frame = time.monotonic()
+
+            chunks = []
+            while self._chunks:
+                chunks.append(self._chunks.popleft())
+            if not chunks:
+                continue
+
+            with self._lock:
+                resolutions = set(self._clients.values())
+            if not resolutions:
+                continue
+
+            audio_data = np.concatenate(chunks)
+            for bins in resolutions:
+                try:
+                    self._emit(compute_envelope(audio_data, bins).tobytes(), self.room_for(bins))
+                except Exception as e:
+                    print(f"Error emitting visualization frame: {e}")